@@ -95,6 +95,7 @@ interface State {
   reportName: string
   reportHash: string | null
   reportRunState: ReportRunState
+  scriptQueuePosition: number
   userSettings: UserSettings
   dialog?: DialogProps | null
   sharingEnabled?: boolean
@@ -140,6 +141,19 @@ export class App extends PureComponent<Props, State> {
 
   private readonly componentRegistry: ComponentRegistry
 
+  /**
+   * Token for resuming the session we were connected to before the
+   * connection dropped, if the server gave us one.
+   */
+  private resumeToken?: string
+
+  /**
+   * True if the server told us to keep an element that we don't have during
+   * this run. When the run finishes, we ask the server to send every element
+   * in full again, and rerun.
+   */
+  private missingElements = false
+
   constructor(props: Props) {
     super(props)
 
@@ -151,6 +165,7 @@ export class App extends PureComponent<Props, State> {
       reportId: "<null>",
       reportHash: null,
       reportRunState: ReportRunState.NOT_RUNNING,
+      scriptQueuePosition: 0,
       userSettings: {
         wideMode: false,
         runOnSave: false,
@@ -206,6 +221,7 @@ export class App extends PureComponent<Props, State> {
       onMessage: this.handleMessage,
       onConnectionError: this.handleConnectionError,
       connectionStateChanged: this.handleConnectionStateChanged,
+      getResumeToken: () => this.resumeToken,
     })
 
     if (isEmbeddedInIFrame()) {
@@ -274,6 +290,7 @@ export class App extends PureComponent<Props, State> {
       setCookie("_xsrf", "")
 
       if (SessionInfo.isSet()) {
+        this.resumeToken = SessionInfo.current.resumeToken
         SessionInfo.clearSession()
       }
     }
@@ -315,6 +332,8 @@ export class App extends PureComponent<Props, State> {
         uploadReportProgress: (progress: number) =>
           this.handleUploadReportProgress(progress),
         reportUploaded: (url: string) => this.handleReportUploaded(url),
+        scriptQueuePosition: (position: number) =>
+          this.setState({ scriptQueuePosition: position }),
       })
     } catch (err) {
       logError(err)
@@ -480,6 +499,9 @@ export class App extends PureComponent<Props, State> {
   handleNewReport = (newReportProto: NewReport): void => {
     const initialize = newReportProto.initialize as Initialize
 
+    // The script is running, so it's no longer waiting for a thread.
+    this.setState({ scriptQueuePosition: 0 })
+
     if (App.hasStreamlitVersionChanged(initialize)) {
       window.location.reload()
       return
@@ -499,6 +521,7 @@ export class App extends PureComponent<Props, State> {
       name: reportName,
       scriptPath,
       deployParams,
+      fragmentDeltaPath,
     } = newReportProto
 
     const newReportHash = hashString(
@@ -514,7 +537,18 @@ export class App extends PureComponent<Props, State> {
 
     MetricsManager.current.enqueue("updateReport")
 
-    if (reportHash === newReportHash) {
+    if (reportHash === newReportHash && fragmentDeltaPath.length > 0) {
+      // Only a fragment is rerunning, so only its contents get replaced.
+      this.pendingElementsBuffer = this.pendingElementsBuffer.withReportIdExcept(
+        reportId,
+        fragmentDeltaPath
+      )
+      this.setState({
+        reportId,
+        deployParams,
+        elements: this.pendingElementsBuffer,
+      })
+    } else if (reportHash === newReportHash) {
       this.setState({
         reportId,
         deployParams,
@@ -586,6 +620,23 @@ export class App extends PureComponent<Props, State> {
         )
       }
     }
+
+    if (this.missingElements) {
+      this.missingElements = false
+      this.resendElements()
+    }
+  }
+
+  /**
+   * Asks the server to send every element in full again, and reruns the
+   * script so it does. Used when the server's record of the elements we
+   * have has drifted from ours.
+   */
+  resendElements = (): void => {
+    const backMsg = new BackMsg({ resendElements: true })
+    backMsg.type = "resendElements"
+    this.sendBackMsg(backMsg)
+    this.widgetMgr.sendUpdateWidgetsMessage()
   }
 
   /*
@@ -651,6 +702,17 @@ export class App extends PureComponent<Props, State> {
     deltaMsg: Delta,
     metadataMsg: ForwardMsgMetadata
   ): void => {
+    if (
+      deltaMsg.type === "elementUnchanged" &&
+      !this.pendingElementsBuffer.hasElement(metadataMsg.deltaPath)
+    ) {
+      logError(
+        `Server assumed we have an element at ${metadataMsg.deltaPath}, ` +
+          "but we don't. Asking it to resend elements after this run."
+      )
+      this.missingElements = true
+    }
+
     this.pendingElementsBuffer = this.pendingElementsBuffer.applyDelta(
       this.state.reportId,
       deltaMsg,
@@ -942,6 +1004,7 @@ export class App extends PureComponent<Props, State> {
                 connectionState={connectionState}
                 sessionEventDispatcher={this.sessionEventDispatcher}
                 reportRunState={reportRunState}
+                scriptQueuePosition={this.state.scriptQueuePosition}
                 rerunReport={this.rerunScript}
                 stopReport={this.stopReport}
                 allowRunOnSave={allowRunOnSave}
@@ -58,6 +58,12 @@ export interface StatusWidgetProps {
   /** Report's current runstate */
   reportRunState: ReportRunState
 
+  /**
+   * If the script is waiting for a free script thread on the server, its
+   * position in line. 0 otherwise.
+   */
+  scriptQueuePosition?: number
+
   /**
    * Function called when the user chooses to re-run the report
    * in response to its source file changing.
@@ -327,7 +333,9 @@ class StatusWidget extends PureComponent<StatusWidgetProps, State> {
           isMinimized={this.state.statusMinimized}
           isPrompt={false}
         >
-          Running...
+          {this.props.scriptQueuePosition
+            ? `Waiting in line (#${this.props.scriptQueuePosition})...`
+            : "Running..."}
         </StyledReportStatusLabel>
         {stopButton}
       </StyledReportStatus>
@@ -48,6 +48,11 @@ interface Props {
    * Called when our ConnectionState is changed.
    */
   connectionStateChanged: (connectionState: ConnectionState) => void
+
+  /**
+   * Returns the token for resuming our previous session, if any.
+   */
+  getResumeToken?: () => string | undefined
 }
 
 /**
@@ -159,6 +164,7 @@ export class ConnectionManager {
       onMessage: this.props.onMessage,
       onConnectionStateChange: this.setConnectionState,
       onRetry: this.showRetryError,
+      getResumeToken: this.props.getResumeToken,
     })
   }
 
@@ -201,6 +207,7 @@ export class ConnectionManager {
       onMessage: this.props.onMessage,
       onConnectionStateChange: s => this.setConnectionState(s),
       onRetry: this.showRetryError,
+      getResumeToken: this.props.getResumeToken,
     })
   }
 
@@ -0,0 +1,119 @@
+/**
+ * @license
+ * Copyright 2018-2020 Streamlit Inc.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import { ForwardMsg } from "autogen/proto"
+import { ForwardMsgChunks } from "lib/ForwardMessageChunks"
+
+/**
+ * Create a ForwardMsg with the given hash.
+ */
+function createForwardMsg(hash: string): ForwardMsg {
+  return ForwardMsg.fromObject({
+    hash,
+    metadata: { cacheable: false, deltaId: 0 },
+    reportUploaded: `Report ${hash}, with enough text to need a few chunks`,
+  })
+}
+
+/**
+ * Split a ForwardMsg into chunks of chunkSize bytes, like the server does.
+ */
+function createChunks(
+  msg: ForwardMsg,
+  chunkSize: number,
+  msgHash = msg.hash
+): ForwardMsg[] {
+  const data = ForwardMsg.encode(msg).finish()
+  const count = Math.ceil(data.length / chunkSize)
+  const chunks: ForwardMsg[] = []
+  for (let index = 0; index < count; index++) {
+    chunks.push(
+      ForwardMsg.fromObject({
+        chunk: {
+          msgHash,
+          index,
+          count,
+          data: data.slice(index * chunkSize, (index + 1) * chunkSize),
+        },
+      })
+    )
+  }
+  return chunks
+}
+
+test("passes other messages through", () => {
+  const chunks = new ForwardMsgChunks()
+  const msg = createForwardMsg("a")
+  expect(chunks.process(msg)).toBe(msg)
+})
+
+test("reassembles chunks", () => {
+  const chunks = new ForwardMsgChunks()
+  const msg = createForwardMsg("a")
+  const msgChunks = createChunks(msg, 8)
+  expect(msgChunks.length).toBeGreaterThan(2)
+
+  msgChunks.slice(0, -1).forEach(chunk => {
+    expect(chunks.process(chunk)).toBeUndefined()
+  })
+  expect(chunks.process(msgChunks[msgChunks.length - 1])).toEqual(msg)
+  expect(chunks.size).toBe(0)
+})
+
+test("reassembles interleaved, out-of-order chunks", () => {
+  const chunks = new ForwardMsgChunks()
+  const msgA = createForwardMsg("a")
+  const msgB = createForwardMsg("b")
+  const chunksA = createChunks(msgA, 8).reverse()
+  const chunksB = createChunks(msgB, 8)
+
+  const results: (ForwardMsg | undefined)[] = []
+  for (let i = 0; i < Math.max(chunksA.length, chunksB.length); i++) {
+    if (i < chunksA.length) {
+      results.push(chunks.process(chunksA[i]))
+    }
+    if (i < chunksB.length) {
+      results.push(chunks.process(chunksB[i]))
+    }
+  }
+
+  expect(results.filter(result => result !== undefined)).toEqual([
+    msgA,
+    msgB,
+  ])
+  expect(chunks.size).toBe(0)
+})
+
+test("ignores duplicate chunks", () => {
+  const chunks = new ForwardMsgChunks()
+  const msg = createForwardMsg("a")
+  const msgChunks = createChunks(msg, 8)
+
+  expect(chunks.process(msgChunks[0])).toBeUndefined()
+  expect(chunks.process(msgChunks[0])).toBeUndefined()
+  msgChunks.slice(1, -1).forEach(chunk => chunks.process(chunk))
+  expect(chunks.process(msgChunks[msgChunks.length - 1])).toEqual(msg)
+})
+
+test("drops messages whose hash doesn't match their chunks", () => {
+  const chunks = new ForwardMsgChunks()
+  const msgChunks = createChunks(createForwardMsg("a"), 8, "b")
+
+  const results = msgChunks.map(chunk => chunks.process(chunk))
+  expect(results.every(result => result === undefined)).toBe(true)
+  expect(chunks.size).toBe(0)
+})
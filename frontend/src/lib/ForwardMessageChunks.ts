@@ -0,0 +1,112 @@
+/**
+ * @license
+ * Copyright 2018-2020 Streamlit Inc.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import { ForwardMsg } from "autogen/proto"
+import { logError, logWarning } from "lib/log"
+
+/**
+ * Name of the logger.
+ */
+const LOG = "ForwardMsgChunks"
+
+/**
+ * The chunks of a ForwardMsg that we've received so far.
+ */
+interface PendingMessage {
+  /** The message's chunks, by index. Missing ones are undefined. */
+  chunks: (Uint8Array | undefined)[]
+
+  /** How many of the chunks have arrived. */
+  received: number
+
+  /** The total length of the chunks that have arrived. */
+  length: number
+}
+
+/**
+ * Reassembles the large ForwardMsgs that the server splits into chunks, for
+ * WebsocketConnection.
+ */
+export class ForwardMsgChunks {
+  /**
+   * Messages whose remaining chunks haven't arrived yet, keyed by the hash
+   * of the message they belong to.
+   */
+  private readonly pending = new Map<string, PendingMessage>()
+
+  /**
+   * If the given message is a chunk, store it, and return the original
+   * message once all of its chunks have arrived (or undefined until then).
+   * Any other message is returned unmodified.
+   */
+  public process(msg: ForwardMsg): ForwardMsg | undefined {
+    if (msg.type !== "chunk" || msg.chunk == null) {
+      return msg
+    }
+
+    const { msgHash, index, count, data } = msg.chunk
+    let pending = this.pending.get(msgHash)
+    if (pending === undefined) {
+      pending = { chunks: new Array(count), received: 0, length: 0 }
+      this.pending.set(msgHash, pending)
+    }
+
+    if (index >= pending.chunks.length || pending.chunks[index] != null) {
+      logWarning(
+        LOG,
+        `Ignoring unexpected chunk ${index}/${count} [hash=${msgHash}]`
+      )
+      return undefined
+    }
+
+    pending.chunks[index] = data
+    pending.received += 1
+    pending.length += data.length
+    if (pending.received < pending.chunks.length) {
+      return undefined
+    }
+
+    this.pending.delete(msgHash)
+
+    const buffer = new Uint8Array(pending.length)
+    let offset = 0
+    pending.chunks.forEach(chunk => {
+      const bytes = chunk as Uint8Array
+      buffer.set(bytes, offset)
+      offset += bytes.length
+    })
+
+    const reassembled = ForwardMsg.decode(buffer)
+    if (reassembled.hash !== msgHash) {
+      logError(
+        LOG,
+        `Dropping reassembled message [hash=${reassembled.hash}]: ` +
+          `its chunks were sent for [hash=${msgHash}]`
+      )
+      return undefined
+    }
+
+    return reassembled
+  }
+
+  /**
+   * The number of messages whose chunks haven't all arrived yet.
+   */
+  public get size(): number {
+    return this.pending.size
+  }
+}
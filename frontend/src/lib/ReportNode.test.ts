@@ -197,6 +197,36 @@ describe("ReportRoot.applyDelta", () => {
     expect(addRowsElement.reportId).toBe("postAddRows")
     expect(addRowsElement.immutableElement).toEqual(expectedData)
   })
+
+  it("handles 'elementUnchanged' deltas", () => {
+    const delta = makeProto(DeltaProto, { elementUnchanged: true })
+    const newRoot = ROOT.applyDelta(
+      "new_report_id",
+      delta,
+      forwardMsgMetadata([0, 1, 0])
+    )
+
+    // The element is kept, and belongs to the new report.
+    const node = newRoot.main.getIn([1, 0]) as ElementNode
+    expect(node).toBeTextNode("2")
+    expect(node.reportId).toBe("new_report_id")
+    expect(newRoot.main.getIn([1])?.reportId).toBe("new_report_id")
+
+    // So it isn't cleared when the run finishes.
+    const pruned = newRoot.clearStaleNodes("new_report_id")
+    expect(pruned.main.getIn([0, 0])).toBeTextNode("2")
+  })
+
+  it("ignores 'elementUnchanged' deltas without an element", () => {
+    const delta = makeProto(DeltaProto, { elementUnchanged: true })
+    expect(ROOT.hasElement([0, 1])).toBe(false)
+    const newRoot = ROOT.applyDelta(
+      "new_report_id",
+      delta,
+      forwardMsgMetadata([0, 1])
+    )
+    expect(newRoot).toBe(ROOT)
+  })
 })
 
 describe("ReportRoot.clearStaleNodes", () => {
@@ -241,6 +271,22 @@ describe("ReportRoot.clearStaleNodes", () => {
   })
 })
 
+describe("ReportRoot.withReportIdExcept", () => {
+  it("keeps everything but the fragment's contents", () => {
+    // The fragment is the block at main.[1].
+    const newRoot = ROOT.withReportIdExcept("new_report_id", [0, 1])
+
+    expect(newRoot.main.getIn([0])?.reportId).toBe("new_report_id")
+    expect(newRoot.main.getIn([1])?.reportId).toBe("new_report_id")
+    expect(newRoot.main.getIn([1, 0])?.reportId).toBe(NO_REPORT_ID)
+
+    // The fragment's old contents are cleared when the run finishes.
+    const pruned = newRoot.clearStaleNodes("new_report_id")
+    expect(pruned.main.getIn([0])).toBeTextNode("1")
+    expect(pruned.main.getIn([1, 0])).not.toBeDefined()
+  })
+})
+
 describe("ReportRoot.getElements", () => {
   it("returns all elements", () => {
     // We have elements at main.[0] and main.[1, 0]
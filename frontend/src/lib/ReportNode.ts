@@ -24,6 +24,7 @@ import Protobuf, {
 } from "autogen/proto"
 import { Map as ImmutableMap } from "immutable"
 import { addRows } from "./dataFrameProto"
+import { logWarning } from "./log"
 import { toImmutableProto } from "./immutableProto"
 import { MetricsManager } from "./MetricsManager"
 import { makeElementWithInfoText, notUndefined } from "./utils"
@@ -95,6 +96,13 @@ export interface ReportNode {
    */
   clearStaleNodes(currentReportId: string): ReportNode | undefined
 
+  /**
+   * Return a copy of this node and its descendants that belongs to the given
+   * report. If `exceptPath` is given, the children of the block at that
+   * index path keep their report ID.
+   */
+  withReportId(reportId: string, exceptPath?: number[]): ReportNode
+
   /**
    * Return a Set of all the Elements contained in the tree.
    * If an existing Set is passed in, that Set will be mutated and returned.
@@ -165,6 +173,15 @@ export class ElementNode implements ReportNode {
     return this.reportId === currentReportId ? this : undefined
   }
 
+  public withReportId(reportId: string): ElementNode {
+    if (this.reportId === reportId) {
+      return this
+    }
+    const newNode = new ElementNode(this.element, this.metadata, reportId)
+    newNode.lazyImmutableElement = this.lazyImmutableElement
+    return newNode
+  }
+
   public getElements(elements?: Set<Element>): Set<Element> {
     if (elements == null) {
       elements = new Set<Element>()
@@ -272,6 +289,23 @@ export class BlockNode implements ReportNode {
     return new BlockNode(newChildren, this.deltaBlock, currentReportId)
   }
 
+  public withReportId(reportId: string, exceptPath: number[] = []): BlockNode {
+    const newChildren = this.children.map((child, index) => {
+      if (exceptPath.length === 0 || index !== exceptPath[0]) {
+        return child.withReportId(reportId)
+      }
+      if (exceptPath.length > 1) {
+        return child.withReportId(reportId, exceptPath.slice(1))
+      }
+      // The block itself belongs to the new report, but its children don't.
+      return child instanceof BlockNode
+        ? new BlockNode(child.children, child.deltaBlock, reportId)
+        : child
+    })
+
+    return new BlockNode(newChildren, this.deltaBlock, reportId)
+  }
+
   public getElements(elementSet?: Set<Element>): Set<Element> {
     if (elementSet == null) {
       elementSet = new Set<Element>()
@@ -388,6 +422,10 @@ export class ReportRoot {
         return this.addRows(deltaPath, delta.addRows as NamedDataSet, reportId)
       }
 
+      case "elementUnchanged": {
+        return this.keepElement(deltaPath, reportId)
+      }
+
       default:
         throw new Error(`Unrecognized deltaType: '${delta.type}'`)
     }
@@ -407,6 +445,24 @@ export class ReportRoot {
     )
   }
 
+  /**
+   * Move every node to the given report, except for the children of the block
+   * at the given delta path. When only a fragment of the script reruns, this
+   * keeps the rest of the app from looking stale, or being cleared when the
+   * run finishes.
+   */
+  public withReportIdExcept(
+    reportId: string,
+    deltaPath: number[]
+  ): ReportRoot {
+    return new ReportRoot(this.root.withReportId(reportId, deltaPath))
+  }
+
+  /** True if there's an element at the given delta path. */
+  public hasElement(deltaPath: number[]): boolean {
+    return this.root.getIn(deltaPath) instanceof ElementNode
+  }
+
   /** Return a Set containing all Elements in the tree. */
   public getElements(): Set<Element> {
     const elements = new Set<Element>()
@@ -442,6 +498,23 @@ export class ReportRoot {
     return new ReportRoot(this.root.setIn(deltaPath, blockNode, reportId))
   }
 
+  /**
+   * Keep the element at the given delta path for the current report. If
+   * there's no element there, the server's record of our elements has
+   * drifted from ours: this is logged, and the tree is returned unchanged.
+   * (App asks the server to resend its elements when that happens.)
+   */
+  private keepElement(deltaPath: number[], reportId: string): ReportRoot {
+    const existingNode = this.root.getIn(deltaPath)
+    if (!(existingNode instanceof ElementNode)) {
+      logWarning(`Can't keep element: no element at deltaPath: ${deltaPath}`)
+      return this
+    }
+
+    const elementNode = existingNode.withReportId(reportId)
+    return new ReportRoot(this.root.setIn(deltaPath, elementNode, reportId))
+  }
+
   private addRows(
     deltaPath: number[],
     namedDataSet: NamedDataSet,
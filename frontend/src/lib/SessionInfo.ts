@@ -27,6 +27,7 @@ export interface Args {
   maxCachedMessageAge: number
   commandLine: string
   userMapboxToken: string
+  resumeToken?: string
 }
 
 export class SessionInfo {
@@ -57,6 +58,13 @@ export class SessionInfo {
    */
   public readonly userMapboxToken: string
 
+  /**
+   * Secret that lets us resume this session if the websocket reconnects
+   * while the server is still holding on to it. Empty if the server doesn't
+   * keep disconnected sessions around.
+   */
+  public readonly resumeToken: string
+
   /**
    * Singleton SessionInfo object. The reasons we're using a singleton here
    * instead of just exporting a module-level instance are:
@@ -106,6 +114,7 @@ export class SessionInfo {
       maxCachedMessageAge: config.maxCachedMessageAge,
       commandLine: initialize.commandLine,
       userMapboxToken: config.mapboxToken,
+      resumeToken: initialize.resumeToken,
     })
   }
 
@@ -120,6 +129,7 @@ export class SessionInfo {
     maxCachedMessageAge,
     commandLine,
     userMapboxToken,
+    resumeToken,
   }: Args) {
     if (
       sessionId == null ||
@@ -146,5 +156,6 @@ export class SessionInfo {
     this.maxCachedMessageAge = maxCachedMessageAge
     this.commandLine = commandLine
     this.userMapboxToken = userMapboxToken
+    this.resumeToken = resumeToken || ""
   }
 }
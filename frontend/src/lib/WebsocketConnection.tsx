@@ -21,6 +21,7 @@ import { BackMsg, ForwardMsg, IBackMsg } from "autogen/proto"
 import axios from "axios"
 import { ConnectionState } from "lib/ConnectionState"
 import { ForwardMsgCache } from "lib/ForwardMessageCache"
+import { ForwardMsgChunks } from "lib/ForwardMessageChunks"
 import { logError, logMessage, logWarning } from "lib/log"
 import Resolver from "lib/Resolver"
 import { SessionInfo } from "lib/SessionInfo"
@@ -42,6 +43,14 @@ const SERVER_PING_PATH = "healthz"
  */
 const WEBSOCKET_STREAM_PATH = "stream"
 
+/**
+ * When reconnecting to our session, we offer these two websocket
+ * subprotocols. The server picks the first, and reads the session's resume
+ * token from the second.
+ */
+const STREAMLIT_SUBPROTOCOL = "streamlit"
+const RESUME_TOKEN_SUBPROTOCOL_PREFIX = "streamlit-resume."
+
 /**
  * Wait this long between pings, in millis.
  */
@@ -90,6 +99,13 @@ interface Args {
    * Function called when we receive a new message.
    */
   onMessage: OnMessage
+
+  /**
+   * Function that returns the resume token of the session we were last
+   * connected to, if any. It's sent when reconnecting, so the server can
+   * hand us back that session instead of rerunning the script.
+   */
+  getResumeToken?: () => string | undefined
 }
 
 interface MessageQueue {
@@ -159,6 +175,11 @@ export class WebsocketConnection {
    */
   private messageQueue: MessageQueue = {}
 
+  /**
+   * Reassembles large ForwardMsgs that the server sends in chunks.
+   */
+  private readonly chunks = new ForwardMsgChunks()
+
   /**
    * The current state of this object's state machine.
    */
@@ -324,6 +345,18 @@ export class WebsocketConnection {
       WEBSOCKET_STREAM_PATH
     )
 
+    // The resume token is sent as a subprotocol rather than in the URL, so
+    // that it doesn't end up in access logs.
+    const resumeToken = this.args.getResumeToken
+      ? this.args.getResumeToken()
+      : undefined
+    const protocols = resumeToken
+      ? [
+          STREAMLIT_SUBPROTOCOL,
+          `${RESUME_TOKEN_SUBPROTOCOL_PREFIX}${resumeToken}`,
+        ]
+      : undefined
+
     if (this.websocket != null) {
       // This should never happen. We set the websocket to null in both FSM
       // nodes that lead to this one.
@@ -331,7 +364,7 @@ export class WebsocketConnection {
     }
 
     logMessage(LOG, "creating WebSocket")
-    this.websocket = new WebSocket(uri)
+    this.websocket = new WebSocket(uri, protocols)
 
     this.setConnectionTimeout(uri)
 
@@ -466,10 +499,17 @@ export class WebsocketConnection {
     }
 
     const resultArray = new Uint8Array(result)
-    const msg = ForwardMsg.decode(resultArray)
-    this.messageQueue[messageIndex] = await this.cache.processMessagePayload(
-      msg
-    )
+    const msg = this.chunks.process(ForwardMsg.decode(resultArray))
+    if (msg === undefined) {
+      // This was a chunk of a message that hasn't fully arrived yet, or that
+      // we dropped. Leave an empty slot, so that later messages can still be
+      // dispatched.
+      this.messageQueue[messageIndex] = null
+    } else {
+      this.messageQueue[messageIndex] = await this.cache.processMessagePayload(
+        msg
+      )
+    }
 
     // Dispatch any pending messages in the queue. This may *not* result
     // in our just-decoded message being dispatched: if there are other
@@ -477,7 +517,9 @@ export class WebsocketConnection {
     // downloaded, our message won't be sent until they're done.
     while (this.lastDispatchedMessageIndex + 1 in this.messageQueue) {
       const dispatchMessageIndex = this.lastDispatchedMessageIndex + 1
-      this.args.onMessage(this.messageQueue[dispatchMessageIndex])
+      if (this.messageQueue[dispatchMessageIndex] != null) {
+        this.args.onMessage(this.messageQueue[dispatchMessageIndex])
+      }
       delete this.messageQueue[dispatchMessageIndex]
       this.lastDispatchedMessageIndex = dispatchMessageIndex
     }
@@ -85,6 +85,7 @@ from streamlit.proto import ForwardMsg_pb2 as _ForwardMsg_pb2
 # Modules that the user should have access to. These are imported with "as"
 # syntax pass mypy checking with implicit_reexport disabled.
 from streamlit.caching import cache as cache  # noqa: F401
+from streamlit.fragment import fragment as experimental_fragment  # noqa: F401
 
 # This is set to True inside cli._main_run(), and is False otherwise.
 # If False, we should assume that DeltaGenerator functions are effectively
@@ -27,7 +27,10 @@ from streamlit import env_util
 from streamlit import util
 from streamlit.report import Report
 from streamlit.logger import get_logger
+from streamlit.process_script_runner import get_pool as get_script_process_pool
+from streamlit.server import workers
 from streamlit.server.server import Server, server_address_is_unix_socket
+from streamlit.server.server import find_port_for_workers
 
 LOGGER = get_logger(__name__)
 
@@ -133,6 +136,10 @@ def _fix_sys_argv(script_path, args):
 
 
 def _on_server_start(server):
+    if not workers.is_main_worker():
+        # Only one worker prints the URL and opens the browser.
+        return
+
     _maybe_print_old_git_warning(server.script_path)
     _print_url(server.is_running_hello)
 
@@ -254,6 +261,27 @@ def _maybe_print_old_git_warning(script_path: str) -> None:
         click.secho("  To enable this feature, please update Git.", fg="yellow")
 
 
+def _maybe_fork_workers():
+    num_workers = config.get_option("server.workers")
+    if num_workers <= 1:
+        return
+
+    if not workers.can_fork_workers():
+        LOGGER.warning("server.workers is not supported on this platform.")
+        return
+
+    if server_address_is_unix_socket():
+        LOGGER.warning("server.workers is not supported with unix sockets.")
+        return
+
+    # The cookie secret is generated randomly if unset. Generate it before
+    # forking, so all workers agree on it.
+    config.get_option("server.cookieSecret")
+
+    find_port_for_workers()
+    workers.fork_workers(num_workers)
+
+
 def run(script_path, command_line, args):
     """Run a script in a separate thread and start a server for the app.
 
@@ -271,11 +299,17 @@ def run(script_path, command_line, args):
     _fix_tornado_crash()
     _fix_sys_argv(script_path, args)
     _fix_pydeck_mapbox_api_warning()
+    _maybe_fork_workers()
 
     # Install a signal handler that will shut down the ioloop
     # and close all our threads
     _set_up_signal_handler()
 
+    if config.get_option("runner.processIsolation"):
+        # Start the script processes now, so that the first run doesn't have
+        # to wait for them.
+        get_script_process_pool()
+
     ioloop = tornado.ioloop.IOLoop.current()
 
     # Create and start the server.
@@ -34,6 +34,7 @@ from cachetools import TTLCache
 
 from streamlit import config
 from streamlit import file_util
+from streamlit import tracing
 from streamlit import util
 from streamlit.errors import StreamlitAPIWarning
 from streamlit.errors import StreamlitDeprecationWarning
@@ -263,6 +264,7 @@ def _write_to_mem_cache(
     mem_cache[key] = _CacheEntry(value=value, hash=hash)
 
 
+@tracing.traced("st.cache hash output")
 def _get_output_hash(value, func_or_code, hash_funcs):
     hasher = hashlib.new("md5")
     update_hash(
@@ -308,6 +310,7 @@ def _write_to_disk_cache(key, value):
         raise CacheError("Unable to write to cache: %s" % e)
 
 
+@tracing.traced("st.cache read")
 def _read_from_cache(
     mem_cache, key, persist, allow_output_mutation, func_or_code, hash_funcs=None
 ):
@@ -336,6 +339,7 @@ def _read_from_cache(
         raise e
 
 
+@tracing.traced("st.cache write")
 def _write_to_cache(
     mem_cache, key, value, persist, allow_output_mutation, func_or_code, hash_funcs=None
 ):
@@ -540,23 +544,24 @@ def cache(
             # cache that is *not* per-function.)
             value_hasher = hashlib.new("md5")
 
-            if args:
-                update_hash(
-                    args,
-                    hasher=value_hasher,
-                    hash_funcs=hash_funcs,
-                    hash_reason=HashReason.CACHING_FUNC_ARGS,
-                    hash_source=func,
-                )
-
-            if kwargs:
-                update_hash(
-                    kwargs,
-                    hasher=value_hasher,
-                    hash_funcs=hash_funcs,
-                    hash_reason=HashReason.CACHING_FUNC_ARGS,
-                    hash_source=func,
-                )
+            with tracing.span("st.cache hash arguments"):
+                if args:
+                    update_hash(
+                        args,
+                        hasher=value_hasher,
+                        hash_funcs=hash_funcs,
+                        hash_reason=HashReason.CACHING_FUNC_ARGS,
+                        hash_source=func,
+                    )
+
+                if kwargs:
+                    update_hash(
+                        kwargs,
+                        hasher=value_hasher,
+                        hash_funcs=hash_funcs,
+                        hash_reason=HashReason.CACHING_FUNC_ARGS,
+                        hash_source=func,
+                    )
 
             value_key = value_hasher.hexdigest()
 
@@ -214,6 +214,22 @@ _create_option(
     default_val="off",
 )
 
+_create_option(
+    "global.reportRetention",
+    description="""
+        Configure which messages each session keeps after sending them to
+        the browser. Sharing an app, and resuming a disconnected session
+        without rerunning its script, need the whole report.
+
+        Should be set to one of these values:
+        - "auto" : keep the whole report if global.sharingMode or
+          server.disconnectedSessionTTL is set, and otherwise "off".
+        - "full" : keep the whole report.
+        - "off" : only keep the message that initializes the browser.
+        """,
+    default_val="auto",
+)
+
 _create_option(
     "global.showWarningOnDirectExecution",
     description="""
@@ -269,6 +285,24 @@ _create_option(
     type_=bool,
 )
 
+_create_option(
+    "global.tracingSampleRate",
+    description="""Fraction of script runs and outgoing messages to trace,
+        from 0 to 1. Recent traces are served from /debugz?trace=1.
+        Default: 0, which disables tracing.""",
+    visibility="hidden",
+    default_val=0.0,
+    type_=float,
+)
+
+_create_option(
+    "global.tracingFile",
+    description="""Also append traced spans to this file, in the Chrome trace
+        event format.""",
+    visibility="hidden",
+    default_val=None,
+)
+
 _create_option(
     "global.suppressDeprecationWarnings",
     description="Hide deprecation warnings in the streamlit app.",
@@ -286,6 +320,16 @@ _create_option(
     type_=float,
 )  # 10k
 
+_create_option(
+    "global.minOffloadedMessageSize",
+    description="""Hash and serialize ForwardMsgs that are greater than or
+        equal to this size (in bytes) in a thread pool, rather than on the
+        server's event loop.""",
+    visibility="hidden",
+    default_val=1000 * 1000,
+    type_=int,
+)  # 1MB
+
 _create_option(
     "global.maxCachedMessageAge",
     description="""Expire cached ForwardMsgs whose age is greater than this
@@ -296,6 +340,16 @@ _create_option(
     type_=int,
 )
 
+_create_option(
+    "global.messageChunkSize",
+    description="""Split ForwardMsgs whose serialized size is greater than
+        this many bytes into chunks, which are sent to the browser one at a
+        time and reassembled there.""",
+    visibility="hidden",
+    default_val=5 * 1000 * 1000,
+    type_=int,
+)  # 5MB
+
 
 # Config Section: Logger #
 _create_section("logger", "Settings to customize Streamlit log messages.")
@@ -379,6 +433,73 @@ _create_option(
     type_=bool,
 )
 
+_create_option(
+    "runner.interruptScripts",
+    description="""
+        Stop or rerun your script as soon as that's requested, even in the
+        middle of a long computation, by raising an exception in the script's
+        thread. Unlike runner.installTracer, this doesn't slow your script
+        down. Without it, the script only stops at its next Streamlit call.
+        Code that's blocked in a call to a C extension, such as time.sleep(),
+        is interrupted when the call returns.
+        """,
+    default_val=False,
+    type_=bool,
+)
+
+_create_option(
+    "runner.maxElementUpdatesPerSecond",
+    description="""
+        The maximum number of times per second to send each element to the
+        browser. When a script replaces an element more often than that, e.g.
+        by updating st.progress or a placeholder in a tight loop, the
+        replacements in between are dropped, and images in them aren't even
+        encoded. The final value of each element is always sent.
+        Set to 0 to send every replacement.
+        """,
+    default_val=0,
+    type_=int,
+)
+
+_create_option(
+    "runner.rerunDebounceMs",
+    description="""
+        Wait until there have been no new rerun requests for this many
+        milliseconds before rerunning the script. Rapid interactions, like
+        dragging a slider, then rerun the script once, with the latest widget
+        values, instead of stopping and restarting it on every change.
+        Set to 0 to rerun right away.
+        """,
+    default_val=0,
+    type_=int,
+)
+
+_create_option(
+    "runner.minRerunIntervalMs",
+    description="""
+        The minimum time between the starts of two reruns of a session's
+        script, in milliseconds. A rerun requested sooner than that waits,
+        which gives an expensive script time to finish and show its results
+        before it's stopped to rerun. Set to 0 for no minimum.
+        """,
+    default_val=0,
+    type_=int,
+)
+
+_create_option(
+    "runner.enableProfiler",
+    description="""
+        Allows script runs to be profiled by adding `_stprofile=1` to the
+        app's URL. Profiles of recent runs are served from
+        /debugz?profile=0 (the most recent), /debugz?profile=1, and so on, as
+        collapsed stacks that flame graph tools can read. Runs without the
+        URL flag are not profiled.
+        """,
+    visibility="hidden",
+    default_val=False,
+    type_=bool,
+)
+
 _create_option(
     "runner.fixMatplotlib",
     description="""
@@ -389,6 +510,43 @@ _create_option(
     type_=bool,
 )
 
+_create_option(
+    "runner.processIsolation",
+    description="""
+        Run scripts in a pool of separate processes, rather than in threads
+        inside the server process. This keeps CPU-heavy scripts from slowing
+        down the server, at the cost of some overhead for each message. Note
+        that each process has its own st.cache, and that a widget in an
+        st.experimental_fragment reruns the whole script rather than just
+        the fragment.
+        """,
+    default_val=False,
+    type_=bool,
+)
+
+_create_option(
+    "runner.processPoolSize",
+    description="""
+        Maximum number of processes that run scripts when
+        runner.processIsolation is true. When all of them are busy, script
+        runs wait for a process to become free.
+        """,
+    default_val=4,
+    type_=int,
+)
+
+_create_option(
+    "runner.maxScriptThreads",
+    description="""
+        Maximum number of scripts that run at once in the server process. When
+        that many are running, other script runs wait in line for a free
+        thread, and their browsers show their place in line. Set to 0 for no
+        limit, where each run gets its own thread.
+        """,
+    default_val=0,
+    type_=int,
+)
+
 # Config Section: Server #
 
 _create_section("server", "Settings for the Streamlit server")
@@ -503,6 +661,19 @@ def _server_port():
     return 8501
 
 
+_create_option(
+    "server.workers",
+    description="""
+        Number of server processes to run. When greater than 1, the server
+        forks this many worker processes, which share the server port. Each
+        browser session is handled by a single worker. Not supported on
+        Windows, or when server.address is a unix socket.
+        """,
+    default_val=1,
+    type_=int,
+)
+
+
 _create_option(
     "server.baseUrlPath",
     description="""
@@ -549,6 +720,18 @@ def _server_max_upload_size():
     return 200
 
 
+@_create_option("server.maxWebsocketBufferSize", type_=int)
+def _server_max_websocket_buffer_size():
+    """Max size, in megabytes, of messages that have been written to a
+    browser's websocket but not yet sent over the network. While a slow
+    browser is above this limit, the server holds back new messages for it,
+    and repeated updates to the same element are merged into one.
+
+    Default: 32
+    """
+    return 32
+
+
 @_create_option("server.enableWebsocketCompression", type_=bool)
 def _server_enable_websocket_compression():
     """Enables support for websocket compression.
@@ -558,6 +741,85 @@ def _server_enable_websocket_compression():
     return True
 
 
+_create_option(
+    "server.websocketCompressionLevel",
+    description="""
+        zlib compression level for websocket messages, from 1 (fastest) to 9
+        (smallest).
+        """,
+    default_val=6,
+    type_=int,
+)
+
+_create_option(
+    "server.websocketCompressionMemLevel",
+    description="""
+        zlib memory level for websocket compression, from 1 (least memory per
+        connection) to 9 (fastest).
+        """,
+    default_val=8,
+    type_=int,
+)
+
+_create_option(
+    "server.websocketCompressionMinSize",
+    description="""
+        Send websocket messages smaller than this size (in bytes)
+        uncompressed. Larger messages are compressed unless a sample of them
+        shows they don't compress well, as is the case for images.
+        """,
+    default_val=1024,
+    type_=int,
+)
+
+_create_option(
+    "server.disconnectedSessionTTL",
+    description="""
+        Number of seconds to keep a session after its websocket disconnects.
+        If the browser reconnects within that time, it gets its session back,
+        with the app's current output, and the script doesn't rerun. Set to 0
+        to close sessions as soon as their websocket disconnects.
+        """,
+    default_val=0,
+    type_=int,
+)
+
+_create_option(
+    "server.preheatedSessions",
+    description="""
+        Number of sessions to keep ready for new browsers, with the script
+        already run. When a browser claims one, another is started in the
+        background. Set to 0 to only preheat one session, for the first
+        browser that connects.
+        """,
+    default_val=0,
+    type_=int,
+)
+
+_create_option(
+    "server.preheatCpuShare",
+    description="""
+        Share of one CPU, from 0 to 1, that refilling the preheated sessions
+        may use. Sessions are preheated one at a time, and after a run that
+        took T seconds, the next one waits T * (1 / share - 1) seconds.
+        """,
+    default_val=0.5,
+    type_=float,
+)
+
+_create_option(
+    "server.skipUnchangedElements",
+    description="""
+        When a rerun writes an element that's identical to the one the
+        browser already shows in its place, send a small "unchanged" marker
+        instead of the element. This hashes every element on the server
+        thread, which is why it's off by default.
+        """,
+    default_val=False,
+    type_=bool,
+)
+
+
 # Config Section: Browser #
 
 _create_section("browser", "Configuration of browser front-end.")
@@ -17,6 +17,7 @@ from typing import Optional, Iterable, List
 
 from streamlit import caching
 from streamlit import cursor
+from streamlit import tracing
 from streamlit import type_util
 from streamlit.cursor import Cursor
 from streamlit.report_thread import get_report_ctx
@@ -304,6 +305,7 @@ class DeltaGenerator(
         dg = self._active_dg
         return str(dg._cursor.delta_path) if dg._cursor is not None else "[]"
 
+    @tracing.traced("DeltaGenerator._enqueue")
     def _enqueue(
         self,
         delta_type,
@@ -319,8 +321,15 @@ class DeltaGenerator(
         ----------
         delta_type: string
             The name of the streamlit method being called
-        element_proto: proto
-            The actual proto in the NewElement type e.g. Alert/Button/Slider
+        element_proto: proto, ForwardMsg or callable
+            The actual proto in the NewElement type e.g. Alert/Button/Slider,
+            or a function that marshalls and returns it. A function is only
+            called if the element is sent, so elements that are expensive to
+            marshal can pass one to skip that work for replacements that
+            runner.maxElementUpdatesPerSecond drops.
+            Large elements can instead be marshalled right into the
+            new_element of a ForwardMsg, and pass (or return) that message,
+            which then gets enqueued without copying the element.
         return_value: any or None
             The value to return to the calling script (for widgets)
         element_width : int or None
@@ -348,23 +357,40 @@ class DeltaGenerator(
         if proto_type in DELTAS_TYPES_THAT_MELT_DATAFRAMES:
             proto_type = "vega_lite_chart"
 
-        # Copy the marshalled proto into the overall msg proto
-        msg = ForwardMsg_pb2.ForwardMsg()
-        msg_el_proto = getattr(msg.delta.new_element, proto_type)
-        msg_el_proto.CopyFrom(element_proto)
+        def make_msg(element_proto):
+            if isinstance(element_proto, ForwardMsg_pb2.ForwardMsg):
+                # The element was marshalled right into its msg.
+                msg = element_proto
+            else:
+                # Copy the marshalled proto into the overall msg proto
+                msg = ForwardMsg_pb2.ForwardMsg()
+                msg_el_proto = getattr(msg.delta.new_element, proto_type)
+                msg_el_proto.CopyFrom(element_proto)
 
-        # Only enqueue message and fill in metadata if there's a container.
-        msg_was_enqueued = False
-        if dg._root_container is not None and dg._cursor is not None:
-            msg.metadata.delta_path[:] = dg._cursor.delta_path
+            msg.metadata.delta_path[:] = delta_path
 
             if element_width is not None:
                 msg.metadata.element_dimension_spec.width = element_width
             if element_height is not None:
                 msg.metadata.element_dimension_spec.height = element_height
 
-            _enqueue_message(msg)
+            return msg
+
+        # Only enqueue message and fill in metadata if there's a container.
+        msg_was_enqueued = False
+        if dg._root_container is not None and dg._cursor is not None:
+            delta_path = dg._cursor.delta_path
+
+            if callable(element_proto) and _should_hold_update(delta_path):
+                _hold_update(delta_path, element_proto, make_msg)
+            else:
+                if callable(element_proto):
+                    element_proto = element_proto()
+                _enqueue_message(make_msg(element_proto))
             msg_was_enqueued = True
+        elif callable(element_proto):
+            # Marshall it anyway, so errors are raised the same way.
+            element_proto()
 
         if msg_was_enqueued:
             # Get a DeltaGenerator that is locked to the current element
@@ -609,3 +635,39 @@ def _enqueue_message(msg):
         raise NoSessionContext()
 
     ctx.enqueue(msg)
+
+
+def _should_hold_update(delta_path):
+    """True if replacing the element at delta_path now would be held back
+    by runner.maxElementUpdatesPerSecond."""
+    ctx = get_report_ctx()
+    return (
+        ctx is not None
+        and ctx.delta_throttle is not None
+        and ctx.delta_throttle.should_hold(delta_path)
+    )
+
+
+def _hold_update(delta_path, marshall_element, make_msg):
+    """Hold back an element replacement, marshalling it only if it's sent."""
+
+    def make_held_msg():
+        try:
+            return make_msg(marshall_element())
+        except Exception as e:
+            # The script has moved on, so show the error in the element
+            # instead of raising it.
+            from streamlit.elements import exception_proto
+
+            msg = ForwardMsg_pb2.ForwardMsg()
+            exception_proto.marshall(msg.delta.new_element.exception, e)
+            msg.metadata.delta_path[:] = delta_path
+            return msg
+
+    ctx = get_report_ctx()
+
+    if ctx is None:
+        raise NoSessionContext()
+
+    with ctx.uninterruptible():
+        ctx.delta_throttle.hold(delta_path, make_held_msg)
@@ -0,0 +1,211 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Limits how often a script replaces each element.
+
+A script that updates an element in a tight loop, e.g. with st.progress or
+placeholder.image(), can enqueue thousands of replacements of it, most of
+which the browser would never get to show. With
+runner.maxElementUpdatesPerSecond, a replacement that comes too soon after the
+last one we sent for the same delta path is held instead. A newer replacement
+supersedes the one held for its delta path, and the held one is sent once
+enough time has passed: by a timer, or sooner if the script enqueues anything
+or the run ends. So the final value of every element is always delivered.
+
+Elements that are expensive to marshal can be held as a function that returns
+their message, so superseded ones are never marshalled at all.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.report_thread import add_report_ctx
+
+DeltaPath = Tuple[int, ...]
+
+
+class DeltaThrottle(object):
+    """Holds back element replacements that exceed a maximum rate."""
+
+    def __init__(self, enqueue, max_updates_per_second, on_update_held=None):
+        """Constructor.
+
+        Parameters
+        ----------
+        enqueue : callable
+            Function that enqueues ForwardMsg protos.
+        max_updates_per_second : int
+            The maximum number of times per second to send each element.
+        on_update_held : callable or None
+            Called without arguments whenever an update is held, since the
+            update doesn't reach enqueue.
+
+        """
+        self._enqueue = enqueue
+        self._interval = 1.0 / max_updates_per_second
+        self._on_update_held = on_update_held
+
+        self._lock = threading.Lock()
+        # Held while taking messages and sending them, so messages sent by
+        # the flush timer and by the script thread keep their order.
+        self._send_lock = threading.RLock()
+        # Sends held messages once they're due, if nothing else does first.
+        self._flush_timer = None  # type: Optional[threading.Timer]
+        # When we last sent a delta for each delta path.
+        self._last_sent_times = {}  # type: Dict[DeltaPath, float]
+        # Functions that return the held message for each delta path, in the
+        # order they were first held.
+        self._held = {}  # type: Dict[DeltaPath, Callable[[], ForwardMsg]]
+
+    def reset(self):
+        """Forget everything we sent and held. Called when a run starts."""
+        with self._lock:
+            self._last_sent_times.clear()
+            self._held.clear()
+            self._cancel_flush_timer_locked()
+
+    def should_hold(self, delta_path):
+        """True if an element replacement at delta_path would be held."""
+        delta_path = tuple(delta_path)
+        with self._lock:
+            return self._should_hold_locked(delta_path, time.monotonic())
+
+    def enqueue(self, msg):
+        """Enqueue a ForwardMsg, or hold it if it replaces an element too
+        soon after the last time we sent it."""
+        with self._send_lock:
+            if not msg.HasField("delta"):
+                self._send(self._take_due())
+                self._enqueue(msg)
+                return
+
+            delta_path = tuple(msg.metadata.delta_path)
+            if msg.delta.WhichOneof("type") == "new_element" and self.should_hold(
+                delta_path
+            ):
+                self.hold(delta_path, lambda: msg)
+                return
+
+            with self._lock:
+                now = time.monotonic()
+                # Held messages for this delta path, or for elements inside or
+                # around it, must arrive before this one does.
+                to_send = self._take_due_locked(now) + self._take_related_locked(
+                    delta_path
+                )
+                self._last_sent_times[delta_path] = now
+            self._send(to_send)
+            self._enqueue(msg)
+
+    def hold(self, delta_path, make_msg):
+        """Hold an element replacement, superseding the one held for its
+        delta path, if any.
+
+        Parameters
+        ----------
+        delta_path : list of int
+            The delta path of the element.
+        make_msg : callable
+            A function that returns the replacement's ForwardMsg. It's only
+            called if the replacement is sent.
+
+        """
+        with self._send_lock:
+            with self._lock:
+                self._held[tuple(delta_path)] = make_msg
+                to_send = self._take_due_locked(time.monotonic())
+                self._schedule_flush_timer_locked()
+            self._send(to_send)
+
+        if self._on_update_held is not None:
+            self._on_update_held()
+
+    def flush(self):
+        """Send all held messages. Called when a run ends."""
+        with self._send_lock:
+            with self._lock:
+                to_send = list(self._held.values())
+                self._held.clear()
+                self._cancel_flush_timer_locked()
+            self._send(to_send)
+
+    def _on_flush_timer(self):
+        with self._send_lock:
+            with self._lock:
+                self._flush_timer = None
+                to_send = self._take_due_locked(time.monotonic())
+                self._schedule_flush_timer_locked()
+            self._send(to_send)
+
+    def _schedule_flush_timer_locked(self):
+        if self._flush_timer is not None or not self._held:
+            return
+        now = time.monotonic()
+        delay = min(
+            self._interval - (now - self._last_sent_times.get(delta_path, now))
+            for delta_path in self._held
+        )
+        self._flush_timer = threading.Timer(max(delay, 0), self._on_flush_timer)
+        self._flush_timer.daemon = True
+        # Held messages may be marshalled when they're sent, which needs the
+        # script thread's ReportContext.
+        add_report_ctx(self._flush_timer)
+        self._flush_timer.start()
+
+    def _cancel_flush_timer_locked(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+    def _send(self, make_msgs):
+        # type: (List[Callable[[], ForwardMsg]]) -> None
+        for make_msg in make_msgs:
+            self._enqueue(make_msg())
+
+    def _take_due(self):
+        with self._lock:
+            return self._take_due_locked(time.monotonic())
+
+    def _should_hold_locked(self, delta_path, now):
+        last_sent_time = self._last_sent_times.get(delta_path)
+        return last_sent_time is not None and now - last_sent_time < self._interval
+
+    def _take_due_locked(self, now):
+        """Remove and return the held messages that can be sent now."""
+        if not self._held:
+            return []
+        due = [
+            delta_path
+            for delta_path in self._held
+            if not self._should_hold_locked(delta_path, now)
+        ]
+        for delta_path in due:
+            self._last_sent_times[delta_path] = now
+        return [self._held.pop(delta_path) for delta_path in due]
+
+    def _take_related_locked(self, delta_path):
+        """Remove and return the held messages for delta_path and for the
+        delta paths it contains or is contained in."""
+        related = [
+            held_path
+            for held_path in self._held
+            if _is_prefix(held_path, delta_path) or _is_prefix(delta_path, held_path)
+        ]
+        return [self._held.pop(held_path) for held_path in related]
+
+
+def _is_prefix(prefix, delta_path):
+    return delta_path[: len(prefix)] == prefix
@@ -21,7 +21,7 @@ from typing import cast
 
 import streamlit
 from streamlit import type_util
-from streamlit.proto.VegaLiteChart_pb2 import VegaLiteChart as VegaLiteChartProto
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 import streamlit.elements.vega_lite as vega_lite
 import altair as alt
 import pandas as pd
@@ -70,15 +70,13 @@ class AltairMixin:
            height: 220px
 
         """
-        vega_lite_chart_proto = VegaLiteChartProto()
+        msg = ForwardMsg()
 
         chart = generate_chart("line", data, width, height)
-        marshall(vega_lite_chart_proto, chart, use_container_width)
+        marshall(msg.delta.new_element.vega_lite_chart, chart, use_container_width)
         last_index = last_index_for_melted_dataframes(data)
 
-        return self.dg._enqueue(
-            "line_chart", vega_lite_chart_proto, last_index=last_index
-        )
+        return self.dg._enqueue("line_chart", msg, last_index=last_index)
 
     def area_chart(self, data=None, width=0, height=0, use_container_width=True):
         """Display an area chart.
@@ -119,15 +117,13 @@ class AltairMixin:
            height: 220px
 
         """
-        vega_lite_chart_proto = VegaLiteChartProto()
+        msg = ForwardMsg()
 
         chart = generate_chart("area", data, width, height)
-        marshall(vega_lite_chart_proto, chart, use_container_width)
+        marshall(msg.delta.new_element.vega_lite_chart, chart, use_container_width)
         last_index = last_index_for_melted_dataframes(data)
 
-        return self.dg._enqueue(
-            "area_chart", vega_lite_chart_proto, last_index=last_index
-        )
+        return self.dg._enqueue("area_chart", msg, last_index=last_index)
 
     def bar_chart(self, data=None, width=0, height=0, use_container_width=True):
         """Display a bar chart.
@@ -168,15 +164,13 @@ class AltairMixin:
            height: 220px
 
         """
-        vega_lite_chart_proto = VegaLiteChartProto()
+        msg = ForwardMsg()
 
         chart = generate_chart("bar", data, width, height)
-        marshall(vega_lite_chart_proto, chart, use_container_width)
+        marshall(msg.delta.new_element.vega_lite_chart, chart, use_container_width)
         last_index = last_index_for_melted_dataframes(data)
 
-        return self.dg._enqueue(
-            "bar_chart", vega_lite_chart_proto, last_index=last_index
-        )
+        return self.dg._enqueue("bar_chart", msg, last_index=last_index)
 
     def altair_chart(self, altair_chart, use_container_width=False):
         """Display a chart using the Altair library.
@@ -214,14 +208,14 @@ class AltairMixin:
         https://altair-viz.github.io/gallery/.
 
         """
-        vega_lite_chart_proto = VegaLiteChartProto()
+        msg = ForwardMsg()
 
         marshall(
-            vega_lite_chart_proto,
+            msg.delta.new_element.vega_lite_chart,
             altair_chart,
             use_container_width=use_container_width,
         )
-        return self.dg._enqueue("vega_lite_chart", vega_lite_chart_proto)
+        return self.dg._enqueue("vega_lite_chart", msg)
 
     @property
     def dg(self) -> "streamlit.delta_generator.DeltaGenerator":
@@ -21,9 +21,10 @@ from typing import cast
 import tzlocal
 
 import streamlit
+from streamlit import tracing
 from streamlit import type_util
 from streamlit.logger import get_logger
-from streamlit.proto.DataFrame_pb2 import DataFrame as DataFrameProto
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 
 LOGGER = get_logger(__name__)
 
@@ -80,12 +81,13 @@ class DataFrameMixin:
            height: 285px
 
         """
-        data_frame_proto = DataFrameProto()
-        marshall_data_frame(data, data_frame_proto)
+        # Marshall right into the message, so we don't copy the data.
+        msg = ForwardMsg()
+        marshall_data_frame(data, msg.delta.new_element.data_frame)
 
         return self.dg._enqueue(
             "data_frame",
-            data_frame_proto,
+            msg,
             element_width=width,
             element_height=height,
         )
@@ -115,9 +117,9 @@ class DataFrameMixin:
            height: 480px
 
         """
-        table_proto = DataFrameProto()
-        marshall_data_frame(data, table_proto)
-        return self.dg._enqueue("table", table_proto)
+        msg = ForwardMsg()
+        marshall_data_frame(data, msg.delta.new_element.table)
+        return self.dg._enqueue("table", msg)
 
     @property
     def dg(self) -> "streamlit.delta_generator.DeltaGenerator":
@@ -125,6 +127,7 @@ class DataFrameMixin:
         return cast("streamlit.delta_generator.DeltaGenerator", self)
 
 
+@tracing.traced("marshall_data_frame")
 def marshall_data_frame(data, proto_df):
     """Convert a pandas.DataFrame into a proto.DataFrame.
 
@@ -451,6 +454,68 @@ def add_rows(delta1, delta2, name=None):
         _concat_cell_style_array(style_col1, style_col2)
 
 
+def check_add_rows(delta1, delta2, name=None):
+    """Raise the error that add_rows(delta1, delta2, name) would raise,
+    without modifying either delta.
+
+    This only compares delta2 with the data already in delta1, so it can't
+    catch an error when delta1 has no data for the dataset yet.
+
+    Parameters
+    ----------
+    delta1 : Delta
+    delta2 : Delta
+    name : str or None
+
+    """
+    if (
+        name
+        and delta1.WhichOneof("type") == "new_element"
+        and delta1.new_element.WhichOneof("type") == "vega_lite_chart"
+        and not any(
+            dataset.has_name and dataset.name == name
+            for dataset in delta1.new_element.vega_lite_chart.datasets
+        )
+    ):
+        # add_rows would create the dataset.
+        return
+
+    df1 = _get_data_frame(delta1, name)
+    df2 = _get_data_frame(delta2, name)
+
+    if len(df1.data.cols) == 0:
+        return
+    if len(df1.data.cols) != len(df2.data.cols):
+        raise ValueError("Dataframes have incompatible shapes")
+    for (col1, col2) in zip(df1.data.cols, df2.data.cols):
+        _check_types(col1, col2)
+
+    if _index_len(df1.index) > 0:
+        _check_types(df1.index, df2.index)
+        index_type = df1.index.WhichOneof("type")
+        if index_type == "multi_index":
+            raise NotImplementedError("Cannot yet concatenate MultiIndices.")
+        elif index_type not in (
+            "plain_index",
+            "range_index",
+            "int_64_index",
+            "datetime_index",
+            "timedelta_index",
+        ):
+            raise NotImplementedError('Cannot concatenate "%s" indices.' % index_type)
+
+
+def _check_types(proto1, proto2):
+    """Raise if two AnyArray or Index protos hold different types."""
+    type1 = proto1.WhichOneof("type")
+    type2 = proto2.WhichOneof("type")
+    if type1 != type2:
+        raise ValueError(
+            "Cannot concatenate %(type1)s with %(type2)s."
+            % {"type1": type1, "type2": type2}
+        )
+
+
 def _concat_index(index1, index2):
     """Contact index2 into index1."""
     # Special case if index1 is empty.
@@ -25,6 +25,7 @@ from PIL import Image, ImageFile
 
 import streamlit
 from streamlit import config
+from streamlit import tracing
 from streamlit.errors import StreamlitAPIException, StreamlitDeprecationWarning
 from streamlit.logger import get_logger
 from streamlit.media_file_manager import media_file_manager
@@ -118,18 +119,29 @@ class ImageMixin:
         elif width <= 0:
             raise StreamlitAPIException("Image width must be positive.")
 
-        image_list_proto = ImageListProto()
-        marshall_images(
-            self.dg._get_delta_path_str(),
-            image,
-            caption,
-            width,
-            image_list_proto,
-            clamp,
-            channels,
-            output_format,
-        )
-        return self.dg._enqueue("imgs", image_list_proto)
+        coordinates = self.dg._get_delta_path_str()
+        # The images are only read when they're sent, and the script may
+        # change a numpy array or PIL image in place before then.
+        image = _copy_mutable(image)
+        caption = _copy_mutable(caption)
+
+        def marshall_image_list():
+            image_list_proto = ImageListProto()
+            marshall_images(
+                coordinates,
+                image,
+                caption,
+                width,
+                image_list_proto,
+                clamp,
+                channels,
+                output_format,
+            )
+            return image_list_proto
+
+        # Encoding images is expensive, so let _enqueue skip it for frames
+        # that are superseded before they're sent.
+        return self.dg._enqueue("imgs", marshall_image_list)
 
     @property
     def dg(self) -> "streamlit.delta_generator.DeltaGenerator":
@@ -205,6 +217,18 @@ def _np_array_to_bytes(array, output_format="JPEG"):
     return _PIL_to_bytes(img, format)
 
 
+def _copy_mutable(value):
+    """Copy the images and captions that the script could change in place.
+    This is much cheaper than encoding them."""
+    if type(value) is list:
+        return [_copy_mutable(item) for item in value]
+    if type(value) is np.ndarray or isinstance(value, Image.Image):
+        return value.copy()
+    if isinstance(value, io.BytesIO):
+        return _BytesIO_to_bytes(value)
+    return value
+
+
 def _4d_to_list_3d(array):
     return [array[i, :, :, :] for i in range(0, array.shape[0])]
 
@@ -334,6 +358,7 @@ def image_to_url(
     return this_file.url
 
 
+@tracing.traced("marshall_images")
 def marshall_images(
     coordinates,
     image,
@@ -124,19 +124,23 @@ def register_widget(
         # not via `streamlit run`).
         return None
 
-    # Register the widget, and ensure another widget with the same id hasn't
-    # already been registered.
-    added = ctx.widget_ids_this_run.add(widget_id)
-    if not added:
-        raise DuplicateWidgetID(
-            _build_duplicate_widget_message(
-                widget_func_name if widget_func_name is not None else element_type,
-                user_key,
+    with ctx.uninterruptible():
+        # Register the widget, and ensure another widget with the same id
+        # hasn't already been registered.
+        added = ctx.widget_ids_this_run.add(widget_id)
+        if not added:
+            raise DuplicateWidgetID(
+                _build_duplicate_widget_message(
+                    widget_func_name if widget_func_name is not None else element_type,
+                    user_key,
+                )
             )
-        )
 
-    # Return the widget's current value.
-    return ctx.widgets.get_widget_value(widget_id)
+        if ctx.current_fragment is not None and ctx.fragments is not None:
+            ctx.fragments.add_widget(widget_id, ctx.current_fragment)
+
+        # Return the widget's current value.
+        return ctx.widgets.get_widget_value(widget_id)
 
 
 def last_index_for_melted_dataframes(data):
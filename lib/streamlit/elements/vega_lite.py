@@ -21,7 +21,7 @@ import streamlit
 import streamlit.elements.data_frame_proto as data_frame_proto
 import streamlit.elements.lib.dicttools as dicttools
 from streamlit.logger import get_logger
-from streamlit.proto.VegaLiteChart_pb2 import VegaLiteChart as VegaLiteChartProto
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 
 LOGGER = get_logger(__name__)
 
@@ -84,15 +84,16 @@ class VegaLiteMixin:
         translated to the syntax shown above.
 
         """
-        vega_lite_chart_proto = VegaLiteChartProto()
+        # Marshall right into the message, so we don't copy the data.
+        msg = ForwardMsg()
         marshall(
-            vega_lite_chart_proto,
+            msg.delta.new_element.vega_lite_chart,
             data,
             spec,
             use_container_width=use_container_width,
             **kwargs,
         )
-        return self.dg._enqueue("vega_lite_chart", vega_lite_chart_proto)
+        return self.dg._enqueue("vega_lite_chart", msg)
 
     @property
     def dg(self) -> "streamlit.delta_generator.DeltaGenerator":
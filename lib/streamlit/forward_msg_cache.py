@@ -17,6 +17,7 @@ from typing import MutableMapping, TYPE_CHECKING
 from weakref import WeakKeyDictionary
 
 from streamlit import config
+from streamlit import metrics
 from streamlit.logger import get_logger
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 
@@ -211,11 +212,17 @@ class ForwardMsgCache(object):
 
         entry = self._entries.get(msg.hash, None)
         if entry is None or not entry.has_session_ref(session):
+            metrics.Client.get("streamlit_forward_msg_cache_misses_total").inc()
             return False
 
         # Ensure we're not expired
         age = entry.get_session_ref_age(session, report_run_count)
-        return age <= config.get_option("global.maxCachedMessageAge")
+        if age > config.get_option("global.maxCachedMessageAge"):
+            metrics.Client.get("streamlit_forward_msg_cache_misses_total").inc()
+            return False
+
+        metrics.Client.get("streamlit_forward_msg_cache_hits_total").inc()
+        return True
 
     def remove_expired_session_entries(self, session, report_run_count):
         """Remove any cached messages that have expired from the given session.
@@ -0,0 +1,226 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Fragments: parts of a script that can rerun on their own.
+
+A function decorated with st.experimental_fragment writes into its own
+container. Whenever it runs, we remember the function, its arguments, where
+its container is, and which widgets it created. If a rerun request only
+changes the values of those widgets, the ScriptRunner calls the function again,
+writing into the same container, instead of rerunning the whole script.
+"""
+
+import functools
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from streamlit import cursor
+from streamlit.logger import get_logger
+from streamlit.report_thread import get_report_ctx
+
+LOGGER = get_logger(__name__)
+
+
+class Fragment(object):
+    """A call to a fragment function, and the container it writes into."""
+
+    def __init__(self, func, args, kwargs, root_container, parent_path, parent):
+        """Initialize the Fragment.
+
+        Parameters
+        ----------
+        func : callable
+            The fragment function.
+        args : tuple
+            The positional arguments it was called with.
+        kwargs : dict
+            The keyword arguments it was called with.
+        root_container : int
+            The root container of the fragment's container.
+        parent_path : tuple of int
+            The path of the fragment's container within its root container.
+        parent : Fragment or None
+            The fragment this one was called from, if any.
+
+        """
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.root_container = root_container
+        self.parent_path = parent_path
+        self.parent = parent
+
+    @property
+    def delta_path(self) -> List[int]:
+        """The delta path of the fragment's container."""
+        return [self.root_container] + list(self.parent_path)
+
+    def is_ancestor_of(self, other: "Fragment") -> bool:
+        fragment = other.parent
+        while fragment is not None:
+            if fragment is self:
+                return True
+            fragment = fragment.parent
+        return False
+
+    def run(self, dg):
+        """Call the fragment function in the given container."""
+        ctx = get_report_ctx()
+        if ctx is None:
+            # Not in a script run, so there's nothing to track.
+            with dg:
+                return self.func(*self.args, **self.kwargs)
+
+        prev_fragment = ctx.current_fragment
+        ctx.current_fragment = self
+        try:
+            with dg:
+                return self.func(*self.args, **self.kwargs)
+        finally:
+            ctx.current_fragment = prev_fragment
+
+    def new_container(self):
+        """Return a DeltaGenerator that writes into the fragment's container
+        from the top, to replace its contents."""
+        from streamlit.delta_generator import DeltaGenerator
+        import streamlit as st
+
+        return DeltaGenerator(
+            root_container=self.root_container,
+            cursor=cursor.RunningCursor(
+                root_container=self.root_container, parent_path=self.parent_path
+            ),
+            parent=st._main,
+        )
+
+
+class Fragments(object):
+    """The fragments of a session's latest runs, and the widgets they own.
+
+    A full run of the script replaces all of them. A fragment run replaces
+    the fragment and the fragments it calls.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Fragments by the delta path of their container.
+        self._fragments = {}  # type: Dict[Tuple[int, ...], Fragment]
+        self._fragments_by_widget_id = {}  # type: Dict[str, Fragment]
+
+    def clear(self):
+        """Forget all fragments. This may be called on any thread."""
+        with self._lock:
+            self._fragments.clear()
+            self._fragments_by_widget_id.clear()
+
+    def add(self, fragment: Fragment) -> None:
+        with self._lock:
+            self._fragments[tuple(fragment.delta_path)] = fragment
+
+    def add_widget(self, widget_id: str, fragment: Fragment) -> None:
+        with self._lock:
+            self._fragments_by_widget_id[widget_id] = fragment
+
+    def get_fragment_to_rerun(self, widget_ids: Iterable[str]) -> Optional[Fragment]:
+        """Return the fragment to rerun when the given widgets change.
+
+        Parameters
+        ----------
+        widget_ids : iterable of str
+            The IDs of the widgets whose values changed.
+
+        Returns
+        -------
+        Fragment or None
+            The innermost fragment that contains all of the widgets, or None
+            if the whole script has to rerun.
+
+        """
+        with self._lock:
+            owners = set()  # type: Set[Fragment]
+            for widget_id in widget_ids:
+                fragment = self._fragments_by_widget_id.get(widget_id)
+                if fragment is None:
+                    return None
+                owners.add(fragment)
+
+            for fragment in owners:
+                if self._fragments.get(tuple(fragment.delta_path)) is not fragment:
+                    # A later run replaced or dropped this fragment.
+                    return None
+
+        for candidate in owners:
+            if all(
+                other is candidate or candidate.is_ancestor_of(other)
+                for other in owners
+            ):
+                return candidate
+        return None
+
+
+def fragment(func):
+    """Decorator to rerun a function on its own when its widgets change.
+
+    The function writes into its own container. When a user changes a widget
+    that the function created, only the function runs again, rather than the
+    whole script.
+
+    Note: This is an experimental feature with usage limitations:
+
+    - When the fragment reruns on its own, its return value is ignored, so
+      it shouldn't return anything the rest of the script needs.
+    - It should only write into its own container, so not into `st.sidebar`
+      or into containers created outside of it.
+    - Changing any widget outside of fragments reruns the whole script.
+
+    Parameters
+    ----------
+    func : callable
+        The function to turn into a fragment.
+
+    Example
+    -------
+    >>> @st.experimental_fragment
+    ... def chart():
+    ...     days = st.slider("Days", 1, 30)
+    ...     st.line_chart(data[-days:])
+    ...
+    >>> st.title("Sales")
+    >>> chart()
+
+    """
+
+    @functools.wraps(func)
+    def wrapped_func(*args, **kwargs):
+        import streamlit as st
+
+        ctx = get_report_ctx()
+        container = st.beta_container()
+        if ctx is None or ctx.fragments is None or container._cursor is None:
+            # We're not running in Streamlit, or can't rerun on our own.
+            with container:
+                return func(*args, **kwargs)
+
+        new_fragment = Fragment(
+            func,
+            args,
+            kwargs,
+            root_container=container._root_container,
+            parent_path=container._cursor.parent_path,
+            parent=ctx.current_fragment,
+        )
+        ctx.fragments.add(new_fragment)
+        return new_fragment.run(container)
+
+    return wrapped_func
@@ -18,7 +18,11 @@ from typing import Dict, DefaultDict, Set
 import collections
 import hashlib
 
+from blinker import Signal
+
+from streamlit import metrics
 from streamlit.report_thread import get_report_ctx
+from streamlit.report_thread import uninterruptible
 from streamlit.logger import get_logger
 
 LOGGER = get_logger(__name__)
@@ -116,6 +120,20 @@ class MediaFileManager(object):
             dict
         )  # type: DefaultDict[str, Dict[str, MediaFile]]
 
+        self.on_file_added = Signal(
+            doc="""Emitted when a file is added to the manager.
+
+            Parameters
+            ----------
+            session_id : str
+                The ID of the session that added the file.
+            content : bytes
+            mimetype : str
+            coordinates : str
+                The arguments that were passed to add().
+            """
+        )
+
     def del_expired_files(self):
         LOGGER.debug("Deleting expired files...")
 
@@ -130,18 +148,29 @@ class MediaFileManager(object):
             if mf.id not in active_file_ids:
                 LOGGER.debug(f"Deleting File: {file_id}")
                 del self._files_by_id[file_id]
+                metrics.Client.get("streamlit_media_file_bytes").dec(mf.content_size)
 
-    def clear_session_files(self, session_id=None):
+    def clear_session_files(self, session_id=None, delta_path=None):
         """Removes ReportSession-coordinate mapping immediately, and id-file mapping later.
 
         Should be called whenever ScriptRunner completes and when a session ends.
+        If delta_path is given, only the files of the elements inside that
+        container are removed, e.g. when a fragment reruns.
         """
         if session_id is None:
             session_id = _get_session_id()
 
         LOGGER.debug("Disconnecting files for session with ID %s", session_id)
 
-        if session_id in self._files_by_session_and_coord:
+        if delta_path is not None:
+            files_by_coord = self._files_by_session_and_coord.get(session_id, {})
+            # Coordinates start with the element's delta path, e.g.
+            # "[0, 2, 3]" for an element inside the container at [0, 2].
+            prefix = str(list(delta_path))[:-1] + ", "
+            for coord in [c for c in files_by_coord if c.startswith(prefix)]:
+                del files_by_coord[coord]
+
+        elif session_id in self._files_by_session_and_coord:
             del self._files_by_session_and_coord[session_id]
 
         LOGGER.debug(
@@ -154,7 +183,7 @@ class MediaFileManager(object):
             len(self._files_by_session_and_coord),
         )
 
-    def add(self, content, mimetype, coordinates):
+    def add(self, content, mimetype, coordinates, session_id=None):
         """Adds new MediaFile with given parameters; returns the object.
 
         If an identical file already exists, returns the existing object
@@ -175,26 +204,38 @@ class MediaFileManager(object):
             Unique string identifying an element's location.
             Prevents memory leak of "forgotten" file IDs when element media
             is being replaced-in-place (e.g. an st.image stream).
+        session_id : str or None
+            The ID of the session that uses the file. Defaults to the
+            current thread's session.
 
         """
         file_id = _calculate_file_id(content, mimetype)
-        mf = self._files_by_id.get(file_id, None)
-
-        if mf is None:
-            LOGGER.debug("Adding media file %s", file_id)
-            mf = MediaFile(file_id=file_id, content=content, mimetype=mimetype)
-        else:
-            LOGGER.debug("Overwriting media file %s", file_id)
-
-        session_id = _get_session_id()
-        self._files_by_id[mf.id] = mf
-        self._files_by_session_and_coord[session_id][coordinates] = mf
 
-        LOGGER.debug(
-            "Files: %s; Sessions with files: %s",
-            len(self._files_by_id),
-            len(self._files_by_session_and_coord),
-        )
+        # Don't let runner.interruptScripts leave the maps half-updated.
+        with uninterruptible():
+            mf = self._files_by_id.get(file_id, None)
+
+            if mf is None:
+                LOGGER.debug("Adding media file %s", file_id)
+                mf = MediaFile(file_id=file_id, content=content, mimetype=mimetype)
+                metrics.Client.get("streamlit_media_file_bytes").inc(mf.content_size)
+            else:
+                LOGGER.debug("Overwriting media file %s", file_id)
+
+            if session_id is None:
+                session_id = _get_session_id()
+            self._files_by_id[mf.id] = mf
+            self._files_by_session_and_coord[session_id][coordinates] = mf
+
+            LOGGER.debug(
+                "Files: %s; Sessions with files: %s",
+                len(self._files_by_id),
+                len(self._files_by_session_and_coord),
+            )
+
+            self.on_file_added.send(
+                session_id, content=content, mimetype=mimetype, coordinates=coordinates
+            )
 
         return mf
 
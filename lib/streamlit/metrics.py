@@ -12,11 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import Any, List, Tuple
+
 from streamlit import config
 from streamlit.logger import get_logger
 
 LOGGER = get_logger(__name__)
 
+# Histogram buckets for sizes in bytes, and for counts of things.
+_BYTES_BUCKETS = (1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, float("inf"))
+_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float("inf"))
+
 
 class MockMetric(object):
     def __init__(self, *args, **kwargs):
@@ -37,6 +43,9 @@ class MockMetric(object):
     def set(self, *args, **kwargs):
         pass
 
+    def observe(self, *args, **kwargs):
+        pass
+
 
 class Client(object):
 
@@ -64,7 +73,27 @@ class Client(object):
         # yapf: disable
         self._raw_metrics  = [
             ('Counter', 'streamlit_enqueue_deltas_total', 'Total deltas enqueued', ['type']),
-        ]
+            ('Counter', 'streamlit_slow_consumer_total', 'Times a websocket fell behind the server', []),
+            ('Histogram', 'streamlit_server_loop_lag_seconds', 'How late the server loop wakes up to send messages', []),
+            ('Counter', 'streamlit_offloaded_messages_total', 'Messages serialized off the IOLoop thread', []),
+            ('Gauge', 'streamlit_sessions', 'Report sessions with a connected browser', []),
+            ('Gauge', 'streamlit_preheated_sessions', 'Preheated report sessions waiting for a browser', []),
+            ('Gauge', 'streamlit_script_threads', 'Script threads that are running', []),
+            ('Histogram', 'streamlit_script_run_duration_seconds', 'Script run duration', ['outcome']),
+            ('Counter', 'streamlit_script_compile_cache_total', 'Script compilations by whether the compiled code was reused', ['result']),
+            ('Gauge', 'streamlit_script_queue_length', 'Script runs waiting for a free script thread', []),
+            ('Histogram', 'streamlit_script_queue_wait_seconds', 'Time script runs waited for a script thread', []),
+            ('Histogram', 'streamlit_browser_queue_messages', 'Messages flushed from a session\'s browser queue at once, across all sessions', [], {'buckets': _COUNT_BUCKETS}),
+            ('Histogram', 'streamlit_browser_queue_bytes', 'Bytes flushed from a session\'s browser queue at once, across all sessions', [], {'buckets': _BYTES_BUCKETS}),
+            ('Histogram', 'streamlit_report_bytes', 'Bytes of ForwardMsgs a session keeps after a run', [], {'buckets': _BYTES_BUCKETS}),
+            ('Histogram', 'streamlit_forward_msg_bytes', 'Size of ForwardMsgs sent to browsers', ['type'], {'buckets': _BYTES_BUCKETS}),
+            ('Counter', 'streamlit_forward_msg_cache_hits_total', 'Cacheable ForwardMsgs the browser already had', []),
+            ('Counter', 'streamlit_forward_msg_cache_misses_total', 'Cacheable ForwardMsgs the browser did not have', []),
+            ('Histogram', 'streamlit_websocket_send_seconds', 'Time to flush a websocket frame to the network', []),
+            ('Gauge', 'streamlit_media_file_bytes', 'Bytes held by the MediaFileManager', []),
+            ('Gauge', 'streamlit_uploaded_file_bytes', 'Bytes held by the UploadedFileManager', []),
+            ('Counter', 'streamlit_websocket_compression_total', 'Websocket frames by whether they were compressed', ['decision']),
+        ]  # type: List[Tuple[Any, ...]]
         # yapf: enable
 
         self.toggle_metrics()
@@ -85,12 +114,13 @@ class Client(object):
                 prometheus_client.registry.REGISTRY._names_to_collectors.keys()
             )
 
-            for kind, metric, doc, labels in self._raw_metrics:
+            for kind, metric, doc, labels, *options in self._raw_metrics:
                 if metric in existing_metrics:
                     continue
                 p = getattr(prometheus_client, kind)
-                self._metrics[metric] = p(metric, doc, labels)
+                kwargs = options[0] if options else {}
+                self._metrics[metric] = p(metric, doc, labels, **kwargs)
         else:
             self.generate_latest = lambda: ""
-            for _, metric, _, _ in self._raw_metrics:
+            for _, metric, *_ in self._raw_metrics:
                 self._metrics[metric] = MockMetric()
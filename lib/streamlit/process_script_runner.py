@@ -0,0 +1,541 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs scripts in separate processes, for runner.processIsolation.
+
+A ProcessScriptRunner stands in for a ScriptRunner inside the server. It
+borrows a process from the ScriptProcessPool, and the process runs a regular
+ScriptRunner on its behalf. The two talk over a pipe:
+
+- The server sends ScriptRequests (and the session's uploaded files) to the
+  process, which enqueues them in its own ScriptRequestQueue.
+- The process sends back ForwardMsgs, ScriptRunnerEvents, and media files.
+
+A ScriptRunner shuts down when its request queue is empty. Since requests may
+be in flight, the process first asks the server whether it's done ("idle"),
+and only shuts down once the server agrees ("done").
+"""
+
+import multiprocessing
+import pickle
+import sys
+import threading
+from typing import Optional
+
+from blinker import Signal
+
+from streamlit import caching
+from streamlit import config
+from streamlit.config_option import ConfigOption
+from streamlit.elements import exception_proto
+from streamlit.logger import get_logger
+from streamlit.media_file_manager import media_file_manager
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.script_request_queue import ScriptRequestQueue
+from streamlit.script_runner import ScriptRunner
+from streamlit.script_runner import ScriptRunnerEvent
+from streamlit.uploaded_file_manager import UploadedFileManager
+
+LOGGER = get_logger(__name__)
+
+# How often the server checks for new ScriptRequests while waiting for
+# messages from a script process.
+_POLL_INTERVAL_SECS = 0.01
+
+
+class ProcessScriptRunner(object):
+    """A ScriptRunner that runs its script in another process.
+
+    This has the same interface as ScriptRunner.
+    """
+
+    def __init__(
+        self,
+        session_id,
+        report,
+        enqueue_forward_msg,
+        client_state,
+        request_queue,
+        uploaded_file_mgr=None,
+        fragments=None,
+    ):
+        """Initialize the ProcessScriptRunner.
+
+        Parameters
+        ----------
+        See ScriptRunner. Fragments can't be shared with the script process,
+        so `fragments` is ignored, and each script process keeps its own.
+
+        """
+        self._session_id = session_id
+        self._report = report
+        self._enqueue_forward_msg = enqueue_forward_msg
+        self._client_state = client_state
+        self._request_queue = request_queue
+        self._uploaded_file_mgr = uploaded_file_mgr
+
+        self.on_event = Signal(
+            doc="""Emitted when a ScriptRunnerEvent occurs.
+
+            See ScriptRunner.on_event.
+            """
+        )
+
+        # Set when the session's uploaded files change, so that we send the
+        # new files to the script process along with the next request.
+        self._files_changed = False
+
+        # This is initialized in start()
+        self._pump_thread = None
+
+    def start(self):
+        """Start a thread that runs the script in a script process.
+
+        This must be called only once.
+
+        """
+        if self._pump_thread is not None:
+            raise Exception("ProcessScriptRunner was already started")
+
+        if self._uploaded_file_mgr is not None:
+            self._uploaded_file_mgr.on_files_updated.connect(self._on_files_updated)
+
+        self._pump_thread = threading.Thread(
+            target=self._run, name="ProcessScriptRunner.pumpThread"
+        )
+        self._pump_thread.start()
+
+    def maybe_handle_execution_control_request(self):
+        # Requests are handled by the ScriptRunner in the script process.
+        pass
+
+    def request_interrupt(self):
+        # The script process interrupts its ScriptRunner when it receives the
+        # request.
+        pass
+
+    def _on_files_updated(self, session_id):
+        if session_id == self._session_id:
+            self._files_changed = True
+
+    def _get_files(self):
+        if self._uploaded_file_mgr is None:
+            return None
+        self._files_changed = False
+        return self._uploaded_file_mgr.get_session_files(self._session_id)
+
+    def _run(self):
+        """Relay requests and messages between the session and a script
+        process, until the process's ScriptRunner shuts down.
+
+        This is run in a separate thread.
+
+        """
+        pool = get_pool()
+        process = pool.acquire()
+        try:
+            self._relay(process)
+        except (EOFError, OSError) as e:
+            LOGGER.error("Script process exited unexpectedly: %s", e)
+            process.kill()
+
+            # Show the error, and report the run as failed rather than
+            # finished, so the browser doesn't clear the elements it has.
+            error = RuntimeError(
+                "Script process exited unexpectedly (exit code %s)" % process.exitcode
+            )
+            msg = ForwardMsg()
+            exception_proto.marshall(msg.delta.new_element.exception, error)
+            self._enqueue_forward_msg(msg)
+            self.on_event.send(
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR, exception=error
+            )
+            self.on_event.send(
+                ScriptRunnerEvent.SHUTDOWN, client_state=self._client_state
+            )
+        finally:
+            if self._uploaded_file_mgr is not None:
+                self._uploaded_file_mgr.on_files_updated.disconnect(
+                    self._on_files_updated
+                )
+            pool.release(process)
+
+    def _relay(self, process):
+        process.send(
+            (
+                "run",
+                self._session_id,
+                self._report.script_path,
+                self._report.command_line,
+                self._client_state,
+                self._get_files(),
+            )
+        )
+
+        num_requests_sent = 0
+        done_sent = False
+
+        while True:
+            if not done_sent:
+                while True:
+                    request, data = self._request_queue.dequeue()
+                    if request is None:
+                        break
+                    files = self._get_files() if self._files_changed else None
+                    process.send(("request", request, data, files))
+                    num_requests_sent += 1
+
+            if not process.poll(_POLL_INTERVAL_SECS):
+                continue
+
+            message = process.recv()
+            kind = message[0]
+
+            if kind == "msg":
+                self._enqueue_forward_msg(ForwardMsg.FromString(message[1]))
+
+            elif kind == "media":
+                _, content, mimetype, coordinates = message
+                media_file_manager.add(
+                    content, mimetype, coordinates, session_id=self._session_id
+                )
+
+            elif kind == "idle":
+                # The process has no requests left. It's done if it got
+                # everything we sent, and nothing new came in meanwhile.
+                if (
+                    message[1] == num_requests_sent
+                    and not self._request_queue.has_request
+                ):
+                    process.send(("done",))
+                    done_sent = True
+
+            elif kind == "event":
+                _, event, kwargs = message
+
+                # Mirror the process's media files, so that we can serve them.
+                if event == ScriptRunnerEvent.SCRIPT_STARTED:
+                    media_file_manager.clear_session_files(self._session_id)
+                elif event == ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS:
+                    media_file_manager.del_expired_files()
+
+                if event == ScriptRunnerEvent.SHUTDOWN:
+                    process.send(("end",))
+                    self.on_event.send(event, **kwargs)
+                    return
+
+                self.on_event.send(event, **kwargs)
+
+            else:
+                raise RuntimeError(
+                    "Unrecognized message from script process: %s" % kind
+                )
+
+
+class _ScriptProcess(object):
+    """A process in the ScriptProcessPool, and our end of its pipe."""
+
+    def __init__(self, cache_generation):
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=_script_process_main,
+            args=(child_conn, _get_config_overrides(), sys.argv, sys.path),
+            name="ScriptProcess",
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+
+        # The value of ScriptProcessPool.cache_generation when this
+        # process's st.cache was last cleared.
+        self.cache_generation = cache_generation
+
+    def send(self, obj):
+        self._conn.send(obj)
+
+    def poll(self, timeout):
+        return self._conn.poll(timeout)
+
+    def recv(self):
+        return self._conn.recv()
+
+    def is_alive(self):
+        return self._process.is_alive()
+
+    @property
+    def exitcode(self):
+        return self._process.exitcode
+
+    def kill(self):
+        self._process.kill()
+        self._process.join()
+        self._conn.close()
+
+
+class ScriptProcessPool(object):
+    """A pool of processes that run scripts for ProcessScriptRunners."""
+
+    def __init__(self, size):
+        """Initialize the pool.
+
+        Parameters
+        ----------
+        size : int
+            The maximum number of processes in the pool.
+
+        """
+        self._size = size
+        self._cond = threading.Condition()
+        self._idle_processes = []
+        self._num_processes = 0
+
+        # Incremented whenever st.cache should be cleared in every process.
+        self._cache_generation = 0
+
+    def start(self):
+        """Start all of the pool's processes, so they're ready to go when
+        they're first needed."""
+        with self._cond:
+            while self._num_processes < self._size:
+                self._idle_processes.append(_ScriptProcess(self._cache_generation))
+                self._num_processes += 1
+
+    def acquire(self):
+        """Return an idle process, starting a new one if needed.
+
+        Blocks while all processes are busy.
+        """
+        with self._cond:
+            while not self._idle_processes and self._num_processes >= self._size:
+                self._cond.wait()
+
+            if self._idle_processes:
+                process = self._idle_processes.pop()
+            else:
+                process = _ScriptProcess(self._cache_generation)
+                self._num_processes += 1
+
+            if process.cache_generation != self._cache_generation:
+                process.send(("clear_cache",))
+                process.cache_generation = self._cache_generation
+
+            return process
+
+    def release(self, process):
+        """Return a process to the pool, once its script is done."""
+        with self._cond:
+            if process.is_alive():
+                self._idle_processes.append(process)
+            else:
+                self._num_processes -= 1
+            self._cond.notify()
+
+    def clear_cache(self):
+        """Clear st.cache in every process, before it next runs a script."""
+        with self._cond:
+            self._cache_generation += 1
+
+
+_pool = None  # type: Optional[ScriptProcessPool]
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the ScriptProcessPool, creating and starting it if needed."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ScriptProcessPool(config.get_option("runner.processPoolSize"))
+            _pool.start()
+        return _pool
+
+
+def _get_config_overrides():
+    """Return the config options that were set anywhere but in their
+    defaults, so that script processes can be configured the same way."""
+    return [
+        (option.key, option.value, option.where_defined)
+        for option in config._config_options.values()
+        if option.where_defined != ConfigOption.DEFAULT_DEFINITION
+    ]
+
+
+def _script_process_main(conn, config_overrides, argv, path):
+    """The entry point of a script process."""
+    import streamlit
+
+    streamlit._is_running_with_streamlit = True
+    sys.argv = argv
+    sys.path[:] = path
+
+    for key, value, where_defined in config_overrides:
+        config._set_option(key, value, where_defined)
+
+    from streamlit import bootstrap
+
+    bootstrap._fix_matplotlib_crash()
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            # The server is gone.
+            return
+
+        kind = message[0]
+        if kind == "run":
+            _ScriptProcessJob(conn, *message[1:]).run()
+        elif kind == "clear_cache":
+            caching.clear_cache()
+
+
+class _ScriptProcessJob(object):
+    """Runs a ScriptRunner in a script process, for one ProcessScriptRunner."""
+
+    def __init__(
+        self, conn, session_id, script_path, command_line, client_state, files
+    ):
+        from streamlit.report import Report
+
+        self._conn = conn
+        self._session_id = session_id
+        self._send_lock = threading.Lock()
+
+        self._uploaded_file_mgr = UploadedFileManager()
+        self._set_files(files)
+
+        # Set whenever the server answers an "idle" message, or sends a new
+        # request.
+        self._server_responded = threading.Event()
+        self._done = False
+        self._num_requests_received = 0
+
+        self._request_queue = ScriptRequestQueue()
+        self._scriptrunner = ScriptRunner(
+            session_id=session_id,
+            report=Report(script_path, command_line),
+            enqueue_forward_msg=self._enqueue_forward_msg,
+            client_state=client_state,
+            request_queue=_ProcessRequestQueue(self),
+            uploaded_file_mgr=self._uploaded_file_mgr,
+        )
+        self._scriptrunner.on_event.connect(self._on_scriptrunner_event)
+
+    def run(self):
+        media_file_manager.on_file_added.connect(self._on_media_file_added)
+        try:
+            self._scriptrunner.start()
+
+            # The server sends "end" once the ScriptRunner has shut down.
+            # Anything it sent after the ScriptRunner decided to shut down
+            # is dropped.
+            while True:
+                message = self._conn.recv()
+                if message[0] == "end":
+                    break
+                self._handle_message(message)
+
+            # There's no thread to wait for if the ScriptRunner ran on a
+            # pooled script thread, which has moved on already.
+            script_thread = self._scriptrunner._script_thread
+            if script_thread is not None:
+                script_thread.join()
+        finally:
+            media_file_manager.on_file_added.disconnect(self._on_media_file_added)
+
+    def _send(self, obj):
+        with self._send_lock:
+            self._conn.send(obj)
+
+    def _set_files(self, files):
+        if files is None:
+            return
+        self._uploaded_file_mgr.remove_session_files(self._session_id)
+        for widget_id, widget_files in files.items():
+            self._uploaded_file_mgr.add_files(self._session_id, widget_id, widget_files)
+
+    def _handle_message(self, message):
+        kind = message[0]
+        if kind == "request":
+            _, request, data, files = message
+            self._set_files(files)
+            self._request_queue.enqueue(request, data)
+            self._scriptrunner.request_interrupt()
+            self._num_requests_received += 1
+            self._server_responded.set()
+        elif kind == "done":
+            self._done = True
+            self._server_responded.set()
+        else:
+            raise RuntimeError("Unexpected message from server: %s" % kind)
+
+    def has_request(self):
+        """True if there's another request to process. If not, make sure the
+        server agrees before saying so."""
+        if self._request_queue.has_request:
+            return True
+        if self._done:
+            return False
+
+        self._server_responded.clear()
+        self._send(("idle", self._num_requests_received))
+        self._server_responded.wait()
+        return self._request_queue.has_request
+
+    def _enqueue_forward_msg(self, msg):
+        # See ReportSession.enqueue.
+        if not config.get_option("runner.installTracer"):
+            self._scriptrunner.maybe_handle_execution_control_request()
+        self._send(("msg", msg.SerializeToString()))
+
+    def _on_media_file_added(self, session_id, content, mimetype, coordinates):
+        if session_id == self._session_id:
+            self._send(("media", content, mimetype, coordinates))
+
+    def _on_scriptrunner_event(
+        self, event, exception=None, client_state=None, fragment_delta_path=None
+    ):
+        kwargs = {}
+        if exception is not None:
+            kwargs["exception"] = _make_picklable(exception)
+        if client_state is not None:
+            kwargs["client_state"] = client_state
+        if fragment_delta_path is not None:
+            kwargs["fragment_delta_path"] = fragment_delta_path
+        self._send(("event", event, kwargs))
+
+
+class _ProcessRequestQueue(object):
+    """The request queue of a ScriptRunner in a script process."""
+
+    def __init__(self, job):
+        self._job = job
+
+    @property
+    def has_request(self):
+        return self._job.has_request()
+
+    def dequeue(self, wait=False):
+        # The server holds back RERUN requests that aren't ready, so ours are
+        # always ready.
+        return self._job._request_queue.dequeue(wait)
+
+
+def _make_picklable(exception):
+    try:
+        pickle.dumps(exception)
+        return exception
+    except Exception:
+        return RuntimeError(str(exception))
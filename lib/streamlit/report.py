@@ -15,8 +15,9 @@
 import base58
 import copy
 import os
+import threading
 import uuid
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 from streamlit import config
 from streamlit.report_queue import ReportQueue
@@ -82,34 +83,93 @@ class Report(object):
 
         # The master queue contains all messages that comprise the report.
         # If the user chooses to share a saved version of the report,
-        # we serialize the contents of the master queue.
+        # we serialize the contents of the master queue. Unless
+        # global.reportRetention says to keep them, we only put the
+        # initial message in it.
         self._master_queue = ReportQueue()
+        self.retains_messages = _should_retain_messages()
 
         # The browser queue contains messages that haven't yet been
         # delivered to the browser. Periodically, the server flushes
         # this queue and delivers its contents to the browser.
         self._browser_queue = ReportQueue()
 
+        # Held while a message is added to both queues, and while the browser
+        # queue is rebuilt from the master queue. The script thread enqueues
+        # while the server thread rebuilds, for a browser that reconnects.
+        # Without the lock, a message enqueued between the master queue being
+        # cloned and the clone replacing the browser queue would reach the
+        # old browser queue only, and never be sent.
+        self._queues_lock = threading.Lock()
+
+        # The serialized size of the master queue's messages, kept up to
+        # date as they're enqueued, so that reading it doesn't compose and
+        # measure every message. A delta replaces the one at its delta path,
+        # or has its add_rows composed onto it, so we also keep the size of
+        # each delta path's messages.
+        self._master_queue_byte_size = 0
+        self._master_delta_byte_sizes = {}  # type: Dict[Tuple[int, ...], int]
+
         self.generate_new_id()
 
         self.command_line = command_line
 
-    def get_debug(self) -> Dict[str, Dict[str, Any]]:
-        return {"master queue": self._master_queue.get_debug()}
+    def get_debug(self) -> Dict[str, Any]:
+        return {
+            "master queue": self._master_queue.get_debug(),
+            "master queue bytes": self.get_master_queue_byte_size(),
+        }
+
+    def get_master_queue_byte_size(self) -> int:
+        """Return the serialized size of the messages the report keeps.
+
+        Composed add_rows messages are counted as the sum of their parts,
+        so this is approximate for them.
+        """
+        return self._master_queue_byte_size
 
     def enqueue(self, msg):
-        self._master_queue.enqueue(msg)
-        self._browser_queue.enqueue(msg)
+        with self._queues_lock:
+            if self.retains_messages or self._master_queue.is_empty():
+                self._master_queue.enqueue(msg)
+                self._add_master_queue_byte_size(msg)
+            self._browser_queue.enqueue(msg)
+
+    def _add_master_queue_byte_size(self, msg):
+        size = msg.ByteSize()
+        if msg.HasField("delta"):
+            # The master queue combines deltas by delta path.
+            delta_key = tuple(msg.metadata.delta_path)
+            prev_size = self._master_delta_byte_sizes.get(delta_key, 0)
+            if msg.delta.WhichOneof("type") == "add_rows":
+                self._master_delta_byte_sizes[delta_key] = prev_size + size
+            else:
+                self._master_delta_byte_sizes[delta_key] = size
+                self._master_queue_byte_size -= prev_size
+        self._master_queue_byte_size += size
 
     def clear(self):
         # Master_queue retains its initial message; browser_queue is
         # completely cleared.
-        initial_msg = self._master_queue.get_initial_msg()
-        self._master_queue.clear()
-        if initial_msg:
-            self._master_queue.enqueue(initial_msg)
-
-        self._browser_queue.clear()
+        with self._queues_lock:
+            initial_msg = self._master_queue.get_initial_msg()
+            self._master_queue.clear()
+            self._master_queue_byte_size = 0
+            self._master_delta_byte_sizes = {}
+            if initial_msg:
+                self._master_queue.enqueue(initial_msg)
+                self._add_master_queue_byte_size(initial_msg)
+
+            self._browser_queue.clear()
+
+    def reset_browser_queue(self):
+        """Replace the browser queue's contents with the whole report.
+
+        This is used when a browser reconnects to an existing session, and
+        needs everything the report contains rather than just what changed.
+        """
+        with self._queues_lock:
+            self._browser_queue = self._master_queue.clone()
 
     def flush_browser_queue(self):
         """Clears our browser queue and returns the messages it contained.
@@ -169,6 +229,11 @@ class Report(object):
         """
         LOGGER.debug("Serializing final report")
 
+        if not self.retains_messages:
+            raise RuntimeError(
+                'Sharing needs global.reportRetention to be "auto" or "full"'
+            )
+
         messages = [
             copy.deepcopy(msg)
             for msg in self._master_queue
@@ -249,6 +314,20 @@ class Report(object):
         return manifest
 
 
+def _should_retain_messages():
+    """True if reports should keep all of their messages, according to
+    global.reportRetention."""
+    retention = config.get_option("global.reportRetention")
+    if retention == "full":
+        return True
+    if retention == "off":
+        return False
+    return (
+        config.get_option("global.sharingMode") != "off"
+        or config.get_option("server.disconnectedSessionTTL") > 0
+    )
+
+
 def _should_save_report_msg(msg):
     """Returns True if the given ForwardMsg should be serialized into
     a shared report.
@@ -19,16 +19,35 @@ Whenever possible, message deltas are combined.
 
 import copy
 import threading
+from collections import deque
+from typing import Deque, Dict, List, Tuple
 
+from streamlit import tracing
+from streamlit.elements import data_frame_proto
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 
 from streamlit.logger import get_logger
 
 LOGGER = get_logger(__name__)
 
+# A queue of messages, and the add_rows messages to compose onto them.
+Batch = Tuple[List[ForwardMsg], Dict[int, List[ForwardMsg]]]
+
 
 class ReportQueue(object):
-    """Thread-safe queue that smartly accumulates the report's messages."""
+    """Thread-safe queue that smartly accumulates the report's messages.
+
+    A script enqueues lots of small messages, and combines each with the
+    ones in the queue while it holds our lock. The server flushes the queue
+    every few milliseconds, and neither of them waits for the other:
+
+    - Flushing an empty queue doesn't take the lock.
+    - Otherwise, flushing swaps the queue for an empty one if it can take
+      the lock right away.
+    - If a script holds the lock, flushing asks it to hand the queue over
+      instead. The script swaps it out once it has enqueued its message,
+      and the next flush takes it.
+    """
 
     def __init__(self):
         """Constructor."""
@@ -41,25 +60,51 @@ class ReportQueue(object):
             # where delta_path = (container, parent block path as a string)
             self._delta_index_map = dict()
 
+            # Map: _queue index -> the add_rows messages to compose onto the
+            # message at that index. Composing them every time one is
+            # enqueued would copy the whole dataframe each time, so we keep
+            # them here and compose them all at once, when they're needed.
+            self._rows_chunks = dict()  # type: Dict[int, List[ForwardMsg]]
+
+            # Queues that were handed over to be flushed, oldest first.
+            self._handed_over = deque()  # type: Deque[Batch]
+            self._flush_requested = False
+
     def get_debug(self):
         from google.protobuf.json_format import MessageToDict
 
         return {
-            "queue": [MessageToDict(m) for m in self._queue],
+            "queue": [MessageToDict(m) for m in self],
             "ids": list(self._delta_index_map.keys()),
         }
 
     def __iter__(self):
-        return iter(self._queue)
+        with self._lock:
+            batches = self._get_batches_locked()
+        return iter(_compose_batches(batches))
 
     def is_empty(self):
-        return len(self._queue) == 0
+        # Replacing _queue and appending to it are atomic, so this doesn't
+        # need the lock.
+        return len(self._queue) == 0 and len(self._handed_over) == 0
 
     def get_initial_msg(self):
-        if len(self._queue) > 0:
-            return self._queue[0]
+        with self._lock:
+            batches = self._get_batches_locked()
+        for queue, rows_chunks in batches:
+            if len(queue) == 0:
+                continue
+            chunks = rows_chunks.get(0)
+            if chunks is not None:
+                return _compose_rows(queue[0], chunks)
+            return queue[0]
         return None
 
+    def _get_batches_locked(self):
+        # type: () -> List[Batch]
+        return list(self._handed_over) + [(list(self._queue), dict(self._rows_chunks))]
+
+    @tracing.traced("ReportQueue.enqueue")
     def enqueue(self, msg):
         """Add message into queue, possibly composing it with another message.
 
@@ -68,27 +113,45 @@ class ReportQueue(object):
         msg : ForwardMsg
         """
         with self._lock:
-            # Optimize only if it's a delta message
-            if not msg.HasField("delta"):
-                self._queue.append(msg)
-            else:
-                # Deltas are uniquely identified by their delta_path.
-                delta_key = tuple(msg.metadata.delta_path)
-
-                if delta_key in self._delta_index_map:
-                    # Combine the previous message into the new message.
-                    index = self._delta_index_map[delta_key]
-                    old_msg = self._queue[index]
-                    composed_delta = compose_deltas(old_msg.delta, msg.delta)
-                    new_msg = ForwardMsg()
-                    new_msg.delta.CopyFrom(composed_delta)
-                    new_msg.metadata.CopyFrom(msg.metadata)
-                    self._queue[index] = new_msg
-                else:
-                    # Append this message to the queue, and store its index
-                    # for future combining.
-                    self._delta_index_map[delta_key] = len(self._queue)
-                    self._queue.append(msg)
+            self._enqueue_locked(msg)
+
+            if self._flush_requested:
+                # A flush couldn't take the lock while we held it.
+                self._handed_over.append((self._queue, self._rows_chunks))
+                self._clear()
+
+    def _enqueue_locked(self, msg):
+        # Optimize only if it's a delta message
+        if not msg.HasField("delta"):
+            self._queue.append(msg)
+            return
+
+        # Deltas are uniquely identified by their delta_path.
+        delta_key = tuple(msg.metadata.delta_path)
+
+        if delta_key in self._delta_index_map:
+            index = self._delta_index_map[delta_key]
+            if msg.delta.WhichOneof("type") != "add_rows":
+                # The new delta replaces the previous one. Messages aren't
+                # modified once they're enqueued, so we can use this one
+                # rather than copying it.
+                self._queue[index] = msg
+                self._rows_chunks.pop(index, None)
+                return
+
+            # Raise any error that combining the messages would, while the
+            # script that enqueued this one can still see it.
+            data_frame_proto.check_add_rows(
+                self._queue[index].delta,
+                msg.delta,
+                name=msg.delta.add_rows.name,
+            )
+            self._rows_chunks.setdefault(index, []).append(msg)
+        else:
+            # Append this message to the queue, and store its index for
+            # future combining.
+            self._delta_index_map[delta_key] = len(self._queue)
+            self._queue.append(msg)
 
     def clone(self):
         """Return the elements of this ReportQueue as a collections.deque."""
@@ -97,30 +160,127 @@ class ReportQueue(object):
         with self._lock:
             r._queue = list(self._queue)
             r._delta_index_map = dict(self._delta_index_map)
+            r._rows_chunks = {
+                index: list(chunks) for index, chunks in self._rows_chunks.items()
+            }
+            # Handed over queues aren't modified anymore, so they can be
+            # shared.
+            r._handed_over = deque(self._handed_over)
 
         return r
 
     def _clear(self):
         self._queue = []
         self._delta_index_map = dict()
+        self._rows_chunks = dict()
+        self._flush_requested = False
 
     def clear(self):
         """Clear this queue."""
         with self._lock:
+            # Replace the deque rather than clear it, since a flush may be
+            # taking from it without the lock.
+            self._handed_over = deque()
             self._clear()
 
     def flush(self):
-        with self._lock:
-            queue = self._queue
-            self._clear()
-        return queue
+        """Remove and return the messages in the queue.
 
+        This never waits for a script that's enqueueing a message. Instead,
+        the script hands over the messages it has, and the next flush
+        returns them.
+        """
+        if self.is_empty():
+            # Most sessions are idle, so don't take the lock for those. A
+            # message enqueued meanwhile waits for the next flush.
+            return []
+
+        if self._lock.acquire(blocking=False):
+            try:
+                batches = self._take_handed_over()
+                batches.append((self._queue, self._rows_chunks))
+                self._clear()
+            finally:
+                self._lock.release()
+        else:
+            # Setting this without the lock is benign. If the script has
+            # already released the lock, it hands over its queue the next
+            # time it enqueues, and otherwise the next flush takes the queue
+            # with the lock and resets the flag.
+            self._flush_requested = True
+            batches = self._take_handed_over()
+
+        # Compose outside the lock, so the script isn't kept waiting.
+        return _compose_batches(batches)
+
+    def _take_handed_over(self):
+        # type: () -> List[Batch]
+        # Take the queues oldest first. Scripts append to _handed_over while
+        # holding the lock, but we may not, and clear() may replace it
+        # meanwhile, so popleft() is the only thing we can rely on.
+        handed_over = self._handed_over
+        batches = []  # type: List[Batch]
+        while True:
+            try:
+                batches.append(handed_over.popleft())
+            except IndexError:
+                return batches
+
+
+def _compose_batches(batches):
+    """Return the messages in batches, in order, with their add_rows
+    messages composed onto them."""
+    if len(batches) == 1:
+        return _compose_queue(*batches[0])
+
+    msgs = []
+    for queue, rows_chunks in batches:
+        msgs.extend(_compose_queue(queue, rows_chunks))
+    return msgs
+
+
+def _compose_queue(queue, rows_chunks):
+    """Return the messages in queue, with the add_rows messages in
+    rows_chunks composed onto them."""
+    if not rows_chunks:
+        return queue
 
-def compose_deltas(old_delta, new_delta):
+    composed_queue = []
+    for index, msg in enumerate(queue):
+        chunks = rows_chunks.get(index)
+        if chunks is None:
+            composed_queue.append(msg)
+            continue
+
+        try:
+            composed_queue.append(_compose_rows(msg, chunks))
+        except (ValueError, NotImplementedError) as e:
+            # check_add_rows couldn't catch this when they were enqueued. Send
+            # the messages as they are, and let the browser deal with them.
+            LOGGER.error("Failed to compose add_rows deltas: %s", e)
+            composed_queue.append(msg)
+            composed_queue.extend(chunks)
+    return composed_queue
+
+
+def _compose_rows(msg, chunks):
+    """Return a new message with the add_rows messages in chunks composed
+    onto msg, in one pass over the data."""
+    new_msg = ForwardMsg()
+    delta = new_msg.delta
+    delta.CopyFrom(msg.delta)
+    for chunk in chunks:
+        delta = compose_deltas(delta, chunk.delta, copy_old_delta=False)
+    new_msg.metadata.CopyFrom(chunks[-1].metadata)
+    return new_msg
+
+
+def compose_deltas(old_delta, new_delta, copy_old_delta=True):
     """Combines new_delta onto old_delta if possible.
 
-    If combination takes place, returns old_delta, since it has the combined
-    data. If not, returns new_delta.
+    If combination takes place, returns a copy of old_delta with the combined
+    data, or old_delta itself if copy_old_delta is False. If not, returns
+    new_delta.
 
     """
     new_delta_type = new_delta.WhichOneof("type")
@@ -132,12 +292,10 @@ def compose_deltas(old_delta, new_delta):
         return new_delta
 
     elif new_delta_type == "add_rows":
-        import streamlit.elements.data_frame_proto as data_frame_proto
-
         # We should make data_frame_proto.add_rows *not* mutate any of the
         # inputs. In the meantime, we have to deepcopy the input that will be
         # mutated.
-        composed_delta = copy.deepcopy(old_delta)
+        composed_delta = copy.deepcopy(old_delta) if copy_old_delta else old_delta
         data_frame_proto.add_rows(
             composed_delta, new_delta, name=new_delta.add_rows.name
         )
@@ -12,20 +12,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import secrets
 import sys
-import uuid
 from enum import Enum
+from typing import Optional, Type, Union
 
 import tornado.gen
 import tornado.ioloop
+from blinker import Signal
 
 from streamlit import __version__
 from streamlit import caching
 from streamlit import config
+from streamlit import metrics
 from streamlit import url_util
+from streamlit.fragment import Fragments
 from streamlit.media_file_manager import media_file_manager
 from streamlit.metrics_util import Installation
 from streamlit.report import Report
+from streamlit.process_script_runner import ProcessScriptRunner
+from streamlit.process_script_runner import get_pool as get_script_process_pool
 from streamlit.script_request_queue import RerunData
 from streamlit.script_request_queue import ScriptRequest
 from streamlit.script_request_queue import ScriptRequestQueue
@@ -36,6 +42,7 @@ from streamlit.credentials import Credentials
 from streamlit.logger import get_logger
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.server import workers
 from streamlit.server.server_util import serialize_forward_msg
 from streamlit.storage.file_storage import FileStorage
 from streamlit.watcher.local_sources_watcher import LocalSourcesWatcher
@@ -80,7 +87,7 @@ class ReportSession(object):
 
         """
         # Each ReportSession has a unique string ID.
-        self.id = str(uuid.uuid4())
+        self.id = workers.new_session_id()
 
         self._ioloop = ioloop
         self._report = Report(script_path, command_line)
@@ -92,21 +99,50 @@ class ReportSession(object):
         # due to the source code changing we need to pass in the previous client state.
         self._client_state = ClientState()
 
+        # The fragments of our script, which can rerun on their own. Like
+        # the client state, they outlive each ScriptRunner.
+        self._fragments = Fragments()
+
         self._local_sources_watcher = LocalSourcesWatcher(
             self._report, self._on_source_file_changed
         )
         self._storage = None
         self._maybe_reuse_previous_run = False
+
+        # Secret that lets a reconnecting browser take this session back.
+        # (See server.disconnectedSessionTTL.)
+        self.resume_token = secrets.token_urlsafe(32)
+
+        # The last ClientState a browser asked us to run with, and whether
+        # to skip the next rerun request if it matches it.
+        self._last_requested_client_state = None  # type: Optional[ClientState]
+        self._skip_matching_rerun = False
         self._run_on_save = config.get_option("server.runOnSave")
 
         # The ScriptRequestQueue is the means by which we communicate
         # with the active ScriptRunner.
-        self._script_request_queue = ScriptRequestQueue()
+        self._script_request_queue = ScriptRequestQueue(
+            debounce_secs=config.get_option("runner.rerunDebounceMs") / 1000,
+            min_interval_secs=config.get_option("runner.minRerunIntervalMs") / 1000,
+        )
 
         self._scriptrunner = None
 
+        self.on_script_finished = Signal(
+            doc="""Emitted when a script run ends, on the ScriptRunner's thread.
+
+            Parameters
+            ----------
+            sender : ReportSession
+                This ReportSession.
+            """
+        )
+
         LOGGER.debug("ReportSession initialized (id=%s)", self.id)
 
+    def get_debug(self):
+        return {"master queue bytes": self._report.get_master_queue_byte_size()}
+
     def flush_browser_queue(self):
         """Clear the report queue and return the messages it contained.
 
@@ -122,6 +158,19 @@ class ReportSession(object):
         """
         return self._report.flush_browser_queue()
 
+    def resume(self):
+        """Prepare to send the whole report to a browser that reconnected.
+
+        The browser will ask to rerun the script when it connects. We skip
+        that rerun if its widget state is the one we last ran with, since
+        the report it would produce is already in the master queue (unless
+        global.reportRetention says not to keep it).
+        """
+        LOGGER.debug("Resuming session (id=%s)", self.id)
+        self._report.reset_browser_queue()
+        # Without the whole report, the browser needs the rerun.
+        self._skip_matching_rerun = self._report.retains_messages
+
     def shutdown(self):
         """Shut down the ReportSession.
 
@@ -222,7 +271,15 @@ class ReportSession(object):
 
     def _on_source_file_changed(self):
         """One of our source files changed. Schedule a rerun if appropriate."""
-        if self._run_on_save:
+        # The fragments are from the old code, so the next run has to be a
+        # full one.
+        self._fragments.clear()
+
+        if self._maybe_reuse_previous_run:
+            # A preheated session that no browser has claimed yet. Keep its
+            # run up to date, so it's still worth claiming.
+            self.handle_rerun_script_request(is_preheat=True)
+        elif self._run_on_save:
             self.request_rerun()
         else:
             self._enqueue_file_change_message()
@@ -230,7 +287,14 @@ class ReportSession(object):
     def _clear_queue(self):
         self._report.clear()
 
-    def _on_scriptrunner_event(self, event, exception=None, client_state=None):
+    def _on_scriptrunner_event(
+        self,
+        event,
+        exception=None,
+        client_state=None,
+        queue_position=None,
+        fragment_delta_path=None,
+    ):
         """Called when our ScriptRunner emits an event.
 
         This is *not* called on the main thread.
@@ -247,6 +311,14 @@ class ReportSession(object):
             The ScriptRunner's final ClientState. Set only for the
             SHUTDOWN event.
 
+        queue_position : int | None
+            The ScriptRunner's position in line for a script thread. Set only
+            for the QUEUE_POSITION_CHANGED event.
+
+        fragment_delta_path : list of int | None
+            The delta path of the fragment's container, if only a fragment is
+            running. Set only for the SCRIPT_STARTED event.
+
         """
         LOGGER.debug("OnScriptRunnerEvent: %s", event)
 
@@ -261,8 +333,11 @@ class ReportSession(object):
                 # on the main thread.
                 self._ioloop.spawn_callback(self._save_running_report)
 
-            self._clear_queue()
-            self._enqueue_new_report_message()
+            if fragment_delta_path is None:
+                self._clear_queue()
+            # Otherwise, the rest of the report stays, and only the fragment's
+            # container is replaced.
+            self._enqueue_new_report_message(fragment_delta_path)
 
         elif (
             event == ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS
@@ -280,6 +355,10 @@ class ReportSession(object):
                 else ForwardMsg.FINISHED_WITH_COMPILE_ERROR
             )
 
+            metrics.Client.get("streamlit_report_bytes").observe(
+                self._report.get_master_queue_byte_size()
+            )
+
             if config.get_option("server.liveSave"):
                 # Enqueue into the IOLoop so it runs without blocking AND runs
                 # on the main thread.
@@ -304,6 +383,8 @@ class ReportSession(object):
                 )
                 self.enqueue(msg)
 
+            self.on_script_finished.send(self)
+
         elif event == ScriptRunnerEvent.SHUTDOWN:
             # When ScriptRunner shuts down, update our local reference to it,
             # and check to see if we need to spawn a new one. (This is run on
@@ -325,6 +406,11 @@ class ReportSession(object):
 
             self._ioloop.spawn_callback(on_shutdown)
 
+        elif event == ScriptRunnerEvent.QUEUE_POSITION_CHANGED:
+            msg = ForwardMsg()
+            msg.script_queue_position = queue_position
+            self.enqueue(msg)
+
         # Send a message if our run state changed
         report_was_running = prev_state == ReportSessionState.REPORT_IS_RUNNING
         report_is_running = self._state == ReportSessionState.REPORT_IS_RUNNING
@@ -358,10 +444,12 @@ class ReportSession(object):
             # In this case, catch any errors
             return None
 
-    def _enqueue_new_report_message(self):
+    def _enqueue_new_report_message(self, fragment_delta_path=None):
         self._report.generate_new_id()
         msg = ForwardMsg()
         msg.new_report.report_id = self._report.report_id
+        if fragment_delta_path is not None:
+            msg.new_report.fragment_delta_path[:] = fragment_delta_path
         msg.new_report.name = self._report.name
         msg.new_report.script_path = self._report.script_path
 
@@ -408,6 +496,8 @@ class ReportSession(object):
 
         imsg.command_line = self._report.command_line
         imsg.session_id = self.id
+        if config.get_option("server.disconnectedSessionTTL") > 0:
+            imsg.resume_token = self.resume_token
 
         self.enqueue(msg)
 
@@ -459,6 +549,18 @@ class ReportSession(object):
                 LOGGER.debug("Skipping rerun since the preheated run is the same")
                 return
 
+        elif self._skip_matching_rerun:
+            # If this session was just resumed, the browser already has the
+            # report its widget state would produce.
+            self._skip_matching_rerun = False
+
+            if client_state == self._last_requested_client_state:
+                LOGGER.debug("Skipping rerun since the resumed run is the same")
+                return
+
+        if client_state is not None:
+            self._last_requested_client_state = client_state
+
         self.request_rerun(client_state)
 
     def handle_stop_script_request(self):
@@ -476,6 +578,8 @@ class ReportSession(object):
         # doesn't need to see the results of the command in their
         # terminal.
         caching.clear_cache()
+        if config.get_option("runner.processIsolation"):
+            get_script_process_pool().clear_cache()
 
     def handle_set_run_on_save_request(self, new_value):
         """Change our run_on_save flag to the given value.
@@ -511,6 +615,8 @@ class ReportSession(object):
             return
 
         self._script_request_queue.enqueue(request, data)
+        if self._scriptrunner is not None:
+            self._scriptrunner.request_interrupt()
         self._maybe_create_scriptrunner()
 
     def _maybe_create_scriptrunner(self):
@@ -530,14 +636,25 @@ class ReportSession(object):
         ):
             return
 
+        # Fragments are functions in the script's process, and a session's
+        # runs may each get a different process, so ProcessScriptRunner can't
+        # use self._fragments. With it, a fragment's widgets rerun the whole
+        # script. (See runner.processIsolation.)
+        scriptrunner_class = (
+            ProcessScriptRunner
+            if config.get_option("runner.processIsolation")
+            else ScriptRunner
+        )  # type: Union[Type[ProcessScriptRunner], Type[ScriptRunner]]
+
         # Create the ScriptRunner, attach event handlers, and start it
-        self._scriptrunner = ScriptRunner(
+        self._scriptrunner = scriptrunner_class(
             session_id=self.id,
             report=self._report,
             enqueue_forward_msg=self.enqueue,
             client_state=self._client_state,
             request_queue=self._script_request_queue,
             uploaded_file_mgr=self._uploaded_file_mgr,
+            fragments=self._fragments,
         )
         self._scriptrunner.on_event.connect(self._on_scriptrunner_event)
         self._scriptrunner.start()
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import threading
+from contextlib import contextmanager
 from typing import Dict, Optional, List
 
 from streamlit.logger import get_logger
@@ -30,6 +31,9 @@ class ReportContext(object):
         widgets,
         widget_ids_this_run,
         uploaded_file_mgr,
+        fragments=None,
+        delta_throttle=None,
+        uninterruptible=None,
     ):
         """Construct a ReportContext.
 
@@ -48,6 +52,16 @@ class ReportContext(object):
             current report run. This set is cleared at the start of each run.
         uploaded_file_mgr : UploadedFileManager
             The manager for files uploaded by all users.
+        fragments : Fragments or None
+            The session's fragments, or None if fragments can't rerun on
+            their own.
+        delta_throttle : DeltaThrottle or None
+            Limits how often each element is replaced, or None to send every
+            replacement.
+        uninterruptible : callable or None
+            Returns a context manager that keeps runner.interruptScripts from
+            interrupting the script inside it, or None if scripts can't be
+            interrupted.
 
         """
         self.cursors = {}  # type: Dict[int, "streamlit.cursor.RunningCursor"]
@@ -57,6 +71,11 @@ class ReportContext(object):
         self.widgets = widgets
         self.widget_ids_this_run = widget_ids_this_run
         self.uploaded_file_mgr = uploaded_file_mgr
+        self.fragments = fragments
+        self.delta_throttle = delta_throttle
+        self._uninterruptible = uninterruptible
+        # The fragment that's running, if any.
+        self.current_fragment = None  # type: Optional["streamlit.fragment.Fragment"]
         # set_page_config is allowed at most once, as the very first st.command
         self._set_page_config_allowed = True
         # Stack of DGs used for the with block. The current one is at the end.
@@ -66,9 +85,22 @@ class ReportContext(object):
         self.cursors = {}
         self.widget_ids_this_run.clear()
         self.query_string = query_string
+        self.current_fragment = None
+        if self.delta_throttle is not None:
+            self.delta_throttle.reset()
         # Permit set_page_config when the ReportContext is reused on a rerun
         self._set_page_config_allowed = True
 
+    @contextmanager
+    def uninterruptible(self):
+        """Don't interrupt the script while Streamlit itself is running
+        inside this block, e.g. holding a lock or updating session state."""
+        if self._uninterruptible is None:
+            yield
+        else:
+            with self._uninterruptible():
+                yield
+
     def enqueue(self, msg):
         if msg.HasField("page_config_changed") and not self._set_page_config_allowed:
             raise StreamlitAPIException(
@@ -81,7 +113,11 @@ class ReportContext(object):
         if msg.HasField("delta") or msg.HasField("page_config_changed"):
             self._set_page_config_allowed = False
 
-        self._enqueue(msg)
+        with self.uninterruptible():
+            if self.delta_throttle is not None:
+                self.delta_throttle.enqueue(msg)
+            else:
+                self._enqueue(msg)
 
 
 class _WidgetIDSet(object):
@@ -133,6 +169,9 @@ class ReportThread(threading.Thread):
         uploaded_file_mgr=None,
         target=None,
         name=None,
+        fragments=None,
+        delta_throttle=None,
+        uninterruptible=None,
     ):
         """Construct a ReportThread.
 
@@ -154,6 +193,13 @@ class ReportThread(threading.Thread):
         name : str
             The thread name. By default, a unique name is constructed of
             the form "Thread-N" where N is a small decimal number.
+        fragments : Fragments or None
+            The session's fragments.
+        delta_throttle : DeltaThrottle or None
+            Limits how often each element is replaced.
+        uninterruptible : callable or None
+            Returns a context manager that keeps the script from being
+            interrupted inside it.
 
         """
         super(ReportThread, self).__init__(target=target, name=name)
@@ -164,6 +210,9 @@ class ReportThread(threading.Thread):
             widgets=widgets,
             uploaded_file_mgr=uploaded_file_mgr,
             widget_ids_this_run=_WidgetIDSet(),
+            fragments=fragments,
+            delta_throttle=delta_throttle,
+            uninterruptible=uninterruptible,
         )
 
 
@@ -216,5 +265,17 @@ def get_report_ctx() -> Optional[ReportContext]:
     return ctx
 
 
+@contextmanager
+def uninterruptible():
+    """ReportContext.uninterruptible() for the current thread's
+    ReportContext, if it has one."""
+    ctx = getattr(threading.current_thread(), REPORT_CONTEXT_ATTR_NAME, None)
+    if ctx is None:
+        yield
+    else:
+        with ctx.uninterruptible():
+            yield
+
+
 # Needed to avoid circular dependencies while running tests.
 import streamlit
@@ -0,0 +1,156 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Caches the compiled code of the main script, for all sessions.
+
+Every run of a script used to read, parse, add magic to and compile it again,
+even though it almost never changes between runs, and every session did it on
+its own. For a long script, that's a noticeable part of each rerun.
+
+Instead, the code object is compiled once per process and shared. Code objects
+are immutable, so sessions can exec the same one in their own namespace at the
+same time.
+
+An entry is reused when the file's mtime and size haven't changed. If they
+have, the file is read and hashed, and the entry is still reused if the
+contents are the same (say, after a `touch` or a git checkout). A change to
+runner.magicEnabled always recompiles. Since mtimes can be coarse, the file
+watcher also invalidates the entry whenever it sees the file change.
+
+Compile errors aren't cached, so a broken script is compiled again each run,
+and its error is reported each time.
+"""
+
+import hashlib
+import importlib.util
+import os
+import threading
+from typing import Dict, NamedTuple
+
+from streamlit import config
+from streamlit import magic
+from streamlit import metrics
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+
+class _CacheEntry(NamedTuple):
+    mtime_ns: int
+    size: int
+    content_hash: str
+    magic_enabled: bool
+    code: object
+
+
+_cache_lock = threading.Lock()
+_cache = {}  # type: Dict[str, _CacheEntry]
+
+
+def get_code(script_path):
+    """Return the compiled code of a script, compiling it if needed.
+
+    Parameters
+    ----------
+    script_path : str
+        The path of the script.
+
+    Returns
+    -------
+    code
+        The script's code object, ready to exec.
+
+    Raises
+    ------
+    Whatever reading or compiling the script raises, e.g. OSError or
+    SyntaxError.
+
+    """
+    magic_enabled = config.get_option("runner.magicEnabled")
+    stat = os.stat(script_path)
+
+    with _cache_lock:
+        entry = _cache.get(script_path)
+
+    if (
+        entry is not None
+        and entry.magic_enabled == magic_enabled
+        and entry.mtime_ns == stat.st_mtime_ns
+        and entry.size == stat.st_size
+    ):
+        _record("hit")
+        return entry.code
+
+    with open(script_path, "rb") as f:
+        source_bytes = f.read()
+    content_hash = hashlib.md5(source_bytes).hexdigest()
+
+    if (
+        entry is not None
+        and entry.magic_enabled == magic_enabled
+        and entry.content_hash == content_hash
+    ):
+        code = entry.code
+        _record("hit")
+    else:
+        code = _compile(source_bytes, script_path, magic_enabled)
+        _record("miss")
+
+    with _cache_lock:
+        _cache[script_path] = _CacheEntry(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            content_hash=content_hash,
+            magic_enabled=magic_enabled,
+            code=code,
+        )
+    return code
+
+
+def invalidate(script_path):
+    """Forget the compiled code of a script, if we have it."""
+    with _cache_lock:
+        if _cache.pop(script_path, None) is not None:
+            LOGGER.debug("Invalidated compiled script: %s", script_path)
+
+
+def clear():
+    with _cache_lock:
+        _cache.clear()
+
+
+def _compile(source_bytes, script_path, magic_enabled):
+    # Decode the way the interpreter would, respecting PEP263 headers.
+    filebody = importlib.util.decode_source(source_bytes)
+
+    if magic_enabled:
+        filebody = magic.add_magic(filebody, script_path)
+
+    return compile(
+        filebody,
+        # Pass in the file path so it can show up in exceptions.
+        script_path,
+        # We're compiling entire blocks of Python, so we need "exec"
+        # mode (as opposed to "eval" or "single").
+        mode="exec",
+        # Don't inherit any flags or "future" statements.
+        flags=0,
+        dont_inherit=1,
+        # Use the default optimization options.
+        optimize=-1,
+    )
+
+
+def _record(result):
+    metrics.Client.get("streamlit_script_compile_cache_total").labels(result).inc()
@@ -0,0 +1,208 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A sampling profiler for individual script runs.
+
+When runner.enableProfiler is true, runs whose query string contains
+`_stprofile` are profiled. While such a run executes, a separate thread
+samples the script thread's stack every few milliseconds. Nothing is installed
+in the script thread itself, so runs that aren't profiled pay nothing.
+
+Profiles of recent runs are kept in a bounded buffer, and are formatted as
+collapsed stacks (one "frame;frame;frame count" line per distinct stack), which
+flamegraph.pl, speedscope and similar tools can read. Frames in the script
+itself are labeled with their line number, and other frames with their module,
+so the output shows time per script line and per st.* call.
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Any, Counter, Deque, Dict, List, Optional, Tuple
+
+from streamlit import config
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+# The query string parameter that turns on profiling for a run.
+PROFILE_QUERY_PARAM = "_stprofile"
+
+SAMPLE_INTERVAL_SECS = 0.005
+
+# The number of recent profiles we keep.
+MAX_PROFILES = 20
+
+_profiles_lock = threading.Lock()
+_profiles = collections.deque(maxlen=MAX_PROFILES)  # type: Deque[Profile]
+
+
+class Profile(object):
+    """The stack samples collected during one script run."""
+
+    def __init__(self, session_id, script_path):
+        self.session_id = session_id
+        self.script_path = script_path
+        self.start_time = time.time()
+        self.duration = 0.0
+        self.stack_counts = collections.Counter()  # type: Counter[Tuple[str, ...]]
+
+    @property
+    def num_samples(self) -> int:
+        return sum(self.stack_counts.values())
+
+    def to_collapsed_stacks(self) -> str:
+        """Return the samples as collapsed stacks.
+
+        Returns
+        -------
+        str
+            One "frame;frame;frame count" line per distinct stack, outermost
+            frame first.
+
+        """
+        return "".join(
+            "%s %s\n" % (";".join(stack), count)
+            for stack, count in sorted(self.stack_counts.items())
+        )
+
+    def get_summary(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "script_path": self.script_path,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "num_samples": self.num_samples,
+        }
+
+
+class _NullProfiler(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_PROFILER = _NullProfiler()
+
+
+class ScriptProfiler(object):
+    """Samples the calling thread's stack while a script runs in it.
+
+    Use as a context manager around the script's exec() call. When it exits,
+    the profile is added to the recent profiles.
+    """
+
+    def __init__(self, session_id, script_path):
+        self.profile = Profile(session_id, script_path)
+        self._thread_id = threading.get_ident()
+        self._stop_event = threading.Event()
+        self._sampler_thread = threading.Thread(
+            target=self._sample_loop, name="ScriptProfiler.samplerThread"
+        )
+        self._sampler_thread.daemon = True
+
+    def __enter__(self):
+        self.profile.start_time = time.time()
+        self._sampler_thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop_event.set()
+        self._sampler_thread.join()
+        self.profile.duration = time.time() - self.profile.start_time
+        LOGGER.debug("Profiled script run: %s samples", self.profile.num_samples)
+        with _profiles_lock:
+            _profiles.append(self.profile)
+        return False
+
+    def _sample_loop(self):
+        while not self._stop_event.wait(SAMPLE_INTERVAL_SECS):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = _get_script_stack(frame, self.profile.script_path)
+            del frame
+            if stack is not None:
+                self.profile.stack_counts[stack] += 1
+
+
+def maybe_profile(session_id, script_path, query_string):
+    """Return a context manager that profiles a script run, if requested.
+
+    Parameters
+    ----------
+    session_id : str
+        The ID of the session whose script is running.
+    script_path : str
+        The path of the script.
+    query_string : str
+        The query string of the run.
+
+    Returns
+    -------
+    ScriptProfiler or a no-op context manager.
+
+    """
+    if not config.get_option("runner.enableProfiler"):
+        return _NULL_PROFILER
+    if not query_string or PROFILE_QUERY_PARAM not in urllib.parse.parse_qs(
+        query_string, keep_blank_values=True
+    ):
+        return _NULL_PROFILER
+    return ScriptProfiler(session_id, script_path)
+
+
+def get_profiles() -> List[Profile]:
+    """Return the recent profiles, most recent first."""
+    with _profiles_lock:
+        return list(reversed(_profiles))
+
+
+def get_profile(index: int) -> Optional[Profile]:
+    """Return a recent profile, where 0 is the most recent, or None."""
+    profiles = get_profiles()
+    if 0 <= index < len(profiles):
+        return profiles[index]
+    return None
+
+
+def clear_profiles():
+    with _profiles_lock:
+        _profiles.clear()
+
+
+def _get_script_stack(frame, script_path) -> Optional[Tuple[str, ...]]:
+    """Return the labels of a frame's stack, from the script's module frame
+    down to the frame, or None if the script isn't executing yet."""
+    labels = []
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename == script_path:
+            labels.append(
+                "%s (%s:%s)"
+                % (code.co_name, os.path.basename(script_path), frame.f_lineno)
+            )
+            if code.co_name == "<module>":
+                labels.reverse()
+                return tuple(labels)
+        else:
+            module_name = frame.f_globals.get("__name__", "?")
+            labels.append("%s.%s" % (module_name, code.co_name))
+        frame = frame.f_back
+    return None
@@ -13,9 +13,10 @@
 # limitations under the License.
 
 import threading
+import time
 from collections import deque
 from enum import Enum
-from typing import Any, Tuple, Deque
+from typing import Any, Deque, Optional, Tuple
 
 from streamlit.proto.ClientState_pb2 import ClientState
 from streamlit.widgets import coalesce_widget_states
@@ -43,11 +44,38 @@ class ScriptRequestQueue(object):
 
     ReportSession publishes to this queue, and ScriptRunner consumes from it.
 
+    A RERUN request can be held back, so that rapid interactions (like
+    dragging a slider) don't stop and restart a script over and over:
+
+    - With a debounce window, a RERUN isn't ready until that much time has
+      passed without another RERUN being enqueued.
+    - With a minimum interval, a RERUN isn't ready until that much time has
+      passed since the last RERUN was dequeued, i.e. since the last run
+      started.
+
+    While the RERUN at the front of the queue isn't ready, dequeue() treats
+    the queue as empty. RERUNs enqueued meanwhile are still coalesced into it.
+
     """
 
-    def __init__(self):
+    def __init__(self, debounce_secs=0, min_interval_secs=0):
+        """Constructor.
+
+        Parameters
+        ----------
+        debounce_secs : float
+            The debounce window for RERUN requests, in seconds.
+        min_interval_secs : float
+            The minimum time between dequeued RERUN requests, in seconds.
+
+        """
         self._lock = threading.Lock()
+        self._request_ready = threading.Condition(self._lock)
         self._queue = deque()  # type: Deque[Tuple[ScriptRequest, Any]]
+        self._debounce_secs = debounce_secs
+        self._min_interval_secs = min_interval_secs
+        self._last_rerun_enqueue_time = None  # type: Optional[float]
+        self._last_rerun_dequeue_time = None  # type: Optional[float]
 
     @property
     def has_request(self):
@@ -77,6 +105,7 @@ class ScriptRequestQueue(object):
                 # queue to be processed immediately.
                 self._queue.appendleft((request, data))
             elif request == ScriptRequest.RERUN:
+                self._last_rerun_enqueue_time = time.monotonic()
                 index = _index_if(self._queue, lambda item: item[0] == request)
                 if index >= 0:
                     _, old_data = self._queue[index]
@@ -119,20 +148,73 @@ class ScriptRequestQueue(object):
             else:
                 self._queue.append((request, data))
 
-    def dequeue(self):
+            self._request_ready.notify_all()
+
+    def dequeue(self, wait=False):
         """Pops the front-most request from the queue and returns it.
 
-        Returns (None, None) if the queue is empty.
+        Returns (None, None) if the queue is empty, or if its front-most
+        request is a RERUN that isn't ready yet.
+
+        Parameters
+        ----------
+        wait : bool
+            If True and the queue isn't empty, wait until its front-most
+            request is ready, rather than returning (None, None).
 
         Returns
         -------
         A (ScriptRequest, Data) tuple.
         """
+        if not wait and len(self._queue) == 0:
+            # The ScriptRunner checks for requests on every message its
+            # script enqueues, so don't take the lock when there are none.
+            # A request enqueued meanwhile is handled the next time.
+            return None, None
+
         with self._lock:
-            if len(self._queue) > 0:
-                return self._queue.popleft()
-            else:
-                return None, None
+            while True:
+                delay = self._time_until_ready_locked()
+                if delay is None:
+                    return None, None
+                if delay <= 0:
+                    break
+                if not wait:
+                    return None, None
+                # New requests notify us, e.g. a SHUTDOWN that jumps ahead.
+                self._request_ready.wait(delay)
+
+            request, data = self._queue.popleft()
+            if request == ScriptRequest.RERUN:
+                self._last_rerun_dequeue_time = time.monotonic()
+            return request, data
+
+    def time_until_ready(self):
+        """The number of seconds until the front-most request can be
+        dequeued, which is 0 if it can be dequeued now, or None if the queue
+        is empty."""
+        with self._lock:
+            delay = self._time_until_ready_locked()
+            return None if delay is None else max(delay, 0)
+
+    def _time_until_ready_locked(self):
+        if len(self._queue) == 0:
+            return None
+
+        request, _ = self._queue[0]
+        if request != ScriptRequest.RERUN:
+            return 0
+
+        ready_time = 0.0
+        if self._debounce_secs > 0 and self._last_rerun_enqueue_time is not None:
+            ready_time = self._last_rerun_enqueue_time + self._debounce_secs
+        if self._min_interval_secs > 0 and self._last_rerun_dequeue_time is not None:
+            ready_time = max(
+                ready_time, self._last_rerun_dequeue_time + self._min_interval_secs
+            )
+        if ready_time == 0.0:
+            return 0
+        return ready_time - time.monotonic()
 
 
 def _index_if(collection, pred):
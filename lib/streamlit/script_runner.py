@@ -12,18 +12,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import ctypes
 import sys
 import threading
+import time
 from contextlib import contextmanager
 from enum import Enum
+from typing import Optional
 
 from blinker import Signal
 
 from streamlit import config
-from streamlit import magic
-from streamlit import source_util
+from streamlit import metrics
+from streamlit import script_cache
+from streamlit import script_profiler
+from streamlit import script_thread_pool
+from streamlit import tracing
+from streamlit.delta_throttle import DeltaThrottle
+from streamlit.fragment import Fragments
 from streamlit.media_file_manager import media_file_manager
+from streamlit.report_thread import REPORT_CONTEXT_ATTR_NAME
+from streamlit.report_thread import ReportContext
 from streamlit.report_thread import ReportThread
+from streamlit.report_thread import _WidgetIDSet
 from streamlit.report_thread import get_report_ctx
 from streamlit.script_request_queue import ScriptRequest
 from streamlit.logger import get_logger
@@ -48,6 +59,11 @@ class ScriptRunnerEvent(Enum):
     # is shut down.
     SHUTDOWN = "SHUTDOWN"
 
+    # The ScriptRunner is waiting for a free script thread (see
+    # runner.maxScriptThreads), and its position in line changed. The
+    # position is 0 once it gets a thread.
+    QUEUE_POSITION_CHANGED = "QUEUE_POSITION_CHANGED"
+
 
 class ScriptRunner(object):
     def __init__(
@@ -58,6 +74,7 @@ class ScriptRunner(object):
         client_state,
         request_queue,
         uploaded_file_mgr=None,
+        fragments=None,
     ):
         """Initialize the ScriptRunner.
 
@@ -82,17 +99,34 @@ class ScriptRunner(object):
         uploaded_file_mgr : UploadedFileManager
             The File manager to store the data uploaded by the file_uploader widget.
 
+        fragments : Fragments | None
+            The ReportSession's fragments, which outlive the ScriptRunner.
+            If None, fragments only rerun on their own until we shut down.
+
         """
         self._session_id = session_id
         self._report = report
         self._enqueue_forward_msg = enqueue_forward_msg
         self._request_queue = request_queue
         self._uploaded_file_mgr = uploaded_file_mgr
+        self._fragments = fragments if fragments is not None else Fragments()
 
         self._client_state = client_state
         self._widgets = Widgets()
         self._widgets.set_state(client_state.widget_states)
 
+        max_updates_per_second = config.get_option("runner.maxElementUpdatesPerSecond")
+        if max_updates_per_second > 0:
+            self._delta_throttle = DeltaThrottle(
+                enqueue_forward_msg,
+                max_updates_per_second,
+                # Held updates don't reach enqueue_forward_msg, which would
+                # have given us a chance to handle requests.
+                on_update_held=self.maybe_handle_execution_control_request,
+            )  # type: Optional[DeltaThrottle]
+        else:
+            self._delta_throttle = None
+
         self.on_event = Signal(
             doc="""Emitted when a ScriptRunnerEvent occurs.
 
@@ -107,9 +141,17 @@ class ScriptRunner(object):
                 Our compile error. Set only for the
                 SCRIPT_STOPPED_WITH_COMPILE_ERROR event.
 
+            fragment_delta_path : list of int | None
+                The delta path of the fragment's container, if only a
+                fragment is running. Set only for the SCRIPT_STARTED event.
+
             widget_states : streamlit.proto.WidgetStates_pb2.WidgetStates | None
                 The ScriptRunner's final WidgetStates. Set only for the
                 SHUTDOWN event.
+
+            queue_position : int | None
+                Our position in line for a script thread. Set only for the
+                QUEUE_POSITION_CHANGED event.
             """
         )
 
@@ -120,17 +162,40 @@ class ScriptRunner(object):
         # maybe_handle_execution_control_request.
         self._execing = False
 
-        # This is initialized in start()
+        # For runner.interruptScripts. While _interruptible is set, a new
+        # request raises an _InterruptException in the script thread.
+        # _interrupt_pending is set from then until we know the exception was
+        # raised or cancelled, so we raise at most one at a time.
+        self._interrupt_lock = threading.Lock()
+        self._interruptible = False
+        self._interrupt_pending = False
+        # Calls request_interrupt() again once a held-back RERUN is ready.
+        self._interrupt_timer = None  # type: Optional[threading.Timer]
+
+        # This is initialized in start(), or when a pooled script thread
+        # picks us up.
         self._script_thread = None
+        self._started = False
 
     def start(self):
         """Start a new thread to process the ScriptEventQueue.
 
+        If runner.maxScriptThreads is set, we wait for a thread from the
+        ScriptThreadPool instead.
+
         This must be called only once.
 
         """
-        if self._script_thread is not None:
+        if self._started:
             raise Exception("ScriptRunner was already started")
+        self._started = True
+
+        if config.get_option("runner.maxScriptThreads") > 0:
+            script_thread_pool.get_pool().submit(
+                self._process_request_queue_in_pool_thread,
+                self._on_queue_position_changed,
+            )
+            return
 
         self._script_thread = ReportThread(
             session_id=self._session_id,
@@ -140,9 +205,40 @@ class ScriptRunner(object):
             uploaded_file_mgr=self._uploaded_file_mgr,
             target=self._process_request_queue,
             name="ScriptRunner.scriptThread",
+            fragments=self._fragments,
+            delta_throttle=self._delta_throttle,
+            uninterruptible=self._uninterruptible,
         )
         self._script_thread.start()
 
+    def _on_queue_position_changed(self, queue_position):
+        self.on_event.send(
+            ScriptRunnerEvent.QUEUE_POSITION_CHANGED, queue_position=queue_position
+        )
+
+    def _process_request_queue_in_pool_thread(self):
+        """Process the ScriptRequestQueue on a ScriptThreadPool thread."""
+        thread = threading.current_thread()
+        ctx = ReportContext(
+            session_id=self._session_id,
+            enqueue=self._enqueue_forward_msg,
+            query_string=self._client_state.query_string,
+            widgets=self._widgets,
+            widget_ids_this_run=_WidgetIDSet(),
+            uploaded_file_mgr=self._uploaded_file_mgr,
+            fragments=self._fragments,
+            delta_throttle=self._delta_throttle,
+            uninterruptible=self._uninterruptible,
+        )
+        setattr(thread, REPORT_CONTEXT_ATTR_NAME, ctx)
+        self._script_thread = thread
+        try:
+            self._process_request_queue()
+        finally:
+            # The thread will run other sessions' scripts next.
+            setattr(thread, REPORT_CONTEXT_ATTR_NAME, None)
+            self._script_thread = None
+
     def _process_request_queue(self):
         """Process the ScriptRequestQueue and then exits.
 
@@ -150,18 +246,31 @@ class ScriptRunner(object):
 
         """
         LOGGER.debug("Beginning script thread")
+        script_threads_metric = metrics.Client.get("streamlit_script_threads")
+        script_threads_metric.inc()
 
-        while not self._shutdown_requested and self._request_queue.has_request:
-            request, data = self._request_queue.dequeue()
-            if request == ScriptRequest.STOP:
-                LOGGER.debug("Ignoring STOP request while not running")
-            elif request == ScriptRequest.SHUTDOWN:
-                LOGGER.debug("Shutting down")
-                self._shutdown_requested = True
-            elif request == ScriptRequest.RERUN:
-                self._run_script(data)
-            else:
-                raise RuntimeError("Unrecognized ScriptRequest: %s" % request)
+        try:
+            while not self._shutdown_requested and self._request_queue.has_request:
+                # A RERUN may be held back by runner.rerunDebounceMs or
+                # runner.minRerunIntervalMs, so wait until it's ready.
+                request, data = self._request_queue.dequeue(wait=True)
+                if request == ScriptRequest.STOP:
+                    LOGGER.debug("Ignoring STOP request while not running")
+                elif request == ScriptRequest.SHUTDOWN:
+                    LOGGER.debug("Shutting down")
+                    self._shutdown_requested = True
+                elif request == ScriptRequest.RERUN:
+                    # Runs interrupted by a RerunException are rerun here,
+                    # rather than from inside _run_script, so a long chain of
+                    # reruns doesn't grow the stack, and each run's module
+                    # and locals are freed as soon as it ends.
+                    rerun_data = data
+                    while rerun_data is not None:
+                        rerun_data = self._run_script(rerun_data)
+                else:
+                    raise RuntimeError("Unrecognized ScriptRequest: %s" % request)
+        finally:
+            script_threads_metric.dec()
 
         # Send a SHUTDOWN event before exiting. This includes the widget values
         # as they existed after our last successful script run, which the
@@ -191,11 +300,26 @@ class ScriptRunner(object):
             # enqueues a new ForwardEvent
             return
 
-        # Pop the next request from our queue.
-        request, data = self._request_queue.dequeue()
+        if self._interruptible:
+            # Only the script thread changes _interruptible, so we can read it
+            # without the lock. If we're about to handle a request that would
+            # interrupt us, make sure it doesn't.
+            with self._interrupt_lock:
+                request, data = self._request_queue.dequeue()
+                if request is not None:
+                    self._interruptible = False
+                    self._cancel_interrupt_locked()
+        else:
+            # Pop the next request from our queue.
+            request, data = self._request_queue.dequeue()
+
         if request is None:
             return
 
+        self._raise_for_request(request, data)
+
+    def _raise_for_request(self, request, data):
+        """Stop the script in response to a ScriptRequest."""
         LOGGER.debug("Received ScriptRequest: %s", request)
         if request == ScriptRequest.STOP:
             raise StopException()
@@ -207,6 +331,101 @@ class ScriptRunner(object):
         else:
             raise RuntimeError("Unrecognized ScriptRequest: %s" % request)
 
+    def request_interrupt(self):
+        """Interrupt the script, if it's running, to handle a new request.
+
+        Called after a ScriptRequest is enqueued. If runner.interruptScripts
+        is set, this raises an _InterruptException in the script thread, which
+        then handles the request just like maybe_handle_execution_control_request
+        would. This may be called on any thread.
+
+        """
+        with self._interrupt_lock:
+            if not self._interruptible or self._interrupt_pending:
+                return
+
+            delay = self._request_queue.time_until_ready()
+            if delay is None:
+                return
+            if delay > 0:
+                # Don't stop the script for a RERUN that's held back, since
+                # we'd only have to wait for it anyway. Check again later.
+                if self._interrupt_timer is None:
+                    self._interrupt_timer = threading.Timer(
+                        delay, self._on_interrupt_timer
+                    )
+                    self._interrupt_timer.daemon = True
+                    self._interrupt_timer.start()
+                return
+
+            thread = self._script_thread
+            if thread is None or thread.ident is None:
+                return
+            if _set_async_exception(thread.ident, _InterruptException):
+                self._interrupt_pending = True
+
+    def _on_interrupt_timer(self):
+        with self._interrupt_lock:
+            self._interrupt_timer = None
+        self.request_interrupt()
+
+    def _set_interruptible(self, interruptible):
+        """Allow or disallow request_interrupt() to interrupt us. This must be
+        called on the script thread."""
+        with self._interrupt_lock:
+            self._interruptible = interruptible
+            self._cancel_interrupt_locked()
+
+    @contextmanager
+    def _uninterruptible(self):
+        """Keep request_interrupt() from interrupting Streamlit's own code,
+        where an exception could leave a lock or shared state half-updated.
+        A request that comes in meanwhile is handled when the block exits."""
+        if not self._is_in_script_thread() or not self._interruptible:
+            # Another thread, or we're already uninterruptible.
+            yield
+            return
+
+        self._set_interruptible(False)
+        try:
+            yield
+        finally:
+            self._set_interruptible(True)
+        self.maybe_handle_execution_control_request()
+        # A RERUN that's still held back needs its interrupt timer again.
+        self.request_interrupt()
+
+    def _cancel_interrupt_locked(self):
+        if self._interrupt_pending:
+            _set_async_exception(threading.get_ident(), None)
+            self._interrupt_pending = False
+
+    def _exec(self, run_script):
+        """Run the script by calling run_script. If runner.interruptScripts is
+        set, turn an _InterruptException into the exception for the request
+        that caused it."""
+        if not config.get_option("runner.interruptScripts") or config.get_option(
+            "runner.installTracer"
+        ):
+            run_script()
+            return
+
+        try:
+            self._set_interruptible(True)
+            try:
+                run_script()
+            finally:
+                self._set_interruptible(False)
+        except _InterruptException:
+            # The exception may have been raised in the finally block above,
+            # before we could cancel it.
+            self._set_interruptible(False)
+            request, data = self._request_queue.dequeue()
+            if request is None:
+                LOGGER.debug("Interrupted without a request")
+                raise StopException()
+            self._raise_for_request(request, data)
+
     def _install_tracer(self):
         """Install function that runs before each line of the script."""
 
@@ -233,6 +452,7 @@ class ScriptRunner(object):
         finally:
             self._execing = False
 
+    @tracing.traced("ScriptRunner._run_script")
     def _run_script(self, rerun_data):
         """Run our script.
 
@@ -241,13 +461,17 @@ class ScriptRunner(object):
         rerun_data: RerunData
             The RerunData to use.
 
+        Returns
+        -------
+        RerunData or None
+            The RerunData to rerun the script with, if the run was
+            interrupted by a RerunException.
+
         """
         assert self._is_in_script_thread()
 
         LOGGER.debug("Running script %s", rerun_data)
-
-        # Reset DeltaGenerators, widgets, media files.
-        media_file_manager.clear_session_files()
+        start_time = time.time()
 
         ctx = get_report_ctx()
         if ctx is None:
@@ -256,42 +480,32 @@ class ScriptRunner(object):
                 "ScriptRunner thread has a null ReportContext. Something has gone very wrong!"
             )
 
-        ctx.reset(query_string=rerun_data.query_string)
+        fragment = self._get_fragment_to_rerun(ctx, rerun_data)
+        if fragment is not None:
+            return self._run_fragment(ctx, fragment, rerun_data, start_time)
+
+        self._reset_for_run(ctx, rerun_data)
+
+        self.on_event.send(ScriptRunnerEvent.SCRIPT_STARTED, fragment_delta_path=None)
 
-        self.on_event.send(ScriptRunnerEvent.SCRIPT_STARTED)
+        # This run will find the script's fragments again.
+        self._fragments.clear()
 
         # Compile the script. Any errors thrown here will be surfaced
         # to the user via a modal dialog in the frontend, and won't result
         # in their previous report disappearing.
 
         try:
-            with source_util.open_python_file(self._report.script_path) as f:
-                filebody = f.read()
-
-            if config.get_option("runner.magicEnabled"):
-                filebody = magic.add_magic(filebody, self._report.script_path)
-
-            code = compile(
-                filebody,
-                # Pass in the file path so it can show up in exceptions.
-                self._report.script_path,
-                # We're compiling entire blocks of Python, so we need "exec"
-                # mode (as opposed to "eval" or "single").
-                mode="exec",
-                # Don't inherit any flags or "future" statements.
-                flags=0,
-                dont_inherit=1,
-                # Use the default optimization options.
-                optimize=-1,
-            )
+            code = script_cache.get_code(self._report.script_path)
 
         except BaseException as e:
             # We got a compile error. Send an error event and bail immediately.
             LOGGER.debug("Fatal script error: %s" % e)
+            _observe_run_duration("compile_error", start_time)
             self.on_event.send(
                 ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR, exception=e
             )
-            return
+            return None
 
         # If we get here, we've successfully compiled our script. The next step
         # is to run it. Errors thrown during execution will be shown to the
@@ -309,6 +523,10 @@ class ScriptRunner(object):
         # is interrupted by a RerunException.
         rerun_with_data = None
 
+        # How the run ended, for the streamlit_script_run_duration_seconds
+        # metric.
+        outcome = "success"
+
         try:
             # Create fake module. This gives us a name global namespace to
             # execute the code in.
@@ -328,16 +546,21 @@ class ScriptRunner(object):
             # assume is the main script directory.
             module.__dict__["__file__"] = self._report.script_path
 
-            with modified_sys_path(self._report), self._set_execing_flag():
-                exec(code, module.__dict__)
+            profiler = script_profiler.maybe_profile(
+                self._session_id, self._report.script_path, rerun_data.query_string
+            )
+            with modified_sys_path(self._report), self._set_execing_flag(), profiler:
+                self._exec(lambda: exec(code, module.__dict__))
 
         except RerunException as e:
             rerun_with_data = e.rerun_data
+            outcome = "rerun"
 
         except StopException:
-            pass
+            outcome = "stop"
 
         except BaseException as e:
+            outcome = "error"
             # Show exceptions in the Streamlit report.
             LOGGER.debug(e)
             import streamlit as st
@@ -347,18 +570,110 @@ class ScriptRunner(object):
             # ScriptRunner.
 
         finally:
-            self._widgets.reset_triggers()
-            self.on_event.send(ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS)
-            # delete expired files now that the script has run and files in use
-            # are marked as active
-            media_file_manager.del_expired_files()
+            self._on_run_finished(outcome, start_time)
 
         # Use _log_if_error() to make sure we never ever ever stop running the
         # script without meaning to.
         _log_if_error(_clean_problem_modules)
 
-        if rerun_with_data is not None:
-            self._run_script(rerun_with_data)
+        return rerun_with_data
+
+    def _get_fragment_to_rerun(self, ctx, rerun_data):
+        """Return the fragment to rerun instead of the whole script, if any.
+
+        That's the case when the rerun only changes widgets that belong to a
+        single fragment.
+
+        """
+        if rerun_data.widget_states is None:
+            return None
+        if rerun_data.query_string != ctx.query_string:
+            return None
+
+        changed_widget_ids = self._widgets.get_changed_widget_ids(
+            rerun_data.widget_states
+        )
+        if not changed_widget_ids:
+            # Nothing changed, so the user asked for a rerun.
+            return None
+
+        return self._fragments.get_fragment_to_rerun(changed_widget_ids)
+
+    def _reset_for_run(self, ctx, rerun_data, fragment=None):
+        """Reset DeltaGenerators, widgets and media files before a run.
+
+        When just a fragment reruns, only the media files in its container
+        are released, since the rest of the report stays.
+
+        """
+        if fragment is None:
+            media_file_manager.clear_session_files()
+        else:
+            media_file_manager.clear_session_files(delta_path=fragment.delta_path)
+
+        ctx.reset(query_string=rerun_data.query_string)
+
+    def _run_fragment(self, ctx, fragment, rerun_data, start_time):
+        """Rerun just one fragment, in its container.
+
+        This mirrors _run_script, but keeps the rest of the report: the
+        browser only replaces the contents of the fragment's container.
+
+        """
+        LOGGER.debug("Running fragment %s", fragment.delta_path)
+
+        self._reset_for_run(ctx, rerun_data, fragment)
+
+        self.on_event.send(
+            ScriptRunnerEvent.SCRIPT_STARTED, fragment_delta_path=fragment.delta_path
+        )
+
+        self._widgets.set_state(rerun_data.widget_states)
+
+        if config.get_option("runner.installTracer"):
+            self._install_tracer()
+
+        rerun_with_data = None
+        outcome = "success"
+        container = fragment.new_container()
+
+        try:
+            with modified_sys_path(self._report), self._set_execing_flag():
+                self._exec(lambda: fragment.run(container))
+
+        except RerunException as e:
+            rerun_with_data = e.rerun_data
+            outcome = "rerun"
+
+        except StopException:
+            outcome = "stop"
+
+        except BaseException as e:
+            outcome = "error"
+            LOGGER.debug(e)
+            import streamlit as st
+
+            # Show the exception below the fragment's output.
+            with container:
+                st.exception(e)
+
+        finally:
+            self._on_run_finished(outcome, start_time)
+
+        _log_if_error(_clean_problem_modules)
+
+        return rerun_with_data
+
+    def _on_run_finished(self, outcome, start_time):
+        if self._delta_throttle is not None:
+            # Deliver the final value of every element.
+            self._delta_throttle.flush()
+        _observe_run_duration(outcome, start_time)
+        self._widgets.reset_triggers()
+        self.on_event.send(ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS)
+        # delete expired files now that the script has run and files in use
+        # are marked as active
+        media_file_manager.del_expired_files()
 
 
 class ScriptControlException(BaseException):
@@ -373,6 +688,12 @@ class StopException(ScriptControlException):
     pass
 
 
+class _InterruptException(ScriptControlException):
+    """Raised in the script thread by ScriptRunner.request_interrupt()."""
+
+    pass
+
+
 class RerunException(ScriptControlException):
     """Silently stop and rerun the user's script."""
 
@@ -387,6 +708,34 @@ class RerunException(ScriptControlException):
         self.rerun_data = rerun_data
 
 
+def _set_async_exception(thread_id, exception_type):
+    """Raise an exception in another thread the next time it runs Python
+    code, or cancel it if exception_type is None.
+
+    Returns
+    -------
+    bool
+        Whether the exception was set. This is False on Python interpreters
+        without PyThreadState_SetAsyncExc.
+
+    """
+    pythonapi = getattr(ctypes, "pythonapi", None)
+    if pythonapi is None or not hasattr(pythonapi, "PyThreadState_SetAsyncExc"):
+        return False
+
+    exception = None if exception_type is None else ctypes.py_object(exception_type)
+    num_threads = pythonapi.PyThreadState_SetAsyncExc(
+        ctypes.c_ulong(thread_id), exception
+    )
+    return num_threads == 1
+
+
+def _observe_run_duration(outcome, start_time):
+    metrics.Client.get("streamlit_script_run_duration_seconds").labels(outcome).observe(
+        time.time() - start_time
+    )
+
+
 def _clean_problem_modules():
     """Some modules are stateful, so we have to clear their state."""
 
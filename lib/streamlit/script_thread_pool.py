@@ -0,0 +1,181 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs scripts on a fixed number of threads, for runner.maxScriptThreads.
+
+Without a limit, each ScriptRunner starts its own thread, so a burst of
+reruns means as many threads fighting over the GIL, and everyone's script
+gets slower. With a limit, ScriptRunners instead submit themselves to the
+ScriptThreadPool. At most runner.maxScriptThreads of them run at once, and
+the rest wait in line, first come first served. Each session has at most one
+ScriptRunner, so this is fair across sessions.
+
+While a ScriptRunner waits, it's told its position in line, so the session can
+show it to the browser.
+"""
+
+import collections
+import threading
+import time
+from typing import Deque, List, Optional, Tuple
+
+from streamlit import config
+from streamlit import metrics
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+
+class _Job(object):
+    __slots__ = ("target", "on_position_changed", "submit_time", "position")
+
+    def __init__(self, target, on_position_changed):
+        self.target = target
+        self.on_position_changed = on_position_changed
+        self.submit_time = time.time()
+        self.position = 0
+
+
+class ScriptThreadPool(object):
+    """A fixed number of threads that run jobs in the order they arrive."""
+
+    def __init__(self, size):
+        """Initialize the pool.
+
+        Parameters
+        ----------
+        size : int
+            The maximum number of jobs that run at once.
+
+        """
+        self._size = size
+        self._cond = threading.Condition()
+        self._waiting_jobs = collections.deque()  # type: Deque[_Job]
+        self._num_threads = 0
+        self._num_idle_threads = 0
+
+    @property
+    def num_waiting(self) -> int:
+        with self._cond:
+            return len(self._waiting_jobs)
+
+    def submit(self, target, on_position_changed=None):
+        """Run a function on one of the pool's threads.
+
+        Parameters
+        ----------
+        target : callable
+            The function to run. It's called with no arguments.
+        on_position_changed : callable or None
+            If the job has to wait, this is called with its position in line
+            (1 for the next job to run) whenever that changes, and with 0 when
+            the job starts. It may be called on any thread.
+
+        """
+        job = _Job(target, on_position_changed)
+        with self._cond:
+            self._waiting_jobs.append(job)
+            if (
+                self._num_idle_threads < len(self._waiting_jobs)
+                and self._num_threads < self._size
+            ):
+                self._start_thread()
+            self._cond.notify()
+            notifications = self._update_positions()
+            metrics.Client.get("streamlit_script_queue_length").set(
+                len(self._waiting_jobs)
+            )
+
+        _notify(notifications)
+
+    def _start_thread(self):
+        """Start a new worker thread. Must be called with _cond held."""
+        # The thread counts as idle until it picks up a job.
+        self._num_threads += 1
+        self._num_idle_threads += 1
+        thread = threading.Thread(
+            target=self._work, name="ScriptThreadPool.scriptThread"
+        )
+        thread.daemon = True
+        thread.start()
+
+    def _update_positions(self):
+        """Renumber the waiting jobs. Must be called with _cond held.
+
+        Returns
+        -------
+        list of (_Job, int)
+            The jobs whose position changed, with their new position.
+
+        """
+        # The oldest jobs are about to be picked up by the idle threads, so
+        # they don't have to wait.
+        notifications = []  # type: List[Tuple[_Job, int]]
+        for index, job in enumerate(self._waiting_jobs):
+            position = max(0, index - self._num_idle_threads + 1)
+            if position != job.position and job.on_position_changed is not None:
+                notifications.append((job, position))
+            job.position = position
+        return notifications
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._waiting_jobs:
+                    self._cond.wait()
+                self._num_idle_threads -= 1
+
+                job = self._waiting_jobs.popleft()
+                was_waiting = job.position > 0
+                job.position = 0
+                notifications = self._update_positions()
+                metrics.Client.get("streamlit_script_queue_length").set(
+                    len(self._waiting_jobs)
+                )
+
+            metrics.Client.get("streamlit_script_queue_wait_seconds").observe(
+                time.time() - job.submit_time
+            )
+            if was_waiting:
+                notifications.append((job, 0))
+            _notify(notifications)
+
+            try:
+                job.target()
+            except Exception:
+                LOGGER.exception("Script thread job failed")
+
+            with self._cond:
+                self._num_idle_threads += 1
+
+
+def _notify(notifications):
+    for job, position in notifications:
+        try:
+            job.on_position_changed(position)
+        except Exception:
+            LOGGER.exception("Queue position callback failed")
+
+
+_pool = None  # type: Optional[ScriptThreadPool]
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the ScriptThreadPool, creating it if needed."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ScriptThreadPool(config.get_option("runner.maxScriptThreads"))
+        return _pool
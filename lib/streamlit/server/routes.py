@@ -13,12 +13,21 @@
 # limitations under the License.
 
 import json
+import mimetypes
+import os
+import re
+from typing import Optional
 
+import tornado.gen
 import tornado.web
 
 from streamlit import config
 from streamlit import metrics
+from streamlit import script_profiler
+from streamlit import tracing
 from streamlit.logger import get_logger
+from streamlit.server import static_compression
+from streamlit.server import workers
 from streamlit.server.server_util import serialize_forward_msg
 from streamlit.media_file_manager import media_file_manager
 
@@ -40,16 +49,74 @@ def allow_cross_origin_requests():
 
 
 class StaticFileHandler(tornado.web.StaticFileHandler):
+    # Hashed filenames look like "main.1a2b3c4d.chunk.js".
+    HASHED_FILENAME_RE = re.compile(r"\.[0-9a-f]{8,}\.")
+
+    # Files with a hash in their name never change, so browsers can cache
+    # them for as long as they like.
+    CACHE_MAX_AGE = 365 * 24 * 60 * 60  # 1 year
+
+    def initialize(self, path, default_filename=None):
+        super(StaticFileHandler, self).initialize(path, default_filename)
+        # The file being served, and the encoding and size of the
+        # precompressed copy we're sending instead, if any.
+        self._original_path = None  # type: Optional[str]
+        self._content_encoding = None  # type: Optional[str]
+        self._compressed_size = None  # type: Optional[int]
+
+    def validate_absolute_path(self, root, absolute_path):
+        """Serve a precompressed copy of the file if the browser accepts it."""
+        absolute_path = super(StaticFileHandler, self).validate_absolute_path(
+            root, absolute_path
+        )
+        self._original_path = absolute_path
+        if absolute_path is None:
+            return None
+
+        encoding = static_compression.choose_encoding(
+            self.request.headers.get("Accept-Encoding")
+        )
+        if encoding is not None:
+            compressed_path = static_compression.get_compressed_path(
+                absolute_path, encoding
+            )
+            if compressed_path is not None:
+                self._content_encoding = encoding
+                self._compressed_size = os.path.getsize(compressed_path)
+                return compressed_path
+
+        return absolute_path
+
+    def get_content_size(self):
+        # The superclass reports the size of the file it validated, which is
+        # the original file rather than the compressed copy we're sending.
+        if self._compressed_size is None:
+            return super(StaticFileHandler, self).get_content_size()
+        return self._compressed_size
+
+    def get_content_type(self):
+        if self._content_encoding is None or self._original_path is None:
+            return super(StaticFileHandler, self).get_content_type()
+        mime_type, _ = mimetypes.guess_type(self._original_path)
+        return mime_type or "application/octet-stream"
+
     def set_extra_headers(self, path):
         """Disable cache for HTML files.
 
         Other assets like JS and CSS are suffixed with their hash, so they can
         be cached indefinitely.
         """
+        if self._content_encoding is not None:
+            self.set_header("Content-Encoding", self._content_encoding)
+
         is_index_url = len(path) == 0
 
         if is_index_url or path.endswith(".html"):
             self.set_header("Cache-Control", "no-cache")
+        elif self.HASHED_FILENAME_RE.search(os.path.basename(path)):
+            self.set_header(
+                "Cache-Control", "public, max-age=%s, immutable" % self.CACHE_MAX_AGE
+            )
         else:
             self.set_header("Cache-Control", "public")
 
@@ -68,10 +135,34 @@ class AddSlashHandler(tornado.web.RequestHandler):
 
 
 class MediaFileHandler(tornado.web.StaticFileHandler):
+    # Media files are named after a hash of their content, so a given URL
+    # always has the same content, and browsers can cache it for as long as
+    # they like.
+    CACHE_MAX_AGE = 365 * 24 * 60 * 60  # 1 year
+
+    # Ranges of media files are written in chunks of at most this size, so
+    # we never copy a large part of a file at once.
+    RANGE_CHUNK_SIZE = 64 * 1024
+
     def set_default_headers(self):
         if allow_cross_origin_requests():
             self.set_header("Access-Control-Allow-Origin", "*")
 
+    @tornado.gen.coroutine
+    def get(self, path, include_body=True):
+        if workers.can_forward(self.request):
+            try:
+                media_file_manager.get(self.parse_url_path(path))
+            except KeyError:
+                # The file may belong to a session in another worker.
+                forwarded = yield workers.forward_request(
+                    self, workers.get_other_workers()
+                )
+                if forwarded:
+                    return
+
+        yield super(MediaFileHandler, self).get(path, include_body)
+
     # Overriding StaticFileHandler to use the MediaFileManager
     #
     # From the Torndado docs:
@@ -93,10 +184,37 @@ class MediaFileHandler(tornado.web.StaticFileHandler):
         return media.content_size
 
     def get_modified_time(self):
-        # We do not track last modified time, but this can be improved to
-        # allow caching among files in the MediaFileManager
+        # We do not track last modified time. Browsers revalidate with the
+        # ETag instead.
         return None
 
+    def compute_etag(self):
+        # The file's id is a hash of its content, so it's a strong ETag. (The
+        # default implementation hashes the whole file, and keeps the hash
+        # around forever.)
+        try:
+            media = media_file_manager.get(self.absolute_path)
+        except KeyError:
+            return None
+        return '"%s"' % media.id
+
+    def get_cache_time(self, path, modified, mime_type):
+        return self.CACHE_MAX_AGE
+
+    def set_extra_headers(self, path):
+        self.set_header("Cache-Control", "max-age=%s, immutable" % self.CACHE_MAX_AGE)
+
+    def write(self, chunk):
+        # RequestHandler.write only accepts bytes, but range chunks are
+        # memoryviews of the media content (see _iter_chunks). flush() joins
+        # the write buffer into bytes, which copies each chunk just once.
+        if isinstance(chunk, memoryview):
+            if self._finished:
+                raise RuntimeError("Cannot write() after finish()")
+            self._write_buffer.append(chunk)
+            return
+        super(MediaFileHandler, self).write(chunk)
+
     @classmethod
     def get_absolute_path(cls, root, path):
         # All files are stored in memory, so the absolute path is just the
@@ -125,8 +243,16 @@ class MediaFileHandler(tornado.web.StaticFileHandler):
         if end is None:
             end = len(media.content)
 
-        # content is bytes that work just by slicing supplied by start and end
-        return media.content[start:end]
+        # Send the range in chunks, rather than one slice of the content that
+        # could be as large as the file itself.
+        return _iter_chunks(media.content, start, end, cls.RANGE_CHUNK_SIZE)
+
+
+def _iter_chunks(content, start, end, chunk_size):
+    # Views of the content, so that slicing a chunk doesn't copy it.
+    view = memoryview(content)
+    for chunk_start in range(start, end, chunk_size):
+        yield view[chunk_start : min(chunk_start + chunk_size, end)]
 
 
 class _SpecialRequestHandler(tornado.web.RequestHandler):
@@ -206,6 +332,26 @@ class DebugHandler(_SpecialRequestHandler):
 
     def get(self):
         self.add_header("Cache-Control", "no-cache")
+        if self.get_argument("trace", None):
+            # Recently traced spans, for chrome://tracing or Perfetto.
+            self.set_header("Content-Type", "application/json")
+            self.write(json.dumps(tracing.get_recent_trace()))
+            return
+
+        profile_index = self.get_argument("profile", None)
+        if profile_index is not None:
+            # A recently profiled script run, as collapsed stacks.
+            try:
+                profile = script_profiler.get_profile(int(profile_index))
+            except ValueError:
+                profile = None
+            if profile is None:
+                self.set_status(404)
+                return
+            self.set_header("Content-Type", "text/plain")
+            self.write(profile.to_collapsed_stacks())
+            return
+
         self.write(
             "<code><pre>%s</pre><code>" % json.dumps(self._server.get_debug(), indent=2)
         )
@@ -228,6 +374,7 @@ class MessageCacheHandler(tornado.web.RequestHandler):
         if allow_cross_origin_requests():
             self.set_header("Access-Control-Allow-Origin", "*")
 
+    @tornado.gen.coroutine
     def get(self):
         msg_hash = self.get_argument("hash", None)
         if msg_hash is None:
@@ -239,6 +386,12 @@ class MessageCacheHandler(tornado.web.RequestHandler):
             raise tornado.web.Finish()
 
         message = self._cache.get_message(msg_hash)
+        if message is None and workers.can_forward(self.request):
+            # The message may have been cached by another worker.
+            forwarded = yield workers.forward_request(self, workers.get_other_workers())
+            if forwarded:
+                return
+
         if message is None:
             # Message not in our cache.
             LOGGER.error(
@@ -251,9 +404,15 @@ class MessageCacheHandler(tornado.web.RequestHandler):
         LOGGER.debug("MessageCache HIT [hash=%s]" % msg_hash)
         msg_str = serialize_forward_msg(message)
         self.set_header("Content-Type", "application/octet-stream")
-        self.write(msg_str)
         self.set_status(200)
 
+        # Stream large messages out in chunks, rather than buffering the
+        # entire response before sending it.
+        chunk_size = config.get_option("global.messageChunkSize")
+        for start in range(0, len(msg_str), chunk_size):
+            self.write(msg_str[start : start + chunk_size])
+            yield self.flush()
+
     def options(self):
         """/OPTIONS handler for preflight CORS checks."""
         self.set_status(204)
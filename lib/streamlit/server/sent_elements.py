@@ -0,0 +1,188 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tracks the elements a browser shows, to avoid sending them again.
+
+A rerun writes every element of the report again, even though most of them
+are usually identical to what the browser already shows. For each browser
+connection, we remember the hash of the element at each delta path. When a
+new_element delta has the same hash as the element the browser already has
+there, we send an element_unchanged delta instead, which just tells the
+browser to keep that element for the current run.
+
+To know what the browser has, this mirrors what the frontend does with the
+messages we send it. In particular, when a report finishes successfully, the
+frontend clears the elements that the run didn't write, and so do we.
+"""
+
+from typing import Dict, Optional, Set, Tuple
+
+from streamlit.forward_msg_cache import populate_hash_if_needed
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+DeltaPath = Tuple[int, ...]
+# An element's hash and its dimensions, which aren't part of the hash.
+ElementKey = Tuple[str, int, int]
+
+
+class SentElements(object):
+    """The elements we've sent to one browser, by delta path.
+
+    This is not thread safe. It's intended to only be accessed by the
+    server thread.
+    """
+
+    def __init__(self):
+        self._elements = {}  # type: Dict[DeltaPath, ElementKey]
+        # The delta paths we've sent blocks to. Only these can have elements
+        # under them, so only replacing one of them means looking for its
+        # descendants.
+        self._block_paths = set()  # type: Set[DeltaPath]
+        # The delta paths the current run has written to.
+        self._paths_this_run = set()  # type: Set[DeltaPath]
+        # The delta path of the fragment that's running, if any.
+        self._fragment_path = None  # type: Optional[DeltaPath]
+        self._script_path = None  # type: Optional[str]
+
+    def __len__(self):
+        return len(self._elements)
+
+    def clear(self):
+        """Forget every element, so that each one is sent in full again."""
+        self._elements.clear()
+        self._block_paths.clear()
+
+    def process(self, msg):
+        """Return the message to send to the browser in place of msg,
+        which is either msg itself or an element_unchanged message, and
+        update what we know the browser shows.
+
+        Parameters
+        ----------
+        msg : ForwardMsg
+            The message that's about to be sent.
+
+        Returns
+        -------
+        ForwardMsg
+
+        """
+        msg_type = msg.WhichOneof("type")
+
+        if msg_type == "new_report":
+            self._on_new_report(msg.new_report)
+        elif msg_type == "report_finished":
+            if msg.report_finished == ForwardMsg.FINISHED_SUCCESSFULLY:
+                self._clear_stale_elements()
+        elif msg_type == "delta":
+            return self._process_delta(msg)
+
+        return msg
+
+    def _on_new_report(self, new_report):
+        if new_report.script_path != self._script_path:
+            # The frontend clears everything when the script changes.
+            self.clear()
+            self._script_path = new_report.script_path
+
+        self._paths_this_run = set()
+        if len(new_report.fragment_delta_path) > 0:
+            self._fragment_path = tuple(new_report.fragment_delta_path)
+        else:
+            self._fragment_path = None
+
+    def _process_delta(self, msg):
+        delta_path = tuple(msg.metadata.delta_path)
+        delta_type = msg.delta.WhichOneof("type")
+        self._paths_this_run.add(delta_path)
+
+        if delta_type != "new_element":
+            # A block replaces an element, and add_rows changes it.
+            self._elements.pop(delta_path, None)
+            if delta_type == "add_block":
+                self._block_paths.add(delta_path)
+            return msg
+
+        # The element replaces whatever was at its delta path, including
+        # any elements in a block that was there.
+        if delta_path in self._block_paths:
+            self._remove_descendants(delta_path)
+
+        dimensions = msg.metadata.element_dimension_spec
+        key = (populate_hash_if_needed(msg), dimensions.width, dimensions.height)
+        if self._elements.get(delta_path) == key:
+            return create_unchanged_element_msg(msg)
+
+        self._elements[delta_path] = key
+        return msg
+
+    def _remove_descendants(self, block_path):
+        """Forget the block at block_path, and everything in it."""
+        self._block_paths = {
+            path for path in self._block_paths if not _is_prefix(block_path, path)
+        }
+        descendants = [
+            path
+            for path in self._elements
+            if len(path) > len(block_path) and _is_prefix(block_path, path)
+        ]
+        for path in descendants:
+            del self._elements[path]
+
+    def _clear_stale_elements(self):
+        """Forget the elements that the frontend clears when the run
+        finishes: those the run didn't write, and that aren't in a block it
+        wrote. When a fragment ran, that's only elements inside it."""
+        stale = [path for path in self._elements if self._is_stale(path)]
+        for path in stale:
+            del self._elements[path]
+        self._block_paths = {
+            path for path in self._block_paths if not self._is_stale(path)
+        }
+
+    def _is_stale(self, delta_path):
+        return not self._was_written_this_run(delta_path) and (
+            self._fragment_path is None
+            or (
+                len(delta_path) > len(self._fragment_path)
+                and _is_prefix(self._fragment_path, delta_path)
+            )
+        )
+
+    def _was_written_this_run(self, delta_path):
+        return delta_path in self._paths_this_run
+
+
+def create_unchanged_element_msg(msg):
+    """Create a ForwardMsg that tells the browser to keep the element it
+    already shows at msg's delta path.
+
+    Parameters
+    ----------
+    msg : ForwardMsg
+        The new_element message that the browser already has.
+
+    Returns
+    -------
+    ForwardMsg
+
+    """
+    unchanged_msg = ForwardMsg()
+    unchanged_msg.delta.element_unchanged = True
+    unchanged_msg.metadata.delta_path[:] = msg.metadata.delta_path
+    return unchanged_msg
+
+
+def _is_prefix(prefix, delta_path):
+    return delta_path[: len(prefix)] == prefix
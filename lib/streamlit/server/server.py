@@ -12,16 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import logging
 import os
 import threading
 import socket
 import sys
 import errno
+import time
 import traceback
 import click
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from typing import Any, Dict, Optional, TYPE_CHECKING
+from typing import Any, Deque, Dict, Optional, TYPE_CHECKING
 
 import tornado.concurrent
 import tornado.gen
@@ -32,6 +35,9 @@ import tornado.websocket
 
 from streamlit import config
 from streamlit import file_util
+from streamlit import metrics
+from streamlit import script_profiler
+from streamlit import tracing
 from streamlit.config_option import ConfigOption
 from streamlit.forward_msg_cache import ForwardMsgCache
 from streamlit.forward_msg_cache import create_reference_msg
@@ -55,11 +61,16 @@ from streamlit.server.routes import MediaFileHandler
 from streamlit.server.routes import MessageCacheHandler
 from streamlit.server.routes import MetricsHandler
 from streamlit.server.routes import StaticFileHandler
+from streamlit.server import workers
 from streamlit.server.server_util import MESSAGE_SIZE_LIMIT
 from streamlit.server.server_util import is_cacheable_msg
 from streamlit.server.server_util import is_url_from_allowed_origins
 from streamlit.server.server_util import make_url_path_regex
-from streamlit.server.server_util import serialize_forward_msg
+from streamlit.server.server_util import prepare_forward_msg
+from streamlit.server.server_util import serialize_forward_msg_chunks
+from streamlit.server.server_util import should_compress_frame
+from streamlit.server.server_util import should_offload_msg
+from streamlit.server.sent_elements import SentElements
 
 if TYPE_CHECKING:
     from streamlit.report import Report
@@ -83,6 +94,21 @@ MAX_PORT_SEARCH_RETRIES = 100
 # to an unix socket.
 UNIX_SOCKET_PREFIX = "unix://"
 
+# How long the server loop sleeps between sending messages.
+LOOP_INTERVAL_SECS = 0.01
+
+# A browser that reconnects to its session offers these two websocket
+# subprotocols: the first is picked by the server, and the second carries the
+# session's resume token, e.g. "streamlit-resume.<token>".
+_STREAMLIT_SUBPROTOCOL = "streamlit"
+_RESUME_TOKEN_SUBPROTOCOL_PREFIX = "streamlit-resume."
+
+# Large messages are hashed and serialized in this thread pool, so that they
+# don't hold up the IOLoop. (Protobuf and hashlib release the GIL while
+# working on large buffers.)
+_SERIALIZATION_MAX_WORKERS = 4
+_serialization_executor = ThreadPoolExecutor(max_workers=_SERIALIZATION_MAX_WORKERS)
+
 
 class SessionInfo(object):
     """Type stored in our _session_info_by_id dict.
@@ -106,6 +132,63 @@ class SessionInfo(object):
         self.ws = ws
         self.report_run_count = 0
 
+        # Serialized frames that are still waiting to be written to the
+        # websocket. When a large message is split into chunks, only its
+        # first chunk is written right away; the rest are written one per
+        # server loop iteration, so they don't hold up other sessions.
+        self.pending_frames = collections.deque()  # type: Deque[bytes]
+
+        # Messages flushed from the session's browser queue that haven't
+        # been sent yet. They're sent in order, so when the first one is
+        # being prepared in the serialization thread pool, the rest wait.
+        self.unsent_msgs = collections.deque()  # type: Deque[ForwardMsg]
+
+        # Future for a prepared copy of unsent_msgs[0] and its websocket
+        # frames, if it's being prepared in the thread pool.
+        self.preparing_msg = None  # type: Optional[Any]
+
+        # Bytes sent so far from the batch of messages in unsent_msgs.
+        self.unsent_batch_bytes = 0
+
+        # Number of bytes written to the websocket that haven't yet been
+        # flushed to the network.
+        self.buffered_bytes = 0
+        self.is_backlogged = False
+
+        # While the session's websocket is disconnected, the timeout that
+        # will close the session if no browser resumes it.
+        self.expire_timeout = None  # type: Optional[Any]
+
+        # The elements the browser shows, so we don't send them again.
+        self.sent_elements = (
+            SentElements()
+            if config.get_option("server.skipUnchangedElements")
+            else None
+        )  # type: Optional[SentElements]
+
+    def on_frame_written(self, num_bytes):
+        """Called when a websocket frame has been flushed to the network."""
+        self.buffered_bytes -= num_bytes
+
+    def update_backlog_state(self):
+        """Update and return the is_backlogged flag.
+
+        A session is backlogged while its websocket has more buffered bytes
+        than server.maxWebsocketBufferSize allows.
+
+        Returns
+        -------
+        bool
+            True if the session just became backlogged.
+
+        """
+        max_buffered_bytes = (
+            config.get_option("server.maxWebsocketBufferSize") * 1024 * 1024
+        )
+        was_backlogged = self.is_backlogged
+        self.is_backlogged = self.buffered_bytes > max_buffered_bytes
+        return self.is_backlogged and not was_backlogged
+
 
 class State(Enum):
     INITIAL = "INITIAL"
@@ -156,6 +239,42 @@ def start_listening_unix_socket(http_server):
 
 
 def start_listening_tcp_socket(http_server):
+    if workers.get_worker_index() is None:
+        _listen_on_available_port(http_server.listen)
+        return
+
+    # Every worker binds the same public port, and the kernel balances
+    # connections between them. The port was already picked by
+    # find_port_for_workers, before the workers were forked.
+    def bind_shared_port(port, address):
+        http_server.add_sockets(
+            tornado.netutil.bind_sockets(port, address, reuse_port=True)
+        )
+
+    _listen_on_available_port(bind_shared_port)
+    http_server.add_socket(workers.get_worker_socket())
+
+
+def find_port_for_workers():
+    """Pick the port that all worker processes will share.
+
+    This must be called before the workers are forked, so that they don't
+    each go looking for a free port on their own.
+    """
+
+    def check_port(port, address):
+        for sock in tornado.netutil.bind_sockets(port, address, reuse_port=True):
+            sock.close()
+
+    _listen_on_available_port(check_port)
+
+
+def _listen_on_available_port(listen):
+    """Call listen(port, address) with the configured port.
+
+    In case the port is already taken, tries the next available port and
+    updates server.port to match.
+    """
     call_count = 0
 
     while call_count < MAX_PORT_SEARCH_RETRIES:
@@ -163,7 +282,7 @@ def start_listening_tcp_socket(http_server):
         port = config.get_option("server.port")
 
         try:
-            http_server.listen(port, address)
+            listen(port, address)
             break  # It worked! So let's break out of the loop.
 
         except (OSError, socket.error) as e:
@@ -239,7 +358,15 @@ class Server(object):
         self._uploaded_file_mgr = UploadedFileManager()
         self._uploaded_file_mgr.on_files_updated.connect(self.on_files_updated)
         self._report = None  # type: Optional[Report]
-        self._preheated_session_id = None  # type: Optional[str]
+
+        # IDs of preheated sessions that no browser has claimed yet, oldest
+        # first.
+        self._preheated_session_ids = collections.deque()  # type: Deque[str]
+        self._is_refilling_preheated_sessions = False
+
+        # Mapping of resume token -> ReportSession.id, for sessions whose
+        # websocket disconnected and that a browser may resume.
+        self._detached_session_ids = {}  # type: Dict[str, str]
 
     @property
     def script_path(self) -> str:
@@ -304,10 +431,18 @@ class Server(object):
 
         self._ioloop.spawn_callback(self._loop_coroutine, on_started)
 
-    def get_debug(self) -> Dict[str, Dict[str, Any]]:
+    def get_debug(self) -> Dict[str, Any]:
+        debug = {}  # type: Dict[str, Any]
         if self._report:
-            return {"report": self._report.get_debug()}
-        return {}
+            debug["report"] = self._report.get_debug()
+        debug["sessions"] = {
+            session_id: session_info.session.get_debug()
+            for session_id, session_info in self._session_info_by_id.items()
+        }
+        profiles = script_profiler.get_profiles()
+        if profiles:
+            debug["profiles"] = [profile.get_summary() for profile in profiles]
+        return debug
 
     def _create_app(self):
         """Create our tornado web app.
@@ -431,13 +566,49 @@ class Server(object):
                         if session_info.ws is None:
                             # Preheated.
                             continue
-                        msg_list = session_info.session.flush_browser_queue()
-                        for msg in msg_list:
+                        if session_info.update_backlog_state():
+                            LOGGER.debug(
+                                "Websocket is falling behind. Session ID: %s",
+                                session_info.session.id,
+                            )
+                            metrics.Client.get("streamlit_slow_consumer_total").inc()
+                        if session_info.is_backlogged:
+                            # Wait for the browser to catch up. Until then,
+                            # new messages stay in the browser queue, where
+                            # deltas to the same element are combined.
+                            continue
+                        if session_info.pending_frames:
+                            # Finish sending the chunks of a large message
+                            # before sending anything newer.
                             try:
-                                self._send_message(session_info, msg)
+                                self._write_pending_frame(session_info)
                             except tornado.websocket.WebSocketClosedError:
-                                self._close_report_session(session_info.session.id)
+                                self._on_websocket_closed(
+                                    session_info.session.id, session_info.ws
+                                )
                             yield
+                            continue
+                        if (
+                            session_info.preparing_msg is not None
+                            and not session_info.preparing_msg.done()
+                        ):
+                            # Still serializing a large message. Its
+                            # session's later messages have to wait for it.
+                            continue
+                        if not session_info.unsent_msgs:
+                            msgs = session_info.session.flush_browser_queue()
+                            if not msgs:
+                                continue
+                            metrics.Client.get(
+                                "streamlit_browser_queue_messages"
+                            ).observe(len(msgs))
+                            session_info.unsent_msgs.extend(msgs)
+                        try:
+                            yield self._send_unsent_messages(session_info)
+                        except tornado.websocket.WebSocketClosedError:
+                            self._on_websocket_closed(
+                                session_info.session.id, session_info.ws
+                            )
                         yield
 
                 elif self._state == State.NO_BROWSERS_CONNECTED:
@@ -447,7 +618,11 @@ class Server(object):
                     # Break out of the thread loop if we encounter any other state.
                     break
 
-                yield tornado.gen.sleep(0.01)
+                sleep_start = time.time()
+                yield tornado.gen.sleep(LOOP_INTERVAL_SECS)
+                metrics.Client.get("streamlit_server_loop_lag_seconds").observe(
+                    max(0, time.time() - sleep_start - LOOP_INTERVAL_SECS)
+                )
 
             # Shut down all ReportSessions
             for session_info in list(self._session_info_by_id.values()):
@@ -469,7 +644,48 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
         finally:
             self._on_stopped()
 
-    def _send_message(self, session_info, msg):
+    @tornado.gen.coroutine
+    def _send_unsent_messages(self, session_info):
+        """Send a session's unsent messages, in order.
+
+        If a large message comes up, start preparing it in the serialization
+        thread pool and stop. The server loop comes back for it once it's
+        ready.
+        """
+        while session_info.unsent_msgs:
+            msg = session_info.unsent_msgs[0]
+            msg_size = None
+            frames = None
+
+            if session_info.preparing_msg is not None:
+                # This message was prepared in the thread pool. We send the
+                # prepared copy.
+                future = session_info.preparing_msg
+                session_info.preparing_msg = None
+                msg, frames = future.result()
+
+            else:
+                msg_size = msg.ByteSize()
+                if should_offload_msg(msg_size):
+                    metrics.Client.get("streamlit_offloaded_messages_total").inc()
+                    session_info.preparing_msg = self._ioloop.run_in_executor(
+                        _serialization_executor, prepare_forward_msg, msg, msg_size
+                    )
+                    return
+
+            session_info.unsent_msgs.popleft()
+            session_info.unsent_batch_bytes += self._send_message(
+                session_info, msg, frames, msg_size
+            )
+            yield
+
+        metrics.Client.get("streamlit_browser_queue_bytes").observe(
+            session_info.unsent_batch_bytes
+        )
+        session_info.unsent_batch_bytes = 0
+
+    @tracing.traced("Server._send_message")
+    def _send_message(self, session_info, msg, frames=None, msg_size=None):
         """Send a message to a client.
 
         If the client is likely to have already cached the message, we may
@@ -482,11 +698,29 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
             The SessionInfo associated with websocket
         msg : ForwardMsg
             The message to send to the client
+        frames : list[str] or None
+            The message's serialized frames, if it's a copy that was
+            prepared with prepare_forward_msg.
+        msg_size : int or None
+            msg.ByteSize(), if the caller has computed it already.
+
+        Returns
+        -------
+        int
+            The number of bytes queued for the websocket.
 
         """
-        msg.metadata.cacheable = is_cacheable_msg(msg)
+        if frames is None:
+            msg.metadata.cacheable = is_cacheable_msg(msg, msg_size)
         msg_to_send = msg
-        if msg.metadata.cacheable:
+        if session_info.sent_elements is not None:
+            # If the browser already has this element, only tell it to keep
+            # it.
+            msg_to_send = session_info.sent_elements.process(msg)
+
+        # An element_unchanged marker doesn't send the message, so it
+        # mustn't refresh the message's age in the cache.
+        if msg.metadata.cacheable and msg_to_send is msg:
             populate_hash_if_needed(msg)
 
             if self._message_cache.has_message_reference(
@@ -523,8 +757,56 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
                 session_info.session, session_info.report_run_count
             )
 
-        # Ship it off!
-        session_info.ws.write_message(serialize_forward_msg(msg_to_send), binary=True)
+        # Ship it off! If the message had to be split into chunks, or if we're
+        # still sending the chunks of an earlier message, the remaining frames
+        # are written by the server loop.
+        if frames is None or msg_to_send is not msg:
+            frames = serialize_forward_msg_chunks(msg_to_send)
+
+        num_bytes = sum(len(frame) for frame in frames)
+        metrics.Client.get("streamlit_forward_msg_bytes").labels(
+            msg_to_send.WhichOneof("type")
+        ).observe(num_bytes)
+
+        is_sending_chunks = len(session_info.pending_frames) > 0
+        session_info.pending_frames.extend(frames)
+        if not is_sending_chunks:
+            self._write_pending_frame(session_info)
+
+        return num_bytes
+
+    @tracing.traced("Server._write_pending_frame")
+    def _write_pending_frame(self, session_info):
+        """Write the next pending frame to a session's websocket.
+
+        Parameters
+        ----------
+        session_info : SessionInfo
+            The SessionInfo associated with websocket
+
+        """
+        frame = session_info.pending_frames.popleft()
+        start_time = time.time()
+        future = _write_frame(session_info.ws, frame)
+        session_info.buffered_bytes += len(frame)
+
+        def on_done(future):
+            session_info.on_frame_written(len(frame))
+
+            # Retrieve the write's error, so it isn't logged as never
+            # retrieved. A closed websocket is handled by on_close, and a
+            # write that didn't finish has no send duration to record.
+            error = future.exception()
+            if error is not None:
+                if not isinstance(error, tornado.websocket.WebSocketClosedError):
+                    LOGGER.warning("Failed to write websocket frame: %s", error)
+                return
+
+            metrics.Client.get("streamlit_websocket_send_seconds").observe(
+                time.time() - start_time
+            )
+
+        future.add_done_callback(on_done)
 
     def stop(self):
         click.secho("  Stopping...", fg="blue")
@@ -544,12 +826,60 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
         """Register a fake browser with the server and run the script.
 
         This is used to start running the user's script even before the first
-        browser connects.
+        browser connects. If server.preheatedSessions is set, this instead
+        starts filling a pool of that many preheated sessions, which is
+        refilled whenever a browser claims one.
         """
+        if config.get_option("server.preheatedSessions") > 0:
+            self._ioloop.spawn_callback(self._refill_preheated_sessions)
+            return
+
         session = self._create_or_reuse_report_session(ws=None)
         session.handle_rerun_script_request(is_preheat=True)
 
-    def _create_or_reuse_report_session(self, ws):
+    @tornado.gen.coroutine
+    def _refill_preheated_sessions(self):
+        """Preheat sessions until there are server.preheatedSessions of them.
+
+        Sessions are preheated one at a time, and we pause between them so
+        that, on average, preheating uses at most server.preheatCpuShare of
+        a CPU. Only one refill runs at a time.
+        """
+        if self._is_refilling_preheated_sessions:
+            return
+        self._is_refilling_preheated_sessions = True
+
+        try:
+            while not self._must_stop.is_set():
+                pool_size = config.get_option("server.preheatedSessions")
+                if len(self._preheated_session_ids) >= pool_size:
+                    break
+
+                run_finished = tornado.concurrent.Future()  # type: ignore[var-annotated]
+
+                def set_run_finished():
+                    if not run_finished.done():
+                        run_finished.set_result(None)
+
+                def on_script_finished(_):
+                    # Called on the ScriptRunner's thread.
+                    self._ioloop.add_callback(set_run_finished)
+
+                start_time = time.time()
+                session = self._create_or_reuse_report_session(ws=None)
+                session.on_script_finished.connect(on_script_finished, weak=False)
+                session.handle_rerun_script_request(is_preheat=True)
+                yield run_finished
+                session.on_script_finished.disconnect(on_script_finished)
+
+                run_duration = time.time() - start_time
+                cpu_share = max(config.get_option("server.preheatCpuShare"), 0.01)
+                if cpu_share < 1:
+                    yield tornado.gen.sleep(run_duration * (1 / cpu_share - 1))
+        finally:
+            self._is_refilling_preheated_sessions = False
+
+    def _create_or_reuse_report_session(self, ws, resume_token=None):
         """Register a connected browser with the server.
 
         Parameters
@@ -557,19 +887,24 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
         ws : _BrowserWebSocketHandler or None
             The newly-connected websocket handler or None if preheated
             connection.
+        resume_token : str or None
+            The resume token of the session the browser was connected to
+            before, if any.
 
         Returns
         -------
         ReportSession
-            The newly-created ReportSession for this browser connection.
+            The newly-created ReportSession for this browser connection, or
+            the resumed one.
 
         """
-        if self._preheated_session_id is not None:
-            assert len(self._session_info_by_id) == 1
-            assert ws is not None
+        if ws is not None and resume_token:
+            session = self._resume_report_session(ws, resume_token)
+            if session is not None:
+                return session
 
-            session_id = self._preheated_session_id
-            self._preheated_session_id = None
+        if ws is not None and self._preheated_session_ids:
+            session_id = self._preheated_session_ids.popleft()
 
             session_info = self._session_info_by_id[session_id]
             session_info.ws = ws
@@ -579,6 +914,9 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
                 "Reused preheated session for ws %s. Session ID: %s", id(ws), session_id
             )
 
+            if config.get_option("server.preheatedSessions") > 0:
+                self._ioloop.spawn_callback(self._refill_preheated_sessions)
+
         else:
             session = ReportSession(
                 ioloop=self._ioloop,
@@ -598,12 +936,106 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
         self._session_info_by_id[session.id] = SessionInfo(ws, session)
 
         if ws is None:
-            self._preheated_session_id = session.id
+            self._preheated_session_ids.append(session.id)
         else:
             self._set_state(State.ONE_OR_MORE_BROWSERS_CONNECTED)
+        self._update_session_metrics()
+
+        return session
+
+    def _resume_report_session(self, ws, resume_token):
+        """Reattach a disconnected session to a browser's new websocket.
+
+        Returns
+        -------
+        ReportSession or None
+            The resumed session, or None if no disconnected session has the
+            given resume token.
 
+        """
+        session_id = self._detached_session_ids.pop(resume_token, None)
+        if session_id is None:
+            return None
+
+        old_session_info = self._session_info_by_id[session_id]
+        if old_session_info.expire_timeout is not None:
+            self._ioloop.remove_timeout(old_session_info.expire_timeout)
+
+        # Start over with a clean send state, since anything that was on its
+        # way to the old websocket is lost. The whole report is resent
+        # instead.
+        session = old_session_info.session
+        session_info = SessionInfo(ws, session)
+        session_info.report_run_count = old_session_info.report_run_count
+        self._session_info_by_id[session_id] = session_info
+        session.resume()
+
+        LOGGER.debug("Resumed session for ws %s. Session ID: %s", id(ws), session_id)
+
+        self._set_state(State.ONE_OR_MORE_BROWSERS_CONNECTED)
+        self._update_session_metrics()
         return session
 
+    def _on_resend_elements_request(self, session_id):
+        """Forget the elements we've sent to a session's browser, so we send
+        each one in full again.
+
+        The browser asks for this when it doesn't have an element that we
+        told it to keep, i.e. when its elements and our record of them have
+        drifted apart.
+        """
+        session_info = self._get_session_info(session_id)
+        if session_info is None or session_info.sent_elements is None:
+            return
+        LOGGER.warning("Browser is missing elements. Session ID: %s", session_id)
+        session_info.sent_elements.clear()
+
+    def _on_websocket_closed(self, session_id, ws):
+        """Detach a session from its closed websocket, or close the session.
+
+        If server.disconnectedSessionTTL is set, the session is kept that
+        long, so the browser can resume it when it reconnects.
+
+        Parameters
+        ----------
+        session_id : str
+            The ReportSession's id string.
+        ws : _BrowserWebSocketHandler
+            The websocket that closed.
+
+        """
+        session_info = self._get_session_info(session_id)
+        if session_info is None or session_info.ws is not ws:
+            # The session is already closed, or was resumed on a new
+            # websocket.
+            return
+
+        ttl = config.get_option("server.disconnectedSessionTTL")
+        if ttl <= 0:
+            self._close_report_session(session_id)
+            return
+
+        LOGGER.debug("Detached session. Session ID: %s", session_id)
+        session_info.ws = None
+        session_info.expire_timeout = self._ioloop.call_later(
+            ttl, self._close_report_session, session_id
+        )
+        self._detached_session_ids[session_info.session.resume_token] = session_id
+        self._update_session_metrics()
+
+        if all(info.ws is None for info in self._session_info_by_id.values()):
+            self._set_state(State.NO_BROWSERS_CONNECTED)
+
+    def _update_session_metrics(self):
+        """Count the sessions that have a browser connected, and the
+        preheated sessions waiting for one."""
+        metrics.Client.get("streamlit_sessions").set(
+            sum(1 for info in self._session_info_by_id.values() if info.ws is not None)
+        )
+        metrics.Client.get("streamlit_preheated_sessions").set(
+            len(self._preheated_session_ids)
+        )
+
     def _close_report_session(self, session_id):
         """Shutdown and remove a ReportSession.
 
@@ -618,9 +1050,16 @@ Please report this bug at https://github.com/streamlit/streamlit/issues.
         if session_id in self._session_info_by_id:
             session_info = self._session_info_by_id[session_id]
             del self._session_info_by_id[session_id]
+            if session_id in self._preheated_session_ids:
+                self._preheated_session_ids.remove(session_id)
+            self._update_session_metrics()
+            if session_info.expire_timeout is not None:
+                # The session was detached.
+                self._ioloop.remove_timeout(session_info.expire_timeout)
+                del self._detached_session_ids[session_info.session.resume_token]
             session_info.session.shutdown()
 
-        if len(self._session_info_by_id) == 0:
+        if all(info.ws is None for info in self._session_info_by_id.values()):
             self._set_state(State.NO_BROWSERS_CONNECTED)
 
 
@@ -630,6 +1069,7 @@ class _BrowserWebSocketHandler(tornado.websocket.WebSocketHandler):
     def initialize(self, server):
         self._server = server
         self._session = None
+        self._resume_token = None
         # The XSRF cookie is normally set when xsrf_form_html is used, but in a pure-Javascript application
         # that does not use any regular forms we just need to read the self.xsrf_token manually to set the
         # cookie as a side effect.
@@ -642,13 +1082,32 @@ class _BrowserWebSocketHandler(tornado.websocket.WebSocketHandler):
         """Set up CORS."""
         return super().check_origin(origin) or is_url_from_allowed_origins(origin)
 
+    def select_subprotocol(self, subprotocols):
+        """Pick up the resume token of a browser that's reconnecting.
+
+        The browser sends it as a subprotocol rather than in the URL, so that
+        it doesn't end up in access logs. (See _RESUME_TOKEN_SUBPROTOCOL_PREFIX.)
+        """
+        prefix = _RESUME_TOKEN_SUBPROTOCOL_PREFIX
+        self._resume_token = None
+        for subprotocol in subprotocols:
+            if subprotocol.startswith(prefix):
+                self._resume_token = subprotocol[len(prefix) :]
+        # Browsers drop the connection unless we pick one of the
+        # subprotocols they offered.
+        if _STREAMLIT_SUBPROTOCOL in subprotocols:
+            return _STREAMLIT_SUBPROTOCOL
+        return None
+
     def open(self):
-        self._session = self._server._create_or_reuse_report_session(self)
+        self._session = self._server._create_or_reuse_report_session(
+            self, self._resume_token
+        )
 
     def on_close(self):
         if not self._session:
             return
-        self._server._close_report_session(self._session.id)
+        self._server._on_websocket_closed(self._session.id, self)
         self._session = None
 
     def get_compression_options(self):
@@ -660,7 +1119,12 @@ class _BrowserWebSocketHandler(tornado.websocket.WebSocketHandler):
         (See the docstring in the parent class.)
         """
         if config.get_option("server.enableWebsocketCompression"):
-            return {}
+            return {
+                "compression_level": config.get_option(
+                    "server.websocketCompressionLevel"
+                ),
+                "mem_level": config.get_option("server.websocketCompressionMemLevel"),
+            }
         return None
 
     @tornado.gen.coroutine
@@ -686,6 +1150,8 @@ class _BrowserWebSocketHandler(tornado.websocket.WebSocketHandler):
                 self._session.handle_set_run_on_save_request(msg.set_run_on_save)
             elif msg_type == "stop_report":
                 self._session.handle_stop_script_request()
+            elif msg_type == "resend_elements":
+                self._server._on_resend_elements_request(self._session.id)
             elif msg_type == "close_connection":
                 if config.get_option("global.developmentMode"):
                     Server.get_current().stop()
@@ -702,6 +1168,72 @@ class _BrowserWebSocketHandler(tornado.websocket.WebSocketHandler):
             self._session.enqueue_exception(e)
 
 
+# The Tornado versions, from (inclusive) and to (exclusive), whose
+# WebSocketProtocol13.write_message compresses with self._compressor when
+# it's set. server_test checks that the installed version still does.
+_TORNADO_VERSIONS_WITH_COMPRESSOR = ((5, 0), (7, 0))
+
+
+def _get_compressing_connection(ws):
+    """Return a websocket's connection if it compresses the messages written
+    to it, and we know how to write a message without compressing it.
+
+    permessage-deflate lets the sender choose whether to compress each
+    message, but Tornado has no API for it: once the extension is negotiated,
+    WebSocketProtocol13.write_message compresses every message with the
+    connection's _compressor. So we only make the choice ourselves for that
+    class, in the Tornado versions we've checked (see
+    _TORNADO_VERSIONS_WITH_COMPRESSOR), when it has that attribute. For any
+    other connection, we return None, and all messages are compressed as
+    negotiated.
+    """
+    if not (
+        _TORNADO_VERSIONS_WITH_COMPRESSOR[0]
+        <= tornado.version_info[:2]
+        < _TORNADO_VERSIONS_WITH_COMPRESSOR[1]
+    ):
+        return None
+    ws_connection = getattr(ws, "ws_connection", None)
+    if not isinstance(ws_connection, tornado.websocket.WebSocketProtocol13):
+        return None
+    if getattr(ws_connection, "_compressor", None) is None:
+        return None
+    return ws_connection
+
+
+def _write_frame(ws, frame):
+    """Write a serialized ForwardMsg to a websocket, compressing it only if
+    it's worth it.
+
+    (See _get_compressing_connection for how.)
+
+    Returns
+    -------
+    Future
+        The future returned by write_message.
+
+    """
+    ws_connection = _get_compressing_connection(ws)
+    if ws_connection is None:
+        return ws.write_message(frame, binary=True)
+
+    decision = should_compress_frame(frame)
+    metrics.Client.get("streamlit_websocket_compression_total").labels(decision).inc()
+    if decision == "compressed":
+        return ws.write_message(frame, binary=True)
+
+    # Hide the compressor while this message is written. Its deflate context
+    # isn't touched, so the messages we do compress are unaffected. No other
+    # write can see it hidden: write_message compresses the message before
+    # it returns, and all writes happen on the IOLoop thread.
+    compressor = ws_connection._compressor
+    ws_connection._compressor = None
+    try:
+        return ws.write_message(frame, binary=True)
+    finally:
+        ws_connection._compressor = compressor
+
+
 def _set_tornado_log_levels():
     if not config.get_option("global.developmentMode"):
         # Hide logs unless they're super important.
@@ -14,6 +14,7 @@
 
 """Server related utility functions"""
 
+import zlib
 from typing import Callable, List, Optional, Union
 
 from streamlit import config
@@ -21,19 +22,21 @@ from streamlit import net_util
 from streamlit import type_util
 from streamlit import url_util
 from streamlit.forward_msg_cache import populate_hash_if_needed
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 
-# Largest message that can be sent via the WebSocket connection.
+# Largest message the server will accept from a client.
 # (Limit was picked arbitrarily)
-# TODO: Break message in several chunks if too large.
 MESSAGE_SIZE_LIMIT = 50 * 1e6  # 50MB
 
 
-def is_cacheable_msg(msg):
+def is_cacheable_msg(msg, msg_size=None):
     """True if the given message qualifies for caching.
 
     Parameters
     ----------
     msg : ForwardMsg
+    msg_size : int or None
+        msg.ByteSize(), if the caller has computed it already.
 
     Returns
     -------
@@ -44,15 +47,14 @@ def is_cacheable_msg(msg):
     if msg.WhichOneof("type") in {"ref_hash", "initialize"}:
         # Some message types never get cached
         return False
-    return msg.ByteSize() >= config.get_option("global.minCachedMessageSize")
+    if msg_size is None:
+        msg_size = msg.ByteSize()
+    return msg_size >= config.get_option("global.minCachedMessageSize")
 
 
 def serialize_forward_msg(msg):
     """Serialize a ForwardMsg to send to a client.
 
-    If the message is too large, it will be converted to an exception message
-    instead.
-
     Parameters
     ----------
     msg : ForwardMsg
@@ -65,20 +67,113 @@ def serialize_forward_msg(msg):
 
     """
     populate_hash_if_needed(msg)
-    msg_str = msg.SerializeToString()
+    return msg.SerializeToString()
+
+
+def serialize_forward_msg_chunks(msg):
+    """Serialize a ForwardMsg into one or more websocket frames.
+
+    If the serialized message is larger than `global.messageChunkSize`, it
+    is split into a sequence of ForwardMsgChunk messages. The client
+    reassembles these into the original message.
+
+    Parameters
+    ----------
+    msg : ForwardMsg
+        The message to serialize
+
+    Returns
+    -------
+    list[str]
+        The serialized byte strings to send, in order.
+
+    """
+    msg_str = serialize_forward_msg(msg)
+    chunk_size = config.get_option("global.messageChunkSize")
+    if len(msg_str) <= chunk_size:
+        return [msg_str]
+
+    count = (len(msg_str) + chunk_size - 1) // chunk_size
+    frames = []
+    for index in range(count):
+        chunk_msg = ForwardMsg()
+        chunk_msg.chunk.msg_hash = msg.hash
+        chunk_msg.chunk.index = index
+        chunk_msg.chunk.count = count
+        chunk_msg.chunk.data = msg_str[index * chunk_size : (index + 1) * chunk_size]
+        frames.append(chunk_msg.SerializeToString())
+
+    return frames
+
 
-    if len(msg_str) > MESSAGE_SIZE_LIMIT:
-        import streamlit.elements.exception_proto as exception_proto
+def prepare_forward_msg(msg, msg_size):
+    """Copy a ForwardMsg, fill in the copy's metadata and hash, and
+    serialize the copy into websocket frames.
+
+    The given message isn't modified, so this is safe to call off the
+    IOLoop thread while other threads read the message. (The script thread
+    may still be reading it in the report's master queue.)
+
+    Parameters
+    ----------
+    msg : ForwardMsg
+        The message to prepare
+    msg_size : int
+        msg.ByteSize()
+
+    Returns
+    -------
+    tuple[ForwardMsg, list[str]]
+        The prepared copy of the message, and the serialized byte strings
+        to send, in order. See serialize_forward_msg_chunks.
+
+    """
+    prepared_msg = ForwardMsg()
+    prepared_msg.CopyFrom(msg)
+    prepared_msg.metadata.cacheable = is_cacheable_msg(msg, msg_size)
+    return prepared_msg, serialize_forward_msg_chunks(prepared_msg)
+
+
+def should_offload_msg(msg_size):
+    """True if a message of the given size (its ByteSize()) is large enough
+    that it should be prepared in a thread pool, rather than on the IOLoop
+    thread."""
+    return msg_size >= config.get_option("global.minOffloadedMessageSize")
+
+
+# How much of a websocket frame we compress to guess whether the whole frame
+# is worth compressing, and how small that sample has to get.
+COMPRESSIBILITY_SAMPLE_SIZE = 4096
+MIN_COMPRESSIBILITY_RATIO = 0.9
+
+
+def should_compress_frame(frame):
+    """Decide whether a websocket frame is worth compressing.
+
+    Tiny frames aren't, and neither are frames that hold data that's already
+    compressed, like images. We find those by compressing a sample of the
+    frame, which is much cheaper than compressing all of it.
+
+    Parameters
+    ----------
+    frame : bytes
+        A serialized ForwardMsg or ForwardMsg chunk.
+
+    Returns
+    -------
+    str
+        "compressed" if the frame should be compressed, or the reason it
+        shouldn't be: "too_small" or "incompressible".
+
+    """
+    if len(frame) < config.get_option("server.websocketCompressionMinSize"):
+        return "too_small"
 
-        error = RuntimeError(
-            f"Data of size {len(msg_str)/1e6:.1f}MB exceeds write limit of {MESSAGE_SIZE_LIMIT/1e6}MB"
-        )
-        # Overwrite the offending ForwardMsg.delta with an error to display.
-        # This assumes that the size limit wasn't exceeded due to metadata.
-        exception_proto.marshall(msg.delta.new_element.exception, error)
-        msg_str = msg.SerializeToString()
+    sample = frame[:COMPRESSIBILITY_SAMPLE_SIZE]
+    if len(zlib.compress(sample, 1)) > len(sample) * MIN_COMPRESSIBILITY_RATIO:
+        return "incompressible"
 
-    return msg_str
+    return "compressed"
 
 
 def is_url_from_allowed_origins(url):
@@ -0,0 +1,268 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Precompressed variants of our static files.
+
+The frontend's JS and CSS bundles are large, and compressing them for every
+new visitor is a waste of CPU. Instead, we serve compressed copies:
+
+- `make frontend` writes "<file>.br" and "<file>.gz" next to each compressible
+  file in the static directory (see precompress_directory).
+- If those don't exist, or are older than the file, the first request gets
+  the uncompressed file, while a compressed copy is made in a background
+  thread and kept in ~/.streamlit/static_cache. That copy is made with a
+  faster, lower compression level than the build-time ones, and the cache is
+  pruned of its oldest copies once it grows past MAX_CACHE_SIZE.
+
+Brotli is only used if the brotli package is installed.
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
+
+from streamlit import file_util
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Files with these extensions are worth compressing. Images and fonts are
+# already compressed.
+COMPRESSIBLE_EXTENSIONS = frozenset(
+    [".css", ".html", ".js", ".json", ".map", ".svg", ".txt"]
+)
+
+# Files smaller than this aren't worth compressing.
+MIN_COMPRESSIBLE_SIZE = 1024
+
+# Content-Encoding -> file extension of the compressed copy, in order of
+# preference.
+_EXTENSIONS_BY_ENCODING = {"br": ".br", "gzip": ".gz"}
+
+# Build-time copies are made once, so they use the best compression. Copies
+# made while the server is running use faster settings.
+_BUILD_LEVELS = {"br": 11, "gzip": 9}
+_RUNTIME_LEVELS = {"br": 5, "gzip": 6}
+
+# Once the copies in ~/.streamlit/static_cache take up more than this many
+# bytes, the oldest ones are deleted.
+MAX_CACHE_SIZE = 64 * 1024 * 1024  # 64MB
+
+# Copies in the cache are made one at a time, in this thread. The paths of
+# the copies being made are in _pending_cache_paths, so a file that's
+# requested again before its copy is done isn't compressed twice.
+_cache_executor = ThreadPoolExecutor(max_workers=1)
+_pending_cache_paths = set()  # type: Set[str]
+_pending_cache_paths_lock = threading.Lock()
+
+
+def get_supported_encodings() -> List[str]:
+    """Return the encodings we can serve, in order of preference."""
+    if brotli is None:
+        return ["gzip"]
+    return ["br", "gzip"]
+
+
+def is_compressible(path, size) -> bool:
+    _, ext = os.path.splitext(path)
+    return ext.lower() in COMPRESSIBLE_EXTENSIONS and size >= MIN_COMPRESSIBLE_SIZE
+
+
+def parse_accept_encoding(header) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into a dict of encoding -> q value."""
+    encodings = {}  # type: Dict[str, float]
+    for item in header.split(","):
+        parts = item.strip().split(";")
+        encoding = parts[0].strip().lower()
+        if not encoding:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        encodings[encoding] = q
+    return encodings
+
+
+def choose_encoding(accept_encoding) -> Optional[str]:
+    """Return the best encoding for a request, or None to send the file as is.
+
+    Parameters
+    ----------
+    accept_encoding : str or None
+        The request's Accept-Encoding header.
+
+    """
+    if not accept_encoding:
+        return None
+    accepted = parse_accept_encoding(accept_encoding)
+    for encoding in get_supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def get_compressed_path(path, encoding) -> Optional[str]:
+    """Return the path of a compressed copy of a file, if there is one.
+
+    If there's no copy yet, one is made in a background thread, and None is
+    returned, so that this request gets the uncompressed file.
+
+    Parameters
+    ----------
+    path : str
+        The absolute path of the file.
+    encoding : str
+        "br" or "gzip".
+
+    Returns
+    -------
+    str or None
+        The path of the compressed copy, or None if the file isn't worth
+        compressing or its copy isn't ready.
+
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    if not is_compressible(path, stat.st_size):
+        return None
+
+    ext = _EXTENSIONS_BY_ENCODING[encoding]
+
+    # Copies made at build time sit next to the file.
+    sibling_path = path + ext  # type: str
+    try:
+        if os.stat(sibling_path).st_mtime >= stat.st_mtime:
+            return sibling_path
+    except OSError:
+        pass
+
+    # Otherwise, use a copy in our cache. Its name includes the file's mtime
+    # and size, so a changed file gets a new copy.
+    key = "%s:%s:%s" % (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    cache_path = file_util.get_streamlit_file_path(
+        "static_cache", hashlib.sha1(key.encode("utf-8")).hexdigest() + ext
+    )  # type: str
+    if os.path.exists(cache_path):
+        return cache_path
+
+    with _pending_cache_paths_lock:
+        if cache_path not in _pending_cache_paths:
+            _pending_cache_paths.add(cache_path)
+            _cache_executor.submit(_make_cache_copy, path, cache_path, encoding)
+    return None
+
+
+def precompress_directory(directory) -> int:
+    """Write compressed copies of the compressible files in a directory.
+
+    Parameters
+    ----------
+    directory : str
+        The directory to walk.
+
+    Returns
+    -------
+    int
+        The number of compressed copies written.
+
+    """
+    num_written = 0
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if not is_compressible(path, os.path.getsize(path)):
+                continue
+            for encoding in get_supported_encodings():
+                _compress_file(
+                    path,
+                    path + _EXTENSIONS_BY_ENCODING[encoding],
+                    encoding,
+                    _BUILD_LEVELS[encoding],
+                )
+                num_written += 1
+    return num_written
+
+
+def _make_cache_copy(path, cache_path, encoding):
+    try:
+        _compress_file(path, cache_path, encoding, _RUNTIME_LEVELS[encoding])
+        _prune_cache(os.path.dirname(cache_path), MAX_CACHE_SIZE)
+    except Exception as e:
+        LOGGER.warning("Unable to compress %s: %s", path, e)
+    finally:
+        with _pending_cache_paths_lock:
+            _pending_cache_paths.discard(cache_path)
+
+
+def _prune_cache(directory, max_size):
+    """Delete the oldest files in a directory until it holds max_size bytes."""
+    entries = []
+    total_size = 0
+    for entry in os.scandir(directory):
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total_size += stat.st_size
+
+    entries.sort()
+    for _, size, entry_path in entries:
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(entry_path)
+        except OSError:
+            continue
+        total_size -= size
+
+
+def _compress_file(path, compressed_path, encoding, level):
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if encoding == "br":
+        compressed = brotli.compress(data, quality=level)
+    else:
+        compressed = gzip.compress(data, compresslevel=level)
+
+    # Write to a temporary file first, so that concurrent requests never see
+    # a partly written copy.
+    directory = os.path.dirname(compressed_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(compressed)
+        os.replace(temp_path, compressed_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
@@ -14,6 +14,7 @@
 
 from typing import Any, Callable, Dict, List
 
+import tornado.gen
 import tornado.httputil
 import tornado.web
 
@@ -22,6 +23,7 @@ from streamlit import config
 from streamlit.logger import get_logger
 from streamlit.report import Report
 from streamlit.server import routes
+from streamlit.server import workers
 
 
 # /upload_file/(optional session id)/(optional widget id)/(optional file_id of digits)
@@ -53,6 +55,17 @@ class UploadFileRequestHandler(tornado.web.RequestHandler):
     def _validate_request(self, session_id: str):
         return self._get_session_info(session_id) is not None
 
+    @tornado.gen.coroutine
+    def _maybe_forward(self, session_id: str):
+        """Forward the request to the worker process that owns the session,
+        if that isn't this one. Return True if the request was forwarded.
+        """
+        owner = workers.get_session_owner(session_id)
+        if owner is None or not workers.can_forward(self.request):
+            return False
+        forwarded = yield workers.forward_request(self, [owner])
+        return forwarded
+
     def set_default_headers(self):
         self.set_header("Access-Control-Allow-Methods", "POST, PUT, DELETE")
         self.set_header("Access-Control-Allow-Headers", "Content-Type")
@@ -106,6 +119,7 @@ class UploadFileRequestHandler(tornado.web.RequestHandler):
         # Convert bytes to string
         return arg[0].decode("utf-8")
 
+    @tornado.gen.coroutine
     def post(self, **kwargs):
         args: Dict[str, List[bytes]] = {}
         files: Dict[str, List[Any]] = {}
@@ -120,13 +134,18 @@ class UploadFileRequestHandler(tornado.web.RequestHandler):
         try:
             session_id = self._require_arg(args, "sessionId")
             widget_id = self._require_arg(args, "widgetId")
-            if not self._validate_request(session_id):
-                raise Exception("Session '%s' invalid" % session_id)
-
         except Exception as e:
             self.send_error(400, reason=str(e))
             return
 
+        forwarded = yield self._maybe_forward(session_id)
+        if forwarded:
+            return
+
+        if not self._validate_request(session_id):
+            self.send_error(400, reason="Session '%s' invalid" % session_id)
+            return
+
         LOGGER.debug(
             f"{len(files)} file(s) received for session {session_id} widget {widget_id}"
         )
@@ -166,7 +185,12 @@ class UploadFileRequestHandler(tornado.web.RequestHandler):
 
         self.set_status(200)
 
+    @tornado.gen.coroutine
     def put(self, session_id: str, widget_id: str, **kwargs):
+        forwarded = yield self._maybe_forward(session_id)
+        if forwarded:
+            return
+
         if self._validate_request(session_id) is None:
             self.send_error(404)
             return
@@ -184,7 +208,12 @@ class UploadFileRequestHandler(tornado.web.RequestHandler):
 
         self.send_error(400, reason="Nothing to update")
 
+    @tornado.gen.coroutine
     def delete(self, session_id, widget_id, file_id):
+        forwarded = yield self._maybe_forward(session_id)
+        if forwarded:
+            return
+
         if not all(
             [session_id, widget_id, file_id, self._validate_request(session_id)]
         ):
@@ -0,0 +1,280 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Support for serving an app from several worker processes.
+
+When server.workers is greater than 1, the server forks that many worker
+processes before starting. Each worker has its own IOLoop and its own Server,
+and binds the public port with SO_REUSEPORT, so the kernel spreads incoming
+connections between them.
+
+A ReportSession lives in the worker that accepted its websocket. But the
+HTTP requests that go with it (file uploads, cached messages, media files)
+can reach any worker. So each worker also listens on a private localhost
+port, and forwards requests for data it doesn't have to the other workers.
+"""
+
+import os
+import signal
+import sys
+import uuid
+from typing import List, Optional
+
+import tornado.gen
+import tornado.httpclient
+import tornado.httputil
+import tornado.netutil
+
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+# Set on requests that one worker forwards to another, so that a request
+# is never forwarded twice.
+FORWARDED_HEADER = "X-Streamlit-Forwarded-By"
+
+# Headers that describe the encoding of a single hop, and which therefore
+# aren't copied when forwarding a request or its response.
+_HOP_BY_HOP_HEADERS = {
+    "connection",
+    "content-encoding",
+    "content-length",
+    "keep-alive",
+    "transfer-encoding",
+}
+
+# Responses relayed between workers may contain large media files.
+_MAX_FORWARDED_BODY_SIZE = 1024 * 1024 * 1024  # 1GB
+
+# The index of this worker process, or None if we're not running workers.
+_worker_index = None  # type: Optional[int]
+
+# The private localhost port of each worker, by worker index.
+_worker_ports = []  # type: List[int]
+
+# This worker's private listening socket.
+_worker_socket = None
+
+_http_client = None  # type: Optional[tornado.httpclient.AsyncHTTPClient]
+
+
+def can_fork_workers():
+    """True if worker processes are supported on this platform."""
+    return hasattr(os, "fork")
+
+
+def fork_workers(num_workers):
+    """Fork num_workers worker processes.
+
+    This must be called before any IOLoop is created. It only returns in
+    the workers: the parent process waits for all of them to exit, and then
+    exits itself.
+
+    Parameters
+    ----------
+    num_workers : int
+        The number of worker processes to start.
+
+    """
+    global _worker_index, _worker_ports, _worker_socket
+
+    # Bind every worker's private socket before forking, so each worker
+    # knows how to reach all the others.
+    sockets = [
+        tornado.netutil.bind_sockets(0, "127.0.0.1")[0] for _ in range(num_workers)
+    ]
+    ports = [sock.getsockname()[1] for sock in sockets]
+
+    pids = []
+    for index in range(num_workers):
+        pid = os.fork()
+        if pid == 0:
+            _worker_index = index
+            _worker_ports = ports
+            _worker_socket = sockets[index]
+            for sock in sockets:
+                if sock is not _worker_socket:
+                    sock.close()
+            LOGGER.debug("Started worker %s (pid=%s)", index, os.getpid())
+            return
+        pids.append(pid)
+
+    for sock in sockets:
+        sock.close()
+
+    _wait_for_workers(pids)
+    sys.exit(0)
+
+
+def _wait_for_workers(pids):
+    """Wait for the given worker processes to exit.
+
+    Workers share our terminal's process group, so they receive Ctrl-C and
+    friends directly. SIGTERM is usually only sent to the parent, though, so
+    we pass it on.
+    """
+
+    def forward_signal(signal_number, stack_frame):
+        for pid in pids:
+            try:
+                os.kill(pid, signal_number)
+            except OSError:
+                pass
+
+    signal.signal(signal.SIGTERM, forward_signal)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGQUIT, signal.SIG_IGN)
+
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+
+def get_worker_index():
+    """The index of this worker process, or None if we're not running
+    worker processes."""
+    return _worker_index
+
+
+def is_main_worker():
+    """True if this process should do the things that happen once per
+    server, like printing the app's URL and opening a browser."""
+    return _worker_index is None or _worker_index == 0
+
+
+def get_worker_socket():
+    """This worker's private listening socket, or None."""
+    return _worker_socket
+
+
+def new_session_id():
+    """Return a new, unique ReportSession id.
+
+    When running workers, the id records which worker owns the session, so
+    requests for the session can be forwarded to it.
+    """
+    session_id = str(uuid.uuid4())
+    if _worker_index is None:
+        return session_id
+    return "w%s-%s" % (_worker_index, session_id)
+
+
+def get_session_owner(session_id):
+    """Return the index of the worker that owns the given session.
+
+    Returns None if the session belongs to this process, if its id doesn't
+    name a worker, or if we're not running workers.
+    """
+    if _worker_index is None or not session_id:
+        return None
+
+    prefix, _, _ = session_id.partition("-")
+    if not prefix.startswith("w") or not prefix[1:].isdigit():
+        return None
+
+    owner = int(prefix[1:])
+    if owner == _worker_index or owner >= len(_worker_ports):
+        return None
+    return owner
+
+
+def get_other_workers():
+    """Return the indices of all workers other than this one."""
+    if _worker_index is None:
+        return []
+    return [index for index in range(len(_worker_ports)) if index != _worker_index]
+
+
+def can_forward(request):
+    """True if the given request may be forwarded to another worker.
+
+    Requests are only forwarded once. If the worker they were forwarded to
+    can't handle them either, they fail as usual.
+    """
+    return _worker_index is not None and FORWARDED_HEADER not in request.headers
+
+
+def _get_http_client():
+    global _http_client
+    if _http_client is None:
+        _http_client = tornado.httpclient.AsyncHTTPClient(
+            force_instance=True, max_body_size=_MAX_FORWARDED_BODY_SIZE
+        )
+    return _http_client
+
+
+@tornado.gen.coroutine
+def forward_request(handler, worker_indices):
+    """Forward a request to other workers, and relay the response.
+
+    The workers are tried in order, until one of them answers with
+    something other than a 404.
+
+    Parameters
+    ----------
+    handler : tornado.web.RequestHandler
+        The handler whose request should be forwarded. It will be finished
+        with the forwarded response.
+    worker_indices : list of int
+        The workers to try.
+
+    Returns
+    -------
+    bool
+        True if a worker handled the request. If not, the handler is left
+        unfinished.
+
+    """
+    request = handler.request
+
+    headers = tornado.httputil.HTTPHeaders()
+    for name, value in request.headers.get_all():
+        if name.lower() not in _HOP_BY_HOP_HEADERS:
+            headers.add(name, value)
+    headers[FORWARDED_HEADER] = str(_worker_index)
+
+    for index in worker_indices:
+        url = "http://127.0.0.1:%s%s" % (_worker_ports[index], request.uri)
+        response = yield _get_http_client().fetch(
+            tornado.httpclient.HTTPRequest(
+                url,
+                method=request.method,
+                headers=headers,
+                body=request.body or None,
+                follow_redirects=False,
+                allow_nonstandard_methods=True,
+            ),
+            raise_error=False,
+        )
+
+        if response.code == 404:
+            continue
+
+        if response.code == 599:
+            # The worker couldn't be reached at all.
+            LOGGER.warning("Failed to forward request to worker %s", index)
+            continue
+
+        LOGGER.debug("Forwarded %s %s to worker %s", request.method, request.uri, index)
+        handler.set_status(response.code, response.reason)
+        for name, value in response.headers.get_all():
+            if name.lower() in _HOP_BY_HOP_HEADERS:
+                continue
+            if name.lower() == "set-cookie":
+                handler.add_header(name, value)
+            else:
+                handler.set_header(name, value)
+        handler.finish(response.body)
+        return True
+
+    return False
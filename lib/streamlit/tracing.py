@@ -0,0 +1,250 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Lightweight tracing of the rerun pipeline.
+
+Code that we want to see in traces is wrapped in a span:
+
+    with tracing.span("ReportQueue.enqueue"):
+        ...
+
+or, for a whole function:
+
+    @tracing.traced("ReportQueue.enqueue")
+    def enqueue(self, msg):
+        ...
+
+The outermost span in a thread is a "root" span, and we decide whether to
+sample it based on the global.tracingSampleRate config option. Spans nested in
+a root span are recorded only if the root was sampled, so an unsampled script
+run costs one thread-local lookup per span.
+
+Recorded spans are kept in a bounded buffer, which /debugz?trace=1 serves, and
+are appended to the file in global.tracingFile, if one is set. Both use the
+Chrome trace event format, so they can be opened in chrome://tracing or
+https://ui.perfetto.dev.
+"""
+
+import collections
+import functools
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Deque, Dict, Optional, TextIO
+
+from streamlit import config
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__name__)
+
+# The number of recorded events we keep in memory for /debugz.
+MAX_RECENT_EVENTS = 10000
+
+_local = threading.local()
+
+# Protects _recent_events and the trace file.
+_lock = threading.Lock()
+_recent_events = collections.deque(
+    maxlen=MAX_RECENT_EVENTS
+)  # type: Deque[Dict[str, Any]]
+_trace_file = None  # type: Optional[TextIO]
+_trace_file_path = None  # type: Optional[str]
+
+
+class _NullSpan(object):
+    """A span that isn't recorded."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _UnsampledRootSpan(object):
+    """A root span that isn't recorded. Its nested spans aren't either."""
+
+    def __enter__(self):
+        _local.sampled = False
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.sampled = None
+        return False
+
+
+class _Span(object):
+    """A span that's recorded when it exits."""
+
+    __slots__ = ("name", "args", "is_root", "start_time")
+
+    def __init__(self, name, args, is_root):
+        self.name = name
+        self.args = args
+        self.is_root = is_root
+        self.start_time = 0.0
+
+    def __enter__(self):
+        if self.is_root:
+            _local.sampled = True
+        self.start_time = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end_time = time.time()
+        if self.is_root:
+            _local.sampled = None
+
+        event = {
+            "name": self.name,
+            "cat": "streamlit",
+            "ph": "X",
+            "ts": self.start_time * 1e6,
+            "dur": (end_time - self.start_time) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if self.args:
+            event["args"] = self.args
+        if exc_type is not None:
+            event.setdefault("args", {})["exception"] = exc_type.__name__
+
+        _record(event, flush=self.is_root)
+        return False
+
+
+def span(name, **args):
+    """Return a context manager that traces a block of code.
+
+    Parameters
+    ----------
+    name : str
+        The span's name, as shown in trace viewers.
+    **args
+        JSON-serializable values to attach to the span.
+
+    """
+    sampled = getattr(_local, "sampled", None)
+    if sampled is None:
+        # This is a root span.
+        sample_rate = config.get_option("global.tracingSampleRate")
+        if sample_rate <= 0 or random.random() >= sample_rate:
+            return _UnsampledRootSpan()
+        return _Span(name, args, is_root=True)
+    if sampled:
+        return _Span(name, args, is_root=False)
+    return _NULL_SPAN
+
+
+def traced(name):
+    """Decorator that traces each call of a function as a span.
+
+    Parameters
+    ----------
+    name : str
+        The span's name, as shown in trace viewers.
+
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapped_func(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapped_func
+
+    return decorator
+
+
+def get_recent_trace():
+    """Return the recently recorded spans as a Chrome trace.
+
+    Returns
+    -------
+    dict
+        A trace in the Chrome trace event format's JSON object form.
+
+    """
+    with _lock:
+        events = list(_recent_events)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def clear():
+    """Forget all recently recorded spans, and close the trace file."""
+    global _trace_file, _trace_file_path
+    with _lock:
+        _recent_events.clear()
+        if _trace_file is not None:
+            _trace_file.close()
+        _trace_file = None
+        _trace_file_path = None
+
+
+def _record(event, flush):
+    thread_name_event = None
+    if not getattr(_local, "named_thread", False):
+        # Name the thread in trace viewers the first time it records a span.
+        _local.named_thread = True
+        thread_name_event = {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": event["pid"],
+            "tid": event["tid"],
+            "args": {"name": threading.current_thread().name},
+        }
+
+    with _lock:
+        if thread_name_event is not None:
+            _recent_events.append(thread_name_event)
+            _write_event(thread_name_event, flush=False)
+        _recent_events.append(event)
+        _write_event(event, flush)
+
+
+def _write_event(event, flush):
+    """Append an event to the trace file. Must be called with _lock held."""
+    global _trace_file, _trace_file_path
+
+    path = config.get_option("global.tracingFile")
+    if path != _trace_file_path:
+        if _trace_file is not None:
+            _trace_file.close()
+        _trace_file = None
+        _trace_file_path = path
+        if path:
+            try:
+                is_new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+                _trace_file = open(path, "a")
+                if is_new_file:
+                    # The Chrome trace event format's array form allows the
+                    # closing bracket to be missing, so we can keep appending.
+                    _trace_file.write("[\n")
+            except OSError as e:
+                LOGGER.error("Unable to open trace file %s: %s", path, e)
+                _trace_file = None
+
+    if _trace_file is None:
+        return
+
+    _trace_file.write(json.dumps(event))
+    _trace_file.write(",\n")
+    if flush:
+        _trace_file.flush()
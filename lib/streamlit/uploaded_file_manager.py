@@ -17,6 +17,8 @@ import threading
 from typing import Dict, NamedTuple, Optional, List, Tuple
 from blinker import Signal
 
+from streamlit import metrics
+
 
 class UploadedFileRec(NamedTuple):
     """Metadata and raw bytes for an uploaded file. Immutable."""
@@ -94,6 +96,7 @@ class UploadedFileManager(object):
         files_by_widget = session_id, widget_id
 
         with self._files_lock:
+            metrics.Client.get("streamlit_uploaded_file_bytes").inc(_total_size(files))
             file_list = self._files_by_id.get(files_by_widget, None)
             if file_list:
                 files = file_list + files
@@ -142,6 +145,26 @@ class UploadedFileManager(object):
         with self._files_lock:
             return self._files_by_id.get(files_by_widget, None)
 
+    def get_session_files(self, session_id: str) -> Dict[str, List[UploadedFileRec]]:
+        """Return all file lists that belong to the given report.
+
+        Parameters
+        ----------
+        session_id : str
+            The session ID of the report whose files we're returning.
+
+        Returns
+        -------
+        dict of str to list of UploadedFileRec
+            The file lists, keyed by widget ID.
+        """
+        with self._files_lock:
+            return {
+                widget_id: files
+                for (files_session_id, widget_id), files in self._files_by_id.items()
+                if files_session_id == session_id
+            }
+
     def remove_file(self, session_id: str, widget_id: str, file_id: str) -> None:
         """Remove the file list with the given ID, if it exists."""
         files_by_widget = session_id, widget_id
@@ -150,6 +173,9 @@ class UploadedFileManager(object):
             self._files_by_id[files_by_widget] = [
                 file for file in file_list if file.id != file_id
             ]
+            metrics.Client.get("streamlit_uploaded_file_bytes").dec(
+                _total_size(file for file in file_list if file.id == file_id)
+            )
             if len(file_list) != len(self._files_by_id[files_by_widget]):
                 self._on_files_updated(session_id, widget_id)
 
@@ -162,7 +188,11 @@ class UploadedFileManager(object):
         files_by_widget = session_id, widget_id
         self.update_file_count(session_id, widget_id, 0)
         with self._files_lock:
-            self._files_by_id.pop(files_by_widget, None)
+            file_list = self._files_by_id.pop(files_by_widget, None)
+            if file_list:
+                metrics.Client.get("streamlit_uploaded_file_bytes").dec(
+                    _total_size(file_list)
+                )
 
     def remove_files(self, session_id: str, widget_id: str) -> None:
         """Remove the file list for the provided widget in the
@@ -227,3 +257,7 @@ class UploadedFileManager(object):
         files_by_widget = session_id, widget_id
         self._file_counts_by_id[files_by_widget] = file_count
         self._on_files_updated(session_id, widget_id)
+
+
+def _total_size(files) -> int:
+    return sum(len(file.data) for file in files)
@@ -21,6 +21,7 @@ import collections
 from streamlit import config
 from streamlit import env_util
 from streamlit import file_util
+from streamlit import script_cache
 from streamlit.folder_black_list import FolderBlackList
 
 from streamlit.logger import get_logger
@@ -113,6 +114,10 @@ class LocalSourcesWatcher(object):
             if wm.module_name is not None and wm.module_name in sys.modules:
                 del sys.modules[wm.module_name]
 
+        # The file's mtime may not have changed enough for the compiled script
+        # cache to notice.
+        script_cache.invalidate(filepath)
+
         self._on_file_changed()
 
     def close(self):
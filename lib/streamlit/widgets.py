@@ -13,7 +13,7 @@
 # limitations under the License.
 
 from pprint import pprint
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Set
 
 from streamlit.proto.ClientState_pb2 import ClientState
 from streamlit.proto.WidgetStates_pb2 import WidgetStates, WidgetState
@@ -77,6 +77,29 @@ class Widgets(object):
         for wstate in widget_states.widgets:
             self._state[wstate.id] = wstate
 
+    def get_changed_widget_ids(self, widget_states: WidgetStates) -> Set[str]:
+        """Return the IDs of the widgets whose values in a WidgetStates
+        protobuf differ from our state.
+
+        Trigger values that are False count as unset, since we don't keep
+        them around after a run.
+        """
+        new_state = {
+            wstate.id: wstate
+            for wstate in widget_states.widgets
+            if not _is_unset_trigger(wstate)
+        }
+        old_state = {
+            widget_id: wstate
+            for widget_id, wstate in self._state.items()
+            if not _is_unset_trigger(wstate)
+        }
+        return {
+            widget_id
+            for widget_id in new_state.keys() | old_state.keys()
+            if new_state.get(widget_id) != old_state.get(widget_id)
+        }
+
     def marshall(self, client_state: ClientState) -> None:
         """Populate a ClientState proto with the widget values stored in this
         object.
@@ -99,3 +122,7 @@ class Widgets(object):
     def dump(self) -> None:
         """Pretty-print widget state to the console, for debugging."""
         pprint(self._state)
+
+
+def _is_unset_trigger(wstate: WidgetState) -> bool:
+    return wstate.WhichOneof("value") == "trigger_value" and not wstate.trigger_value
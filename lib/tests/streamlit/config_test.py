@@ -282,16 +282,29 @@ class ConfigTest(unittest.TestCase):
                 "global.disableWatchdogWarning",
                 "global.logLevel",
                 "global.maxCachedMessageAge",
+                "global.messageChunkSize",
                 "global.minCachedMessageSize",
+                "global.minOffloadedMessageSize",
                 "global.metrics",
+                "global.reportRetention",
                 "global.sharingMode",
                 "global.showWarningOnDirectExecution",
                 "global.suppressDeprecationWarnings",
+                "global.tracingFile",
+                "global.tracingSampleRate",
                 "global.unitTest",
                 "logger.level",
                 "logger.messageFormat",
                 "runner.magicEnabled",
+                "runner.processIsolation",
+                "runner.processPoolSize",
+                "runner.maxScriptThreads",
                 "runner.installTracer",
+                "runner.interruptScripts",
+                "runner.maxElementUpdatesPerSecond",
+                "runner.rerunDebounceMs",
+                "runner.minRerunIntervalMs",
+                "runner.enableProfiler",
                 "runner.fixMatplotlib",
                 "mapbox.token",
                 "s3.accessKeyId",
@@ -304,7 +317,11 @@ class ConfigTest(unittest.TestCase):
                 "server.baseUrlPath",
                 "server.enableCORS",
                 "server.cookieSecret",
+                "server.disconnectedSessionTTL",
                 "server.enableWebsocketCompression",
+                "server.websocketCompressionLevel",
+                "server.websocketCompressionMemLevel",
+                "server.websocketCompressionMinSize",
                 "server.enableXsrfProtection",
                 "server.fileWatcherType",
                 "server.folderWatchBlacklist",
@@ -313,8 +330,13 @@ class ConfigTest(unittest.TestCase):
                 "server.address",
                 "server.allowRunOnSave",
                 "server.port",
+                "server.preheatCpuShare",
+                "server.skipUnchangedElements",
+                "server.preheatedSessions",
                 "server.runOnSave",
                 "server.maxUploadSize",
+                "server.maxWebsocketBufferSize",
+                "server.workers",
             ]
         )
         keys = sorted(config._config_options.keys())
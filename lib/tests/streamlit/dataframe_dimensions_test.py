@@ -53,4 +53,4 @@ class DeltaGeneratorDataframeTest(testutil.DeltaGeneratorTestCase):
         """Returns the metadata for the most recent element in the
         DeltaGenerator queue
         """
-        return self.report_queue._queue[-1].metadata
+        return list(self.report_queue)[-1].metadata
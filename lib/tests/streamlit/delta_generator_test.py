@@ -15,6 +15,7 @@
 """DeltaGenerator Unittest."""
 
 import json
+from unittest.mock import patch
 
 try:
     from inspect import signature
@@ -32,6 +33,7 @@ from streamlit.errors import DuplicateWidgetID
 from streamlit.errors import StreamlitAPIException
 from streamlit.proto.Delta_pb2 import Delta
 from streamlit.proto.Element_pb2 import Element
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 from streamlit.proto.TextArea_pb2 import TextArea
 from streamlit.proto.TextInput_pb2 import TextInput
 from streamlit.proto.Empty_pb2 import Empty as EmptyProto
@@ -280,6 +282,21 @@ class DeltaGeneratorClassTest(testutil.DeltaGeneratorTestCase):
         )
         self.assertEqual(msg.delta.new_element.text.body, test_data)
 
+    def test_enqueue_forward_msg(self):
+        """An element marshalled into a ForwardMsg is enqueued as is."""
+        dg = DeltaGenerator(root_container=RootContainer.MAIN)
+
+        msg = ForwardMsg()
+        msg.delta.new_element.text.body = "some test data"
+        with patch("streamlit.delta_generator._enqueue_message") as enqueue:
+            dg._enqueue("text", msg, element_width=100)
+
+        enqueue.assert_called_once_with(msg)
+        self.assertEqual(
+            make_delta_path(RootContainer.MAIN, (), 0), msg.metadata.delta_path
+        )
+        self.assertEqual(100, msg.metadata.element_dimension_spec.width)
+
 
 class DeltaGeneratorContainerTest(testutil.DeltaGeneratorTestCase):
     """Test DeltaGenerator Container."""
@@ -0,0 +1,206 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""DeltaThrottle unit tests."""
+
+import unittest
+from typing import List, Tuple
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+import streamlit as st
+from streamlit.delta_throttle import DeltaThrottle
+from streamlit.elements import image_proto
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.report_thread import get_report_ctx
+from tests import testutil
+
+
+def _text_msg(delta_path, body):
+    msg = ForwardMsg()
+    msg.metadata.delta_path[:] = delta_path
+    msg.delta.new_element.text.body = body
+    return msg
+
+
+def _block_msg(delta_path):
+    msg = ForwardMsg()
+    msg.metadata.delta_path[:] = delta_path
+    msg.delta.add_block.SetInParent()
+    return msg
+
+
+def _describe(msg):
+    if msg.delta.HasField("add_block"):
+        return (list(msg.metadata.delta_path), "block")
+    return (list(msg.metadata.delta_path), msg.delta.new_element.text.body)
+
+
+class DeltaThrottleTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        patcher = patch("streamlit.delta_throttle.time")
+        patcher.start().monotonic.side_effect = lambda: self.now
+        self.addCleanup(patcher.stop)
+        patcher = patch("streamlit.delta_throttle.threading.Timer")
+        self.timer = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.sent = []  # type: List[Tuple[List[int], str]]
+        self.on_update_held = MagicMock()
+        self.throttle = DeltaThrottle(
+            lambda msg: self.sent.append(_describe(msg)),
+            max_updates_per_second=10,
+            on_update_held=self.on_update_held,
+        )
+
+    def test_holds_replacements(self):
+        """Replacements within the interval are held, and only the latest
+        one is sent once the interval has passed."""
+        self.throttle.enqueue(_text_msg([0, 0], "a"))
+        self.throttle.enqueue(_text_msg([0, 0], "b"))
+        self.throttle.enqueue(_text_msg([0, 0], "c"))
+        self.assertEqual([([0, 0], "a")], self.sent)
+        self.assertEqual(2, self.on_update_held.call_count)
+
+        # Enqueueing any other message sends held messages that are due.
+        self.now += 0.2
+        self.throttle.enqueue(_text_msg([0, 1], "x"))
+        self.assertEqual([([0, 0], "a"), ([0, 0], "c"), ([0, 1], "x")], self.sent)
+
+    def test_timer_sends_held_replacements(self):
+        """A held replacement is sent once it's due, even if the script
+        doesn't enqueue anything else."""
+        self.throttle.enqueue(_text_msg([0, 0], "a"))
+        self.now += 0.05
+        self.throttle.enqueue(_text_msg([0, 0], "b"))
+        self.assertEqual([([0, 0], "a")], self.sent)
+
+        delay, on_timer = self.timer.call_args[0]
+        self.assertAlmostEqual(0.05, delay)
+        self.now += 0.06
+        on_timer()
+        self.assertEqual([([0, 0], "a"), ([0, 0], "b")], self.sent)
+
+    def test_flush_cancels_timer(self):
+        self.throttle.enqueue(_text_msg([0, 0], "a"))
+        self.throttle.enqueue(_text_msg([0, 0], "b"))
+        self.timer.return_value.start.assert_called_once()
+
+        self.throttle.flush()
+        self.timer.return_value.cancel.assert_called_once()
+
+    def test_new_elements_are_not_held(self):
+        self.throttle.enqueue(_text_msg([0, 0], "a"))
+        self.throttle.enqueue(_text_msg([0, 1], "b"))
+        self.assertEqual([([0, 0], "a"), ([0, 1], "b")], self.sent)
+        self.on_update_held.assert_not_called()
+
+    def test_flush_sends_final_values(self):
+        self.throttle.enqueue(_text_msg([0, 0], "a"))
+        self.throttle.enqueue(_text_msg([0, 0], "b"))
+        self.throttle.enqueue(_text_msg([0, 1], "c"))
+        self.throttle.enqueue(_text_msg([0, 1], "d"))
+
+        self.throttle.flush()
+        self.assertEqual(
+            [([0, 0], "a"), ([0, 1], "c"), ([0, 0], "b"), ([0, 1], "d")], self.sent
+        )
+
+        # Nothing is sent twice.
+        self.throttle.flush()
+        self.assertEqual(4, len(self.sent))
+
+    def test_related_messages_keep_their_order(self):
+        """A held element is sent before a block that replaces its
+        container."""
+        self.throttle.enqueue(_block_msg([0, 0]))
+        self.throttle.enqueue(_text_msg([0, 0, 0], "a"))
+        self.throttle.enqueue(_text_msg([0, 0, 0], "b"))
+        self.throttle.enqueue(_block_msg([0, 0]))
+        self.assertEqual(
+            [([0, 0], "block"), ([0, 0, 0], "a"), ([0, 0, 0], "b"), ([0, 0], "block")],
+            self.sent,
+        )
+
+    def test_reset(self):
+        self.throttle.enqueue(_text_msg([0, 0], "a"))
+        self.throttle.enqueue(_text_msg([0, 0], "b"))
+        self.throttle.reset()
+
+        self.throttle.enqueue(_text_msg([0, 0], "c"))
+        self.throttle.flush()
+        self.assertEqual([([0, 0], "a"), ([0, 0], "c")], self.sent)
+
+    def test_lazy_messages_are_only_made_when_sent(self):
+        self.throttle.enqueue(_text_msg([0, 0], "a"))
+        superseded = MagicMock()
+        self.throttle.hold([0, 0], superseded)
+        self.throttle.hold([0, 0], lambda: _text_msg([0, 0], "b"))
+
+        self.throttle.flush()
+        superseded.assert_not_called()
+        self.assertEqual([([0, 0], "a"), ([0, 0], "b")], self.sent)
+
+
+class DeltaThrottleDeltaGeneratorTest(testutil.DeltaGeneratorTestCase):
+    """Test throttling elements written by a script."""
+
+    def setUp(self):
+        super(DeltaThrottleDeltaGeneratorTest, self).setUp()
+        self.throttle = DeltaThrottle(
+            self.report_queue.enqueue, max_updates_per_second=1
+        )
+        ctx = get_report_ctx()
+        assert ctx is not None
+        ctx.delta_throttle = self.throttle
+
+    def test_superseded_images_are_not_marshalled(self):
+        placeholder = st.empty()
+        with patch(
+            "streamlit.elements.image_proto.marshall_images",
+            wraps=image_proto.marshall_images,
+        ) as marshall_images:
+            for value in range(10):
+                placeholder.image(np.full((4, 4, 3), value, dtype=np.uint8))
+
+            self.assertEqual(0, marshall_images.call_count)
+            self.throttle.flush()
+            self.assertEqual(1, marshall_images.call_count)
+
+        element = self.get_delta_from_queue().new_element
+        self.assertEqual(1, len(element.imgs.imgs))
+
+    def test_held_images_are_copied(self):
+        """Changing an image after it's held doesn't change what's sent."""
+        placeholder = st.empty()
+        placeholder.image(np.zeros((4, 4, 3), dtype=np.uint8))
+        image = np.zeros((4, 4, 3), dtype=np.uint8)
+        placeholder.image(image, output_format="PNG")
+        image[:] = 255
+
+        with patch("streamlit.elements.image_proto.image_to_url") as image_to_url:
+            image_to_url.return_value = "url"
+            self.throttle.flush()
+        self.assertEqual(0, image_to_url.call_args[0][0].max())
+
+    def test_progress_final_value_is_sent(self):
+        bar = st.progress(0)
+        for value in range(1, 101):
+            bar.progress(value)
+        self.assertEqual(0, self.get_delta_from_queue().new_element.progress.value)
+
+        self.throttle.flush()
+        self.assertEqual(100, self.get_delta_from_queue().new_element.progress.value)
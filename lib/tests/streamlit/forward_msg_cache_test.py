@@ -14,10 +14,13 @@
 
 """Unit tests for MessageCache"""
 
-from unittest.mock import MagicMock
+from collections import defaultdict
+from typing import Dict
+from unittest.mock import MagicMock, patch
 import unittest
 
 from streamlit import config, RootContainer
+from streamlit import metrics
 from streamlit import report_session
 from streamlit.forward_msg_cache import ForwardMsgCache
 from streamlit.forward_msg_cache import create_reference_msg
@@ -72,6 +75,24 @@ class ForwardMsgCacheTest(unittest.TestCase):
         self.assertTrue(cache.has_message_reference(msg, session, 0))
         self.assertFalse(cache.has_message_reference(msg, _create_mock_session(), 0))
 
+    def test_hit_and_miss_metrics(self):
+        """Test that has_message_reference counts cache hits and misses."""
+        mock_metrics = defaultdict(MagicMock)  # type: Dict[str, MagicMock]
+        with patch.object(metrics.Client, "get", side_effect=mock_metrics.__getitem__):
+            cache = ForwardMsgCache()
+            session = _create_mock_session()
+            msg = _create_dataframe_msg([1, 2, 3])
+            cache.add_message(msg, session, 0)
+
+            cache.has_message_reference(msg, session, 0)
+            cache.has_message_reference(msg, _create_mock_session(), 0)
+            cache.has_message_reference(msg, _create_mock_session(), 0)
+
+        hits = mock_metrics["streamlit_forward_msg_cache_hits_total"]
+        misses = mock_metrics["streamlit_forward_msg_cache_misses_total"]
+        self.assertEqual(1, hits.inc.call_count)
+        self.assertEqual(2, misses.inc.call_count)
+
     def test_get_message(self):
         """Test MessageCache.get_message"""
         cache = ForwardMsgCache()
@@ -0,0 +1,78 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Fragments unit tests."""
+
+import unittest
+
+from streamlit.fragment import Fragment
+from streamlit.fragment import Fragments
+from streamlit.proto.RootContainer_pb2 import RootContainer
+
+
+def _create_fragment(parent_path, parent=None):
+    return Fragment(
+        func=lambda: None,
+        args=(),
+        kwargs={},
+        root_container=RootContainer.MAIN,
+        parent_path=parent_path,
+        parent=parent,
+    )
+
+
+class FragmentsTest(unittest.TestCase):
+    def setUp(self):
+        self.fragments = Fragments()
+        self.outer = _create_fragment((1,))
+        self.inner = _create_fragment((1, 2), parent=self.outer)
+        self.other = _create_fragment((3,))
+        for fragment in [self.outer, self.inner, self.other]:
+            self.fragments.add(fragment)
+        self.fragments.add_widget("outer_widget", self.outer)
+        self.fragments.add_widget("inner_widget", self.inner)
+        self.fragments.add_widget("other_widget", self.other)
+
+    def test_single_fragment(self):
+        self.assertIs(
+            self.inner, self.fragments.get_fragment_to_rerun(["inner_widget"])
+        )
+        self.assertEqual([0, 1, 2], self.inner.delta_path)
+
+    def test_nested_fragments(self):
+        """Changes in a fragment and a fragment inside it rerun the outer
+        one."""
+        self.assertIs(
+            self.outer,
+            self.fragments.get_fragment_to_rerun(["outer_widget", "inner_widget"]),
+        )
+
+    def test_unrelated_fragments(self):
+        self.assertIsNone(
+            self.fragments.get_fragment_to_rerun(["inner_widget", "other_widget"])
+        )
+
+    def test_widget_outside_fragments(self):
+        self.assertIsNone(
+            self.fragments.get_fragment_to_rerun(["inner_widget", "unknown_widget"])
+        )
+
+    def test_replaced_fragment(self):
+        """A fragment that a later run replaced isn't rerun."""
+        self.fragments.add(_create_fragment((3,)))
+        self.assertIsNone(self.fragments.get_fragment_to_rerun(["other_widget"]))
+
+    def test_clear(self):
+        self.fragments.clear()
+        self.assertIsNone(self.fragments.get_fragment_to_rerun(["inner_widget"]))
@@ -0,0 +1,89 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""MediaFileHandler unit tests"""
+
+import tornado.testing
+import tornado.web
+
+from streamlit.media_file_manager import media_file_manager
+from streamlit.server.routes import MediaFileHandler
+
+
+class MediaFileHandlerTest(tornado.testing.AsyncHTTPTestCase):
+    def get_app(self):
+        return tornado.web.Application(
+            [(r"/media/(.*)", MediaFileHandler, {"path": ""})]
+        )
+
+    def setUp(self):
+        super(MediaFileHandlerTest, self).setUp()
+        self.content = bytes(range(256)) * 1000
+        self.media_file = media_file_manager.add(
+            self.content, "image/png", "coordinates", session_id="session"
+        )
+        self.path = "/media/%s.png" % self.media_file.id
+
+    def tearDown(self):
+        media_file_manager.clear_session_files("session")
+        media_file_manager.del_expired_files()
+        super(MediaFileHandlerTest, self).tearDown()
+
+    def test_get(self):
+        """Media files have strong, content-based ETags and are cached forever."""
+        response = self.fetch(self.path)
+        self.assertEqual(200, response.code)
+        self.assertEqual(self.content, response.body)
+        self.assertEqual('"%s"' % self.media_file.id, response.headers["ETag"])
+        self.assertEqual(
+            "max-age=%s, immutable" % MediaFileHandler.CACHE_MAX_AGE,
+            response.headers["Cache-Control"],
+        )
+
+    def test_not_modified(self):
+        response = self.fetch(
+            self.path, headers={"If-None-Match": '"%s"' % self.media_file.id}
+        )
+        self.assertEqual(304, response.code)
+        self.assertEqual(b"", response.body)
+
+        response = self.fetch(self.path, headers={"If-None-Match": '"other"'})
+        self.assertEqual(200, response.code)
+
+    def test_range(self):
+        """Ranges larger than a chunk are sent in full."""
+        start = 1000
+        end = start + MediaFileHandler.RANGE_CHUNK_SIZE * 2 + 10
+        response = self.fetch(
+            self.path, headers={"Range": "bytes=%s-%s" % (start, end - 1)}
+        )
+        self.assertEqual(206, response.code)
+        self.assertEqual(self.content[start:end], response.body)
+        self.assertEqual(
+            "bytes %s-%s/%s" % (start, end - 1, len(self.content)),
+            response.headers["Content-Range"],
+        )
+
+        # The chunks are views of the content, rather than copies.
+        chunks = list(MediaFileHandler.get_content(self.media_file.id, start, end))
+        self.assertTrue(all(isinstance(chunk, memoryview) for chunk in chunks))
+        self.assertEqual(self.content[start:end], b"".join(chunks))
+
+        response = self.fetch(self.path, headers={"Range": "bytes=-10"})
+        self.assertEqual(206, response.code)
+        self.assertEqual(self.content[-10:], response.body)
+
+    def test_missing_file(self):
+        response = self.fetch("/media/missing.png")
+        self.assertEqual(404, response.code)
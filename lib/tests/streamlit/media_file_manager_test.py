@@ -257,6 +257,24 @@ class MediaFileManagerTest(AsyncTestCase):
         self.assertEqual(len(self.mfm), 0)  # Now this is cleared too!
         self.assertEqual(len(self.mfm._files_by_session_and_coord), 0)
 
+    @mock.patch("streamlit.media_file_manager._get_session_id")
+    def test_clear_session_files_in_container(self, _get_session_id):
+        """Test that MediaFileManager can remove just the files inside one
+        container, e.g. when a fragment reruns."""
+        _get_session_id.return_value = "SESSION1"
+
+        samples = list(VIDEO_FIXTURES.values())
+        coords = ["[0, 2, 0]", "[0, 2, 1, 0]", "[0, 21, 0]", "[0, 3]"]
+        for sample, coord in zip(samples * len(coords), coords):
+            self.mfm.add(sample["content"], sample["mimetype"], coord)
+
+        self.mfm.clear_session_files(delta_path=[0, 2])
+
+        self.assertEqual(
+            ["[0, 21, 0]", "[0, 3]"],
+            sorted(self.mfm._files_by_session_and_coord["SESSION1"]),
+        )
+
     @mock.patch("streamlit.media_file_manager._get_session_id")
     def test_add_file_multiple_sessions_then_clear(self, _get_session_id):
         _get_session_id.return_value = "SESSION1"
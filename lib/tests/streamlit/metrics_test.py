@@ -126,7 +126,27 @@ class MetricsTest(unittest.TestCase):
             client.get("unittest_gauge").dec()
 
             calls = [
-                call(),  # Constructor
+                call(),  # Constructor: streamlit_enqueue_deltas_total
+                call(),  # Constructor: streamlit_slow_consumer_total
+                call(),  # Constructor: streamlit_server_loop_lag_seconds
+                call(),  # Constructor: streamlit_offloaded_messages_total
+                call(),  # Constructor: streamlit_sessions
+                call(),  # Constructor: streamlit_preheated_sessions
+                call(),  # Constructor: streamlit_script_threads
+                call(),  # Constructor: streamlit_script_run_duration_seconds
+                call(),  # Constructor: streamlit_script_compile_cache_total
+                call(),  # Constructor: streamlit_script_queue_length
+                call(),  # Constructor: streamlit_script_queue_wait_seconds
+                call(),  # Constructor: streamlit_browser_queue_messages
+                call(),  # Constructor: streamlit_browser_queue_bytes
+                call(),  # Constructor: streamlit_report_bytes
+                call(),  # Constructor: streamlit_forward_msg_bytes
+                call(),  # Constructor: streamlit_forward_msg_cache_hits_total
+                call(),  # Constructor: streamlit_forward_msg_cache_misses_total
+                call(),  # Constructor: streamlit_websocket_send_seconds
+                call(),  # Constructor: streamlit_media_file_bytes
+                call(),  # Constructor: streamlit_uploaded_file_bytes
+                call(),  # Constructor: streamlit_websocket_compression_total
                 call(),  # unittest_counter
                 call(),  # unittest_counter_labels
                 call(),  # unittest_gauge
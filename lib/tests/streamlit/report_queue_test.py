@@ -15,8 +15,11 @@
 """Unit test of ReportQueue.py."""
 
 import copy
+import threading
 import unittest
+from collections import deque
 from typing import Tuple
+from unittest.mock import patch
 
 from streamlit import RootContainer
 from streamlit.cursor import make_delta_path
@@ -252,3 +255,144 @@ class ReportQueueTest(unittest.TestCase):
 
         assert_deltas(RootContainer.MAIN, (), 1)
         assert_deltas(RootContainer.SIDEBAR, (0, 0, 1), 3)
+
+    def test_add_rows_are_composed_at_flush(self):
+        """add_rows deltas are composed once, when the queue is flushed,
+        rather than each time one is enqueued."""
+        rq = ReportQueue()
+        rq.enqueue(DF_DELTA_MSG)
+
+        with patch(
+            "streamlit.elements.data_frame_proto.add_rows",
+            wraps=data_frame_proto.add_rows,
+        ) as add_rows:
+            for i in range(10):
+                msg = ForwardMsg()
+                data_frame_proto.marshall_data_frame(
+                    {"col1": [100 + i], "col2": [200 + i]}, msg.delta.add_rows.data
+                )
+                msg.metadata.delta_path[:] = DF_DELTA_MSG.metadata.delta_path
+                rq.enqueue(msg)
+            self.assertEqual(0, add_rows.call_count)
+
+            # Iterating doesn't consume the queue.
+            self.assertEqual(1, len(list(rq)))
+            queue = rq.flush()
+
+        self.assertEqual(1, len(queue))
+        df = queue[0].delta.new_element.data_frame
+        self.assertEqual([0, 1, 2] + list(range(100, 110)), df.data.cols[0].int64s.data)
+        self.assertEqual(
+            [10, 11, 12] + list(range(200, 210)), df.data.cols[1].int64s.data
+        )
+
+        # The enqueued message wasn't modified.
+        self.assertEqual(
+            3, len(DF_DELTA_MSG.delta.new_element.data_frame.data.cols[0].int64s.data)
+        )
+
+    def test_incompatible_add_rows_raises_on_enqueue(self):
+        rq = ReportQueue()
+        rq.enqueue(DF_DELTA_MSG)
+
+        msg = ForwardMsg()
+        data_frame_proto.marshall_data_frame(
+            {"col1": [3], "col2": [13], "col3": [23]}, msg.delta.add_rows.data
+        )
+        msg.metadata.delta_path[:] = DF_DELTA_MSG.metadata.delta_path
+        with self.assertRaises(ValueError):
+            rq.enqueue(msg)
+
+    def test_flush_doesnt_wait_for_lock(self):
+        """Flushing while a script holds the lock asks the script to hand
+        its queue over, rather than waiting for it."""
+        msg1 = ForwardMsg()
+        msg1.CopyFrom(TEXT_DELTA_MSG1)
+        msg2 = ForwardMsg()
+        msg2.CopyFrom(TEXT_DELTA_MSG1)
+        msg2.delta.new_element.text.body = "text2"
+
+        rq = ReportQueue()
+        with rq._lock:
+            self.assertEqual([], rq.flush())
+
+        rq.enqueue(msg1)
+        with rq._lock:
+            self.assertEqual([], rq.flush())
+
+        # The next enqueue still combines its message with the queue, then
+        # hands the queue over. Later messages go into a new queue.
+        rq.enqueue(msg2)
+        self.assertEqual(1, len(rq._handed_over))
+        rq.enqueue(NEW_REPORT_MSG)
+        self.assertEqual(1, len(rq._handed_over))
+
+        self.assertEqual([msg2, NEW_REPORT_MSG], rq.flush())
+        self.assertTrue(rq.is_empty())
+
+    def test_concurrent_enqueue_and_flush(self):
+        """Every message enqueued on one thread is flushed on another,
+        once and in order."""
+        rq = ReportQueue()
+        num_msgs = 10000
+        flushed = []
+
+        def enqueue_msgs():
+            for index in range(num_msgs):
+                msg = ForwardMsg()
+                msg.metadata.delta_path[:] = make_delta_path(
+                    RootContainer.MAIN, (), index
+                )
+                msg.delta.new_element.text.body = str(index)
+                rq.enqueue(msg)
+
+        thread = threading.Thread(target=enqueue_msgs)
+        thread.start()
+        while thread.is_alive():
+            flushed.extend(rq.flush())
+        thread.join()
+        flushed.extend(rq.flush())
+
+        self.assertEqual(
+            [str(index) for index in range(num_msgs)],
+            [msg.delta.new_element.text.body for msg in flushed],
+        )
+
+    def test_clear_during_flush(self):
+        """Clearing the queue while a flush takes the handed over queues
+        without the lock doesn't break the flush."""
+        rq = ReportQueue()
+        rq._flush_requested = True
+        rq.enqueue(TEXT_DELTA_MSG1)
+        rq._flush_requested = True
+        rq.enqueue(NEW_REPORT_MSG)
+        self.assertEqual(2, len(rq._handed_over))
+
+        locked = threading.Event()
+        taking = threading.Event()
+        cleared = threading.Event()
+
+        class InterruptedDeque(deque):
+            def popleft(self):
+                # Let the script clear the queue while we take from it.
+                taking.set()
+                cleared.wait()
+                return super(InterruptedDeque, self).popleft()
+
+        rq._handed_over = InterruptedDeque(rq._handed_over)
+
+        def script():
+            # Hold the lock so that the flush can't take it.
+            with rq._lock:
+                locked.set()
+                taking.wait()
+            rq.clear()
+            cleared.set()
+
+        thread = threading.Thread(target=script)
+        thread.start()
+        locked.wait()
+        rq.flush()
+        thread.join()
+
+        self.assertTrue(rq.is_empty())
@@ -19,17 +19,21 @@ import pytest
 import tornado.gen
 import tornado.testing
 
+from streamlit import config
 import streamlit.report_session as report_session
 from streamlit.report_session import ReportSession, ReportSessionState
 from streamlit.report_thread import ReportContext
 from streamlit.report_thread import add_report_ctx
 from streamlit.report_thread import get_report_ctx
 from streamlit.script_runner import ScriptRunner
+from streamlit.script_runner import ScriptRunnerEvent
 from streamlit.uploaded_file_manager import UploadedFileManager
+from streamlit.proto.ClientState_pb2 import ClientState
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
 from streamlit.proto.StaticManifest_pb2 import StaticManifest
 from streamlit.errors import StreamlitAPIException
 from tests.mock_storage import MockStorage
+from tests.testutil import build_mock_config_get_option
 import streamlit as st
 
 
@@ -53,6 +57,8 @@ class ReportSessionTest(unittest.TestCase):
                 return True
             if name == "runner.installTracer":
                 return False
+            if name in ("runner.rerunDebounceMs", "runner.minRerunIntervalMs"):
+                return 0
             raise RuntimeError("Unexpected argument to get_option: %s" % name)
 
         patched_config.get_option.side_effect = get_option
@@ -144,6 +150,126 @@ class ReportSessionTest(unittest.TestCase):
         rs2 = ReportSession(None, "", "", file_mgr)
         self.assertNotEqual(rs1.id, rs2.id)
 
+    @patch("streamlit.report_session.LocalSourcesWatcher")
+    def test_resume_skips_matching_rerun(self, _1):
+        """After resuming, a rerun with the last widget state is skipped,
+        and any other rerun goes through."""
+        with patch.object(
+            config,
+            "get_option",
+            new=build_mock_config_get_option({"server.disconnectedSessionTTL": 60}),
+        ):
+            rs = ReportSession(None, "", "", MagicMock(spec=UploadedFileManager))
+        rs.request_rerun = MagicMock()
+
+        client_state = ClientState()
+        client_state.query_string = "foo=bar"
+        rs.handle_rerun_script_request(client_state)
+        self.assertEqual(1, rs.request_rerun.call_count)
+
+        rs.resume()
+        rs.handle_rerun_script_request(client_state)
+        self.assertEqual(1, rs.request_rerun.call_count)
+
+        # Only the first rerun after resuming is skipped.
+        rs.handle_rerun_script_request(client_state)
+        self.assertEqual(2, rs.request_rerun.call_count)
+
+        changed_client_state = ClientState()
+        changed_client_state.query_string = "foo=baz"
+        rs.resume()
+        rs.handle_rerun_script_request(changed_client_state)
+        self.assertEqual(3, rs.request_rerun.call_count)
+
+    @patch("streamlit.report_session.LocalSourcesWatcher")
+    def test_resume_without_retention_reruns(self, _1):
+        """A session that doesn't keep its report reruns when resumed."""
+        with patch.object(
+            config,
+            "get_option",
+            new=build_mock_config_get_option({"global.reportRetention": "off"}),
+        ):
+            rs = ReportSession(None, "", "", MagicMock(spec=UploadedFileManager))
+        rs.request_rerun = MagicMock()
+
+        client_state = ClientState()
+        rs.handle_rerun_script_request(client_state)
+        rs.resume()
+        rs.handle_rerun_script_request(client_state)
+        self.assertEqual(2, rs.request_rerun.call_count)
+
+    @patch("streamlit.report_session.LocalSourcesWatcher")
+    def test_preheated_session_reruns_on_source_change(self, _1):
+        """An unclaimed preheated session reruns when its source changes."""
+        rs = ReportSession(None, "", "", MagicMock(spec=UploadedFileManager))
+        rs.request_rerun = MagicMock()
+        rs._run_on_save = False
+
+        rs.handle_rerun_script_request(is_preheat=True)
+        rs._on_source_file_changed()
+        self.assertEqual(2, rs.request_rerun.call_count)
+
+        # Once a browser claims it, it behaves like any other session.
+        rs.handle_rerun_script_request(ClientState())
+        rs._enqueue_file_change_message = MagicMock()
+        rs._on_source_file_changed()
+        self.assertEqual(2, rs.request_rerun.call_count)
+        rs._enqueue_file_change_message.assert_called_once()
+
+    @patch("streamlit.report_session.LocalSourcesWatcher")
+    def test_request_interrupts_running_script(self, _1):
+        """New requests are passed on to a running ScriptRunner right away."""
+        rs = ReportSession(None, "", "", MagicMock(spec=UploadedFileManager))
+        rs._scriptrunner = MagicMock(spec=ScriptRunner)
+
+        rs.request_rerun()
+        rs._scriptrunner.request_interrupt.assert_called_once()
+
+    @patch("streamlit.report_session.LocalSourcesWatcher")
+    def test_queue_position_message(self, _1):
+        """The ScriptRunner's place in line is passed on to the browser."""
+        rs = ReportSession(None, "", "", MagicMock(spec=UploadedFileManager))
+        rs._on_scriptrunner_event(
+            ScriptRunnerEvent.QUEUE_POSITION_CHANGED, queue_position=3
+        )
+        msgs = rs.flush_browser_queue()
+        self.assertEqual(1, len(msgs))
+        self.assertEqual(3, msgs[0].script_queue_position)
+
+    @patch("streamlit.report_session.LocalSourcesWatcher")
+    def test_resume_resends_report(self, _1):
+        """Resuming puts the whole report back in the browser queue."""
+        rs = ReportSession(None, "", "", MagicMock(spec=UploadedFileManager))
+        msg = ForwardMsg()
+        msg.report_finished = ForwardMsg.FINISHED_SUCCESSFULLY
+        rs.enqueue(msg)
+        self.assertEqual([msg], rs.flush_browser_queue())
+        self.assertEqual([], rs.flush_browser_queue())
+
+        rs.resume()
+        self.assertEqual([msg], rs.flush_browser_queue())
+
+    @patch("streamlit.report_session.LocalSourcesWatcher")
+    def test_fragment_run_keeps_report(self, _1):
+        """A fragment run tells the browser which container it replaces,
+        and keeps the rest of the report."""
+        rs = ReportSession(None, "", "", MagicMock(spec=UploadedFileManager))
+        msg = ForwardMsg()
+        msg.report_finished = ForwardMsg.FINISHED_SUCCESSFULLY
+        rs.enqueue(msg)
+
+        rs._on_scriptrunner_event(
+            ScriptRunnerEvent.SCRIPT_STARTED, fragment_delta_path=[0, 1]
+        )
+        msgs = rs.flush_browser_queue()
+        self.assertEqual(msg, msgs[0])
+        self.assertEqual([0, 1], msgs[1].new_report.fragment_delta_path)
+
+        rs._on_scriptrunner_event(ScriptRunnerEvent.SCRIPT_STARTED)
+        msgs = rs.flush_browser_queue()
+        self.assertEqual(1, len(msgs))
+        self.assertEqual([], msgs[0].new_report.fragment_delta_path)
+
 
 def _create_mock_websocket():
     @tornado.gen.coroutine
@@ -161,7 +287,14 @@ class ReportSessionSerializationTest(tornado.testing.AsyncTestCase):
     def test_handle_save_request(self, _1):
         """Test that handle_save_request serializes files correctly."""
         # Create a ReportSession with some mocked bits
-        rs = ReportSession(self.io_loop, "mock_report.py", "", UploadedFileManager())
+        with patch.object(
+            config,
+            "get_option",
+            new=build_mock_config_get_option({"global.sharingMode": "file"}),
+        ):
+            rs = ReportSession(
+                self.io_loop, "mock_report.py", "", UploadedFileManager()
+            )
         rs._report.report_id = "TestReportID"
 
         orig_ctx = get_report_ctx()
@@ -192,7 +325,7 @@ class ReportSessionSerializationTest(tornado.testing.AsyncTestCase):
         self.assertEqual(StaticManifest.DONE, manifest.server_status)
 
         # Check that the deltas we sent match messages in storage
-        sent_messages = rs._report._master_queue._queue
+        sent_messages = list(rs._report._master_queue)
         received_messages = [
             storage.get_message(0, ForwardMsg),
             storage.get_message(1, ForwardMsg),
@@ -54,9 +54,17 @@ def _parse_msg(msg_string):
     return msg
 
 
+def _patch_config(options):
+    return patch.object(
+        config, "get_option", new=testutil.build_mock_config_get_option(options)
+    )
+
+
 class ReportTest(unittest.TestCase):
+    @_patch_config({"global.sharingMode": "s3"})
     def test_serialize_final_report(self):
         report = Report("/not/a/script.py", "")
+        self.assertTrue(report.retains_messages)
         _enqueue(report, NEW_REPORT_MSG)
         _enqueue(report, TEXT_DELTA_MSG)
         _enqueue(report, EMPTY_DELTA_MSG)
@@ -81,6 +89,32 @@ class ReportTest(unittest.TestCase):
         self.assertEqual("", manifest.internal_server_ip)
         self.assertEqual(0, manifest.server_port)
 
+    @_patch_config({"global.reportRetention": "full"})
+    def test_master_queue_byte_size(self):
+        """The master queue's size is kept up to date as messages are
+        enqueued, replaced, and cleared."""
+        report = Report("/not/a/script.py", "")
+        self.assertTrue(report.retains_messages)
+        _enqueue(report, NEW_REPORT_MSG)
+        _enqueue(report, TEXT_DELTA_MSG)
+        _enqueue(report, EMPTY_DELTA_MSG)
+
+        def master_queue_size():
+            return sum(msg.ByteSize() for msg in report._master_queue)
+
+        self.assertEqual(master_queue_size(), report.get_master_queue_byte_size())
+
+        # A delta replaces the one at its delta path.
+        msg = copy.deepcopy(TEXT_DELTA_MSG)
+        msg.metadata.delta_path[-1] = 1
+        msg.delta.new_element.text.body = "a much longer text than before"
+        report.enqueue(msg)
+        self.assertEqual(master_queue_size(), report.get_master_queue_byte_size())
+
+        report.clear()
+        self.assertEqual(master_queue_size(), report.get_master_queue_byte_size())
+        self.assertEqual(NEW_REPORT_MSG.ByteSize(), report.get_master_queue_byte_size())
+
     def test_serialize_running_report(self):
         report = Report("/not/a/script.py", "")
         _enqueue(report, NEW_REPORT_MSG)
@@ -115,6 +149,44 @@ class ReportTest(unittest.TestCase):
         self.assertEqual("external_ip", manifest.external_server_ip)
         self.assertEqual("internal_ip", manifest.internal_server_ip)
 
+    @parameterized.expand(
+        [
+            ("auto", "off", 0, False),
+            ("auto", "s3", 0, True),
+            ("auto", "off", 60, True),
+            ("full", "off", 0, True),
+            ("off", "s3", 60, False),
+        ]
+    )
+    def test_retains_messages(self, retention, sharing_mode, session_ttl, expected):
+        options = {
+            "global.reportRetention": retention,
+            "global.sharingMode": sharing_mode,
+            "server.disconnectedSessionTTL": session_ttl,
+        }
+        with _patch_config(options):
+            report = Report("/not/a/script.py", "")
+        self.assertEqual(expected, report.retains_messages)
+
+    @_patch_config({"global.reportRetention": "off"})
+    def test_no_retention(self):
+        """Without retention, the master queue only has the initial message,
+        and the browser queue is unaffected."""
+        report = Report("/not/a/script.py", "")
+        _enqueue(report, NEW_REPORT_MSG)
+        _enqueue(report, TEXT_DELTA_MSG)
+
+        self.assertEqual(1, len(list(report._master_queue)))
+        self.assertEqual(2, len(report.flush_browser_queue()))
+
+        report.reset_browser_queue()
+        msgs = report.flush_browser_queue()
+        self.assertEqual(["new_report"], [msg.WhichOneof("type") for msg in msgs])
+        self.assertEqual(msgs[0].ByteSize(), report.get_master_queue_byte_size())
+
+        with self.assertRaises(RuntimeError):
+            report.serialize_final_report_to_files()
+
     @parameterized.expand(
         [
             (None, None, "http://the_ip_address:8501"),
@@ -0,0 +1,109 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""script_cache unit tests."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from streamlit import script_cache
+from tests.testutil import build_mock_config_get_option
+
+
+def _patch_magic_enabled(enabled):
+    return patch(
+        "streamlit.script_cache.config.get_option",
+        new=build_mock_config_get_option({"runner.magicEnabled": enabled}),
+    )
+
+
+class ScriptCacheTest(unittest.TestCase):
+    def setUp(self):
+        script_cache.clear()
+        self._dir = tempfile.mkdtemp()
+        self._path = os.path.join(self._dir, "app.py")
+        self._write("x = 1\n", mtime=1000)
+
+    def tearDown(self):
+        script_cache.clear()
+        shutil.rmtree(self._dir)
+
+    def _write(self, source, mtime):
+        with open(self._path, "w") as f:
+            f.write(source)
+        os.utime(self._path, (mtime, mtime))
+
+    def _exec(self, code):
+        namespace = {}
+        exec(code, namespace)
+        return namespace["x"]
+
+    def test_reuses_code(self):
+        with patch(
+            "streamlit.script_cache._compile", wraps=script_cache._compile
+        ) as compile_mock:
+            code = script_cache.get_code(self._path)
+            self.assertIs(code, script_cache.get_code(self._path))
+            self.assertEqual(1, compile_mock.call_count)
+
+        self.assertEqual(1, self._exec(code))
+
+    def test_recompiles_changed_file(self):
+        script_cache.get_code(self._path)
+        self._write("x = 22\n", mtime=2000)
+        self.assertEqual(22, self._exec(script_cache.get_code(self._path)))
+
+    def test_touched_file_is_not_recompiled(self):
+        """A new mtime with the same contents reuses the code."""
+        code = script_cache.get_code(self._path)
+        self._write("x = 1\n", mtime=2000)
+        with patch("streamlit.script_cache._compile") as compile_mock:
+            self.assertIs(code, script_cache.get_code(self._path))
+        compile_mock.assert_not_called()
+
+    def test_invalidate(self):
+        """Changes that keep the same mtime and size are seen once the file
+        is invalidated."""
+        script_cache.get_code(self._path)
+        self._write("x = 2\n", mtime=1000)
+        self.assertEqual(1, self._exec(script_cache.get_code(self._path)))
+
+        script_cache.invalidate(self._path)
+        self.assertEqual(2, self._exec(script_cache.get_code(self._path)))
+
+    def test_magic_setting_is_part_of_key(self):
+        with _patch_magic_enabled(True):
+            with_magic = script_cache.get_code(self._path)
+        with _patch_magic_enabled(False):
+            without_magic = script_cache.get_code(self._path)
+        self.assertIsNot(with_magic, without_magic)
+
+    def test_compile_errors_are_not_cached(self):
+        self._write("x = (\n", mtime=2000)
+        with patch(
+            "streamlit.script_cache._compile", wraps=script_cache._compile
+        ) as compile_mock:
+            with self.assertRaises(SyntaxError):
+                script_cache.get_code(self._path)
+            with self.assertRaises(SyntaxError):
+                script_cache.get_code(self._path)
+            self.assertEqual(2, compile_mock.call_count)
+
+    def test_respects_encoding_header(self):
+        with open(self._path, "wb") as f:
+            f.write("# -*- coding: latin-1 -*-\nx = 'é'\n".encode("latin-1"))
+        self.assertEqual("é", self._exec(script_cache.get_code(self._path)))
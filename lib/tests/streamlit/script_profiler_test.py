@@ -0,0 +1,95 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""script_profiler.py unit tests"""
+
+import sys
+import unittest
+
+from streamlit import config
+from streamlit import script_profiler
+from streamlit.config_option import ConfigOption
+from streamlit.script_profiler import Profile
+from streamlit.script_profiler import ScriptProfiler
+
+
+class ScriptProfilerTest(unittest.TestCase):
+    def tearDown(self):
+        script_profiler.clear_profiles()
+        config._set_option(
+            "runner.enableProfiler", False, ConfigOption.DEFAULT_DEFINITION
+        )
+
+    def test_maybe_profile(self):
+        """Runs are only profiled when enabled and asked for."""
+        self.assertNotIsInstance(
+            script_profiler.maybe_profile("id", "script.py", "_stprofile=1"),
+            ScriptProfiler,
+        )
+
+        config._set_option("runner.enableProfiler", True, "test")
+        for query_string in ["", "a=1", "stprofile=1"]:
+            self.assertNotIsInstance(
+                script_profiler.maybe_profile("id", "script.py", query_string),
+                ScriptProfiler,
+            )
+        for query_string in ["_stprofile=1", "a=1&_stprofile", "_stprofile="]:
+            self.assertIsInstance(
+                script_profiler.maybe_profile("id", "script.py", query_string),
+                ScriptProfiler,
+            )
+
+    def test_collapsed_stacks(self):
+        profile = Profile("id", "script.py")
+        profile.stack_counts[("<module> (script.py:3)", "streamlit.foo")] += 2
+        profile.stack_counts[("<module> (script.py:1)",)] += 1
+
+        self.assertEqual(3, profile.num_samples)
+        self.assertEqual(
+            "<module> (script.py:1) 1\n<module> (script.py:3);streamlit.foo 2\n",
+            profile.to_collapsed_stacks(),
+        )
+
+    def test_script_stack(self):
+        """Stacks start at the script's module frame."""
+        frame = sys._getframe()
+        self.assertIsNone(script_profiler._get_script_stack(frame, "script.py"))
+
+        code = compile(
+            "def f():\n    return get_stack(sys._getframe(), 'script.py')\n"
+            "stack = f()\n",
+            "script.py",
+            "exec",
+        )
+        namespace = {
+            "sys": sys,
+            "get_stack": script_profiler._get_script_stack,
+            "__name__": "__main__",
+        }
+        exec(code, namespace)
+        self.assertEqual(
+            ("<module> (script.py:3)", "f (script.py:2)"), namespace["stack"]
+        )
+
+    def test_ring_buffer(self):
+        """Only the most recent profiles are kept."""
+        for i in range(script_profiler.MAX_PROFILES + 1):
+            with ScriptProfiler(str(i), "script.py"):
+                pass
+
+        profiles = script_profiler.get_profiles()
+        self.assertEqual(script_profiler.MAX_PROFILES, len(profiles))
+        self.assertEqual(str(script_profiler.MAX_PROFILES), profiles[0].session_id)
+        self.assertIs(profiles[0], script_profiler.get_profile(0))
+        self.assertIsNone(script_profiler.get_profile(script_profiler.MAX_PROFILES))
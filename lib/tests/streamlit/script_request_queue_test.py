@@ -17,6 +17,7 @@
 import time
 import unittest
 from threading import Thread, Lock
+from unittest.mock import patch
 
 from streamlit.script_request_queue import RerunData
 from streamlit.script_request_queue import ScriptRequestQueue
@@ -30,6 +31,13 @@ def _create_widget(id, states):
     return states.widgets[-1]
 
 
+def _patch_time(now):
+    """Patch the queue's clock to return now[0]."""
+    mock_time = patch("streamlit.script_request_queue.time").start()
+    mock_time.monotonic.side_effect = lambda: now[0]
+    return mock_time
+
+
 class ScriptRequestQueueTest(unittest.TestCase):
     def test_dequeue(self):
         """Test that we can enqueue and dequeue on different threads"""
@@ -69,6 +77,13 @@ class ScriptRequestQueueTest(unittest.TestCase):
         thread.join(timeout=0.25)
         self.assertFalse(thread.is_alive())
 
+    def test_dequeue_empty_skips_lock(self):
+        """The ScriptRunner dequeues on every message its script enqueues,
+        so an empty queue doesn't wait for the lock."""
+        queue = ScriptRequestQueue()
+        with queue._lock:
+            self.assertEqual((None, None), queue.dequeue())
+
     def test_rerun_data_coalescing(self):
         """Test that multiple RERUN requests get coalesced with
         expected values.
@@ -143,3 +158,86 @@ class ScriptRequestQueueTest(unittest.TestCase):
 
         # We should have no more events
         self.assertEqual((None, None), queue.dequeue(), "Expected empty event queue")
+
+    def test_rerun_debounce(self):
+        """A RERUN isn't dequeued until the debounce window has passed without
+        another RERUN, and RERUNs enqueued meanwhile are coalesced."""
+        now = [100.0]
+        _patch_time(now)
+        self.addCleanup(patch.stopall)
+        queue = ScriptRequestQueue(debounce_secs=0.1)
+
+        states = WidgetStates()
+        _create_widget("trigger", states).trigger_value = True
+        _create_widget("int", states).int_value = 1
+        queue.enqueue(ScriptRequest.RERUN, RerunData(widget_states=states))
+
+        now[0] = 100.05
+        self.assertEqual((None, None), queue.dequeue())
+        self.assertAlmostEqual(0.05, queue.time_until_ready())
+
+        states = WidgetStates()
+        _create_widget("trigger", states).trigger_value = False
+        _create_widget("int", states).int_value = 2
+        queue.enqueue(ScriptRequest.RERUN, RerunData(widget_states=states))
+
+        # The new RERUN restarted the window.
+        now[0] = 100.12
+        self.assertEqual((None, None), queue.dequeue())
+        self.assertTrue(queue.has_request)
+
+        now[0] = 100.15
+        self.assertEqual(0, queue.time_until_ready())
+        event, data = queue.dequeue()
+        self.assertEqual(ScriptRequest.RERUN, event)
+
+        widgets = Widgets()
+        widgets.set_state(data.widget_states)
+        self.assertEqual(True, widgets.get_widget_value("trigger"))
+        self.assertEqual(2, widgets.get_widget_value("int"))
+
+        self.assertEqual((None, None), queue.dequeue())
+        self.assertIsNone(queue.time_until_ready())
+
+    def test_min_rerun_interval(self):
+        """A RERUN isn't dequeued until the minimum interval since the last
+        dequeued RERUN has passed. Other requests aren't held back."""
+        now = [100.0]
+        _patch_time(now)
+        self.addCleanup(patch.stopall)
+        queue = ScriptRequestQueue(min_interval_secs=1)
+
+        queue.enqueue(ScriptRequest.RERUN, RerunData())
+        self.assertEqual(ScriptRequest.RERUN, queue.dequeue()[0])
+
+        now[0] = 100.5
+        queue.enqueue(ScriptRequest.RERUN, RerunData())
+        self.assertEqual((None, None), queue.dequeue())
+
+        queue.enqueue(ScriptRequest.SHUTDOWN)
+        self.assertEqual(ScriptRequest.SHUTDOWN, queue.dequeue()[0])
+        self.assertEqual((None, None), queue.dequeue())
+
+        now[0] = 101.0
+        self.assertEqual(ScriptRequest.RERUN, queue.dequeue()[0])
+
+    def test_dequeue_wait(self):
+        """dequeue(wait=True) waits for a held back RERUN, but returns a
+        SHUTDOWN that's enqueued meanwhile right away."""
+        queue = ScriptRequestQueue(debounce_secs=0.1)
+
+        queue.enqueue(ScriptRequest.RERUN, RerunData())
+        start = time.monotonic()
+        self.assertEqual(ScriptRequest.RERUN, queue.dequeue(wait=True)[0])
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+
+        queue = ScriptRequestQueue(debounce_secs=10)
+        queue.enqueue(ScriptRequest.RERUN, RerunData())
+        dequeued = []
+        thread = Thread(target=lambda: dequeued.append(queue.dequeue(wait=True)))
+        thread.start()
+        time.sleep(0.05)
+        queue.enqueue(ScriptRequest.SHUTDOWN)
+        thread.join(timeout=1)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(ScriptRequest.SHUTDOWN, dequeued[0][0])
@@ -0,0 +1,118 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""ScriptThreadPool unit tests."""
+
+import threading
+import time
+import unittest
+from collections import defaultdict
+from unittest.mock import MagicMock, patch
+
+from streamlit import metrics
+from streamlit.script_thread_pool import ScriptThreadPool
+
+
+def _wait_for(condition, timeout=2):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("Timed out")
+        time.sleep(0.01)
+
+
+class ScriptThreadPoolTest(unittest.TestCase):
+    def test_runs_jobs_in_order(self):
+        """With one thread, jobs run one at a time, in the order they were
+        submitted."""
+        pool = ScriptThreadPool(1)
+        release = threading.Event()
+        ran = []
+
+        def make_job(name):
+            def job():
+                ran.append(name)
+                release.wait()
+
+            return job
+
+        for name in ["a", "b", "c"]:
+            pool.submit(make_job(name))
+
+        _wait_for(lambda: ran == ["a"])
+        self.assertEqual(2, pool.num_waiting)
+
+        release.set()
+        _wait_for(lambda: ran == ["a", "b", "c"])
+
+    def test_limits_concurrency(self):
+        pool = ScriptThreadPool(2)
+        release = threading.Event()
+        lock = threading.Lock()
+        running = [0]
+        max_running = [0]
+        done = []
+
+        def job():
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            release.wait()
+            with lock:
+                running[0] -= 1
+                done.append(True)
+
+        for _ in range(5):
+            pool.submit(job)
+
+        _wait_for(lambda: running[0] == 2)
+        self.assertEqual(3, pool.num_waiting)
+
+        release.set()
+        _wait_for(lambda: len(done) == 5)
+        self.assertEqual(2, max_running[0])
+
+    def test_queue_positions(self):
+        """Waiting jobs are told their place in line, and 0 when they
+        start."""
+        pool = ScriptThreadPool(1)
+        release = threading.Event()
+        positions = defaultdict(list)
+
+        def on_position_changed(name):
+            return lambda position: positions[name].append(position)
+
+        pool.submit(release.wait, on_position_changed("a"))
+        _wait_for(lambda: pool.num_waiting == 0)
+        pool.submit(release.wait, on_position_changed("b"))
+        pool.submit(lambda: None, on_position_changed("c"))
+
+        self.assertEqual([], positions["a"])
+        self.assertEqual([1], positions["b"])
+        self.assertEqual([2], positions["c"])
+
+        release.set()
+        _wait_for(lambda: positions["c"] == [2, 1, 0])
+        self.assertEqual([1, 0], positions["b"])
+
+    def test_queue_metrics(self):
+        mock_metrics = defaultdict(MagicMock)
+        with patch.object(metrics.Client, "get", side_effect=mock_metrics.__getitem__):
+            pool = ScriptThreadPool(1)
+            done = threading.Event()
+            pool.submit(done.set)
+            self.assertTrue(done.wait(2))
+
+        mock_metrics["streamlit_script_queue_wait_seconds"].observe.assert_called_once()
+        mock_metrics["streamlit_script_queue_length"].set.assert_called_with(0)
@@ -0,0 +1,212 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests ProcessScriptRunner functionality"""
+
+import os
+import threading
+import time
+import unittest
+from typing import Any, List
+from unittest import mock
+
+from streamlit import process_script_runner
+from streamlit.media_file_manager import media_file_manager
+from streamlit.process_script_runner import ProcessScriptRunner
+from streamlit.process_script_runner import ScriptProcessPool
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.report import Report
+from streamlit.report_queue import ReportQueue
+from streamlit.script_request_queue import RerunData
+from streamlit.script_request_queue import ScriptRequest
+from streamlit.script_request_queue import ScriptRequestQueue
+from streamlit.script_runner import ScriptRunnerEvent
+from streamlit.uploaded_file_manager import UploadedFileManager
+
+# Script processes take a while to start.
+TIMEOUT_SECS = 30
+
+
+class ProcessScriptRunnerTest(unittest.TestCase):
+    # Set in setUpClass.
+    pool = None  # type: ScriptProcessPool
+    pool_patch = None  # type: Any
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ScriptProcessPool(1)
+        cls.pool.start()
+        cls.pool_patch = mock.patch.object(process_script_runner, "_pool", cls.pool)
+        cls.pool_patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool_patch.stop()
+        for process in cls.pool._idle_processes:
+            process.kill()
+
+    def test_run_script(self):
+        """Tests that we can run a script to completion in another process."""
+        scriptrunner = TestProcessScriptRunner("good_script.py")
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+        scriptrunner.join()
+
+        self.assertEqual(
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+            scriptrunner.events,
+        )
+        self.assertEqual(["complete! 👨‍🎤"], scriptrunner.text_deltas())
+
+    def test_compile_error(self):
+        """Tests that compile errors are passed back from the process."""
+        scriptrunner = TestProcessScriptRunner("compile_error.py.txt")
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+        scriptrunner.join()
+
+        self.assertEqual(
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+            scriptrunner.events,
+        )
+        self.assertIsInstance(scriptrunner.exception, SyntaxError)
+
+    def test_stop_script(self):
+        """Tests that requests reach the process while the script runs."""
+        scriptrunner = TestProcessScriptRunner("infinite_loop.py")
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+
+        scriptrunner.wait_for_event(ScriptRunnerEvent.SCRIPT_STARTED)
+        scriptrunner.enqueue_rerun()
+        time.sleep(0.1)
+        scriptrunner.enqueue_stop()
+        scriptrunner.join()
+
+        self.assertEqual(
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+            scriptrunner.events,
+        )
+
+    def test_process_exit(self):
+        """Tests that a run whose process dies isn't reported as finished."""
+        scriptrunner = TestProcessScriptRunner("exit_script.py")
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+        scriptrunner.join()
+
+        self.assertEqual(
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+            scriptrunner.events,
+        )
+        message = "Script process exited unexpectedly (exit code 3)"
+        self.assertEqual(message, str(scriptrunner.exception))
+        self.assertEqual(
+            message, scriptrunner.deltas()[-1].new_element.exception.message
+        )
+
+    def test_media_files(self):
+        """Tests that media files are mirrored in the server process."""
+        scriptrunner = TestProcessScriptRunner("media_script.py")
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+        scriptrunner.join()
+
+        deltas = scriptrunner.deltas()
+        self.assertEqual(1, len(deltas))
+        url = deltas[0].new_element.audio.url
+        media_file = media_file_manager.get(os.path.basename(url))
+        self.assertEqual(b"not really audio", media_file.content)
+
+        media_file_manager.clear_session_files(scriptrunner.session_id)
+        media_file_manager.del_expired_files()
+
+
+class TestProcessScriptRunner(ProcessScriptRunner):
+    """Subclasses ProcessScriptRunner to provide some testing features."""
+
+    session_id = "test session id"
+
+    def __init__(self, script_name):
+        self.report_queue = ReportQueue()
+        self.script_request_queue = ScriptRequestQueue()
+        script_path = os.path.join(os.path.dirname(__file__), "test_data", script_name)
+
+        super(TestProcessScriptRunner, self).__init__(
+            session_id=self.session_id,
+            report=Report(script_path, "test command line"),
+            enqueue_forward_msg=self.report_queue.enqueue,
+            client_state=ClientState(),
+            request_queue=self.script_request_queue,
+            uploaded_file_mgr=UploadedFileManager(),
+        )
+
+        self.events = []  # type: List[ScriptRunnerEvent]
+        self.exception = None
+        self._events_changed = threading.Condition()
+
+        def record_event(event, exception=None, **kwargs):
+            with self._events_changed:
+                self.events.append(event)
+                if exception is not None:
+                    self.exception = exception
+                self._events_changed.notify_all()
+
+        self.on_event.connect(record_event, weak=False)
+
+    def enqueue_rerun(self):
+        self.script_request_queue.enqueue(ScriptRequest.RERUN, RerunData())
+
+    def enqueue_stop(self):
+        self.script_request_queue.enqueue(ScriptRequest.STOP)
+
+    def wait_for_event(self, event):
+        with self._events_changed:
+            if not self._events_changed.wait_for(
+                lambda: event in self.events, TIMEOUT_SECS
+            ):
+                raise RuntimeError("Timed out waiting for %s" % event)
+
+    def join(self):
+        self.wait_for_event(ScriptRunnerEvent.SHUTDOWN)
+        if self._pump_thread is not None:
+            self._pump_thread.join()
+
+    def deltas(self):
+        return [msg.delta for msg in self.report_queue if msg.HasField("delta")]
+
+    def text_deltas(self) -> List[str]:
+        return [
+            delta.new_element.text.body
+            for delta in self.deltas()
+            if delta.HasField("new_element") and delta.new_element.HasField("text")
+        ]
@@ -17,11 +17,17 @@ from typing import List
 import os
 import sys
 import time
+import types
 import unittest
+from unittest.mock import patch
 
 from parameterized import parameterized
 from tornado.testing import AsyncTestCase
 
+from streamlit import config
+from streamlit import script_profiler
+from streamlit.fragment import Fragments
+from streamlit.config_option import ConfigOption
 from streamlit.media_file_manager import media_file_manager
 from streamlit.proto.ClientState_pb2 import ClientState
 from streamlit.proto.WidgetStates_pb2 import WidgetStates
@@ -32,6 +38,7 @@ from streamlit.script_request_queue import ScriptRequest
 from streamlit.script_request_queue import ScriptRequestQueue
 from streamlit.script_runner import ScriptRunner
 from streamlit.script_runner import ScriptRunnerEvent
+from streamlit.script_thread_pool import ScriptThreadPool
 
 text_utf = "complete! 👨‍🎤"
 text_no_encoding = text_utf
@@ -101,6 +108,86 @@ class ScriptRunnerTest(AsyncTestCase):
             (" ScriptRunner should set the __main__.__file__" "attribute correctly"),
         )
 
+    def test_run_script_in_thread_pool(self):
+        """Tests that scripts wait for a pooled thread when
+        runner.maxScriptThreads is set."""
+        config._set_option("runner.maxScriptThreads", 1, "test")
+        try:
+            with patch("streamlit.script_thread_pool._pool", ScriptThreadPool(1)):
+                first = TestScriptRunner("slow_script.py")
+                first.enqueue_rerun()
+                first.start()
+                second = TestScriptRunner("good_script.py")
+                second.enqueue_rerun()
+                second.start()
+
+                for scriptrunner in (first, second):
+                    deadline = time.time() + 5
+                    while ScriptRunnerEvent.SHUTDOWN not in scriptrunner.events:
+                        self.assertLess(time.time(), deadline)
+                        time.sleep(0.01)
+        finally:
+            config._set_option(
+                "runner.maxScriptThreads", 0, ConfigOption.DEFAULT_DEFINITION
+            )
+
+        self._assert_no_exceptions(second)
+        self._assert_events(
+            second,
+            [
+                ScriptRunnerEvent.QUEUE_POSITION_CHANGED,
+                ScriptRunnerEvent.QUEUE_POSITION_CHANGED,
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+        )
+        self._assert_text_deltas(second, [text_utf])
+
+    def test_chained_reruns(self):
+        """Tests that a long chain of reruns doesn't grow the stack."""
+        state = types.ModuleType("rerun_chain_state")
+        state.num_runs = 0
+        state.max_runs = 1000
+        state.stack_depths = []
+
+        with patch.dict(sys.modules, {"rerun_chain_state": state}):
+            scriptrunner = TestScriptRunner("rerun_chain_script.py")
+            scriptrunner.enqueue_rerun()
+            scriptrunner.start()
+            scriptrunner.join()
+
+        self._assert_no_exceptions(scriptrunner)
+        self.assertEqual(1000, state.num_runs)
+        self.assertEqual(1, len(set(state.stack_depths)))
+        self.assertEqual(
+            1000, scriptrunner.events.count(ScriptRunnerEvent.SCRIPT_STARTED)
+        )
+
+    def test_profile(self):
+        """Tests that runs are profiled when the query string asks for it."""
+        script_profiler.clear_profiles()
+        config._set_option("runner.enableProfiler", True, "test")
+        try:
+            scriptrunner = TestScriptRunner("slow_script.py")
+            scriptrunner.enqueue_rerun(query_string="_stprofile=1")
+            scriptrunner.start()
+            scriptrunner.join()
+        finally:
+            config._set_option(
+                "runner.enableProfiler", False, ConfigOption.DEFAULT_DEFINITION
+            )
+
+        self._assert_no_exceptions(scriptrunner)
+        profiles = script_profiler.get_profiles()
+        self.assertEqual(1, len(profiles))
+        self.assertEqual("test session id", profiles[0].session_id)
+        self.assertGreater(profiles[0].num_samples, 0)
+        self.assertIn(
+            "<module> (slow_script.py:19) ", profiles[0].to_collapsed_stacks()
+        )
+        script_profiler.clear_profiles()
+
     def test_compile_error(self):
         """Tests that we get an exception event when a script can't compile."""
         scriptrunner = TestScriptRunner("compile_error.py.txt")
@@ -184,6 +271,93 @@ class ScriptRunnerTest(AsyncTestCase):
         )
         self._assert_text_deltas(scriptrunner, ["loop_forever"])
 
+    @parameterized.expand(
+        [
+            ("stop", ScriptRequest.STOP, ScriptRunnerEvent.SHUTDOWN),
+            ("rerun", ScriptRequest.RERUN, ScriptRunnerEvent.SCRIPT_STARTED),
+        ]
+    )
+    def test_interrupt_script(self, _, request, next_event):
+        """Tests that runner.interruptScripts stops a script that isn't
+        calling Streamlit."""
+        config._set_option("runner.interruptScripts", True, "test")
+        try:
+            scriptrunner = TestScriptRunner("busy_loop.py")
+            scriptrunner.enqueue_rerun()
+            scriptrunner.start()
+
+            time.sleep(0.1)
+            start = time.time()
+            data = RerunData() if request == ScriptRequest.RERUN else None
+            scriptrunner.script_request_queue.enqueue(request, data)
+            scriptrunner.request_interrupt()
+            while len(scriptrunner.events) < 3:
+                time.sleep(0.01)
+            elapsed = time.time() - start
+
+            scriptrunner.enqueue_shutdown()
+            scriptrunner.request_interrupt()
+            scriptrunner.join()
+        finally:
+            config._set_option(
+                "runner.interruptScripts", False, ConfigOption.DEFAULT_DEFINITION
+            )
+
+        self._assert_no_exceptions(scriptrunner)
+        self.assertLess(elapsed, 2)
+        self.assertEqual(
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                next_event,
+            ],
+            scriptrunner.events[:3],
+        )
+        self.assertNotIn("done", scriptrunner.text_deltas())
+
+    def test_interrupt_inside_streamlit(self):
+        """Tests that runner.interruptScripts waits until a script is out of
+        Streamlit's own code before stopping it."""
+        config._set_option("runner.interruptScripts", True, "test")
+        try:
+            scriptrunner = TestScriptRunner("busy_loop.py")
+            enqueue = scriptrunner.report_queue.enqueue
+
+            def interrupted_enqueue(msg):
+                scriptrunner.enqueue_stop()
+                scriptrunner.request_interrupt()
+                # Spin, so an interrupt would be raised right here.
+                deadline = time.time() + 0.2
+                while time.time() < deadline:
+                    pass
+                enqueue(msg)
+
+            scriptrunner.report_queue.enqueue = interrupted_enqueue
+            scriptrunner.enqueue_rerun()
+            scriptrunner.start()
+
+            while len(scriptrunner.events) < 2:
+                time.sleep(0.01)
+
+            scriptrunner.report_queue.enqueue = enqueue
+            scriptrunner.enqueue_shutdown()
+            scriptrunner.join()
+        finally:
+            config._set_option(
+                "runner.interruptScripts", False, ConfigOption.DEFAULT_DEFINITION
+            )
+
+        self._assert_no_exceptions(scriptrunner)
+        self._assert_events(
+            scriptrunner,
+            [
+                ScriptRunnerEvent.SCRIPT_STARTED,
+                ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                ScriptRunnerEvent.SHUTDOWN,
+            ],
+        )
+        self._assert_text_deltas(scriptrunner, ["busy_loop"])
+
     def test_shutdown(self):
         """Test that we can shutdown while a script is running."""
         scriptrunner = TestScriptRunner("infinite_loop.py")
@@ -255,6 +429,49 @@ class ScriptRunnerTest(AsyncTestCase):
         scriptrunner.join()
         self._assert_no_exceptions(scriptrunner)
 
+    def test_fragment(self):
+        """Tests that changing a fragment's widget reruns just the
+        fragment, and changing any other widget reruns the whole script."""
+        fragments = Fragments()
+        scriptrunner = TestScriptRunner("fragment_script.py", fragments=fragments)
+        scriptrunner.enqueue_rerun()
+        scriptrunner.start()
+        scriptrunner.join()
+
+        self._assert_no_exceptions(scriptrunner)
+        self._assert_text_deltas(
+            scriptrunner, ["top", "fragment False", "bottom False"]
+        )
+        self.assertEqual([None], scriptrunner.fragment_delta_paths)
+        fragment_id = scriptrunner.get_widget_id("checkbox", "fragment checkbox")
+        other_id = scriptrunner.get_widget_id("checkbox", "other checkbox")
+
+        def rerun(client_state, widget_id):
+            states = WidgetStates()
+            states.CopyFrom(client_state.widget_states)
+            _create_widget(widget_id, states).bool_value = True
+
+            scriptrunner = TestScriptRunner(
+                "fragment_script.py", client_state=client_state, fragments=fragments
+            )
+            scriptrunner.enqueue_rerun(widget_states=states)
+            scriptrunner.start()
+            scriptrunner.join()
+            self._assert_no_exceptions(scriptrunner)
+            return scriptrunner
+
+        # The fragment writes into its container, the second element of main.
+        scriptrunner = rerun(scriptrunner.client_state, fragment_id)
+        self._assert_text_deltas(scriptrunner, ["fragment True"])
+        self.assertEqual([[0, 1]], scriptrunner.fragment_delta_paths)
+        for msg in scriptrunner.report_queue:
+            if msg.HasField("delta"):
+                self.assertEqual([0, 1], msg.metadata.delta_path[:2])
+
+        scriptrunner = rerun(scriptrunner.client_state, other_id)
+        self._assert_text_deltas(scriptrunner, ["top", "fragment True", "bottom True"])
+        self.assertEqual([None], scriptrunner.fragment_delta_paths)
+
     def test_coalesce_rerun(self):
         """Tests that multiple pending rerun requests get coalesced."""
         scriptrunner = TestScriptRunner("good_script.py")
@@ -413,7 +630,7 @@ class ScriptRunnerTest(AsyncTestCase):
 class TestScriptRunner(ScriptRunner):
     """Subclasses ScriptRunner to provide some testing features."""
 
-    def __init__(self, script_name):
+    def __init__(self, script_name, client_state=None, fragments=None):
         """Initializes the ScriptRunner for the given script_name"""
         # DeltaGenerator deltas will be enqueued into self.report_queue.
         self.report_queue = ReportQueue()
@@ -429,8 +646,9 @@ class TestScriptRunner(ScriptRunner):
             session_id="test session id",
             report=Report(script_path, "test command line"),
             enqueue_forward_msg=enqueue_fn,
-            client_state=ClientState(),
+            client_state=client_state if client_state is not None else ClientState(),
             request_queue=self.script_request_queue,
+            fragments=fragments,
         )
 
         # Accumulates uncaught exceptions thrown by our run thread.
@@ -439,14 +657,25 @@ class TestScriptRunner(ScriptRunner):
         # Accumulates all ScriptRunnerEvents emitted by us.
         self.events = []
 
+        # The fragment_delta_path of each SCRIPT_STARTED event.
+        self.fragment_delta_paths = []
+
+        # The ClientState we shut down with.
+        self.client_state = None
+
         def record_event(event, **kwargs):
             self.events.append(event)
+            if event == ScriptRunnerEvent.SCRIPT_STARTED:
+                self.fragment_delta_paths.append(kwargs["fragment_delta_path"])
+            elif event == ScriptRunnerEvent.SHUTDOWN:
+                self.client_state = kwargs["client_state"]
 
         self.on_event.connect(record_event, weak=False)
 
-    def enqueue_rerun(self, argv=None, widget_states=None):
+    def enqueue_rerun(self, argv=None, widget_states=None, query_string=""):
         self.script_request_queue.enqueue(
-            ScriptRequest.RERUN, RerunData(widget_states=widget_states)
+            ScriptRequest.RERUN,
+            RerunData(query_string=query_string, widget_states=widget_states),
         )
 
     def enqueue_stop(self):
@@ -463,7 +692,7 @@ class TestScriptRunner(ScriptRunner):
 
     def _run_script(self, rerun_data):
         self.report_queue.clear()
-        super(TestScriptRunner, self)._run_script(rerun_data)
+        return super(TestScriptRunner, self)._run_script(rerun_data)
 
     def join(self):
         """Joins the run thread, if it was started"""
@@ -476,7 +705,7 @@ class TestScriptRunner(ScriptRunner):
 
     def deltas(self):
         """Return the delta messages in our ReportQueue"""
-        return [msg.delta for msg in self.report_queue._queue if msg.HasField("delta")]
+        return [msg.delta for msg in self.report_queue if msg.HasField("delta")]
 
     def text_deltas(self) -> List[str]:
         """Return the string contents of text deltas in our ReportQueue"""
@@ -0,0 +1,29 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import streamlit as st
+
+st.text("top")
+
+
+@st.experimental_fragment
+def fragment():
+    value = st.checkbox("fragment checkbox")
+    st.text("fragment %s" % value)
+
+
+fragment()
+
+other_value = st.checkbox("other checkbox")
+st.text("bottom %s" % other_value)
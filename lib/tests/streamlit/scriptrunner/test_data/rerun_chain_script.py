@@ -0,0 +1,33 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Reruns itself until rerun_chain_state.num_runs reaches
+rerun_chain_state.max_runs. The test that runs this puts rerun_chain_state in
+sys.modules."""
+
+import sys
+
+import rerun_chain_state as state
+import streamlit as st
+
+depth = 0
+frame = sys._getframe()
+while frame is not None:
+    depth += 1
+    frame = frame.f_back
+state.stack_depths.append(depth)
+
+state.num_runs += 1
+if state.num_runs < state.max_runs:
+    st.experimental_rerun()
@@ -0,0 +1,178 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""SentElements unit tests."""
+
+import unittest
+from unittest.mock import patch
+
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.server.sent_elements import SentElements
+
+
+def _new_report_msg(script_path="/app.py", fragment_delta_path=None):
+    msg = ForwardMsg()
+    msg.new_report.script_path = script_path
+    if fragment_delta_path is not None:
+        msg.new_report.fragment_delta_path[:] = fragment_delta_path
+    return msg
+
+
+def _finished_msg(status=ForwardMsg.FINISHED_SUCCESSFULLY):
+    msg = ForwardMsg()
+    msg.report_finished = status
+    return msg
+
+
+def _text_msg(delta_path, body):
+    msg = ForwardMsg()
+    msg.metadata.delta_path[:] = delta_path
+    msg.delta.new_element.text.body = body
+    return msg
+
+
+def _block_msg(delta_path):
+    msg = ForwardMsg()
+    msg.metadata.delta_path[:] = delta_path
+    msg.delta.add_block.SetInParent()
+    return msg
+
+
+def _is_unchanged(msg):
+    return msg.delta.WhichOneof("type") == "element_unchanged"
+
+
+class SentElementsTest(unittest.TestCase):
+    def setUp(self):
+        self.sent_elements = SentElements()
+
+    def _run(self, msgs, **kwargs):
+        """Process a full run that sends msgs, and return what we'd send."""
+        result = [self.sent_elements.process(_new_report_msg(**kwargs))]
+        result += [self.sent_elements.process(msg) for msg in msgs]
+        result.append(self.sent_elements.process(_finished_msg()))
+        return result[1:-1]
+
+    def test_unchanged_element(self):
+        """An element that's the same as in the last run is replaced with an
+        element_unchanged message."""
+        first = self._run([_text_msg([0, 0], "a"), _text_msg([0, 1], "b")])
+        self.assertFalse(any(_is_unchanged(msg) for msg in first))
+
+        msgs = [_text_msg([0, 0], "a"), _text_msg([0, 1], "c")]
+        second = self._run(msgs)
+        self.assertTrue(_is_unchanged(second[0]))
+        self.assertEqual([0, 0], list(second[0].metadata.delta_path))
+        self.assertIs(msgs[1], second[1])
+
+    def test_other_messages_are_unchanged(self):
+        msg = _new_report_msg()
+        self.assertIs(msg, self.sent_elements.process(msg))
+        msg = _finished_msg()
+        self.assertIs(msg, self.sent_elements.process(msg))
+
+    def test_dimensions(self):
+        """An element with new dimensions is sent again."""
+        self._run([_text_msg([0, 0], "a")])
+
+        msg = _text_msg([0, 0], "a")
+        msg.metadata.element_dimension_spec.width = 100
+        self.assertIs(msg, self._run([msg])[0])
+
+    def test_replaced_elements(self):
+        """An element that a block or add_rows replaced is sent again."""
+        self._run([_text_msg([0, 0], "a"), _text_msg([0, 1, 0], "b")])
+
+        # Another run replaces the element with a block, and the block with
+        # an element.
+        self._run([_block_msg([0, 0]), _text_msg([0, 1], "c")])
+        self.assertEqual(1, len(self.sent_elements))
+
+        msg = _text_msg([0, 0], "a")
+        self.assertIs(msg, self._run([msg])[0])
+
+        add_rows_msg = ForwardMsg()
+        add_rows_msg.metadata.delta_path[:] = [0, 0]
+        add_rows_msg.delta.add_rows.SetInParent()
+        self._run([_text_msg([0, 0], "a"), add_rows_msg])
+
+        msg = _text_msg([0, 0], "a")
+        self.assertIs(msg, self._run([msg])[0])
+
+    def test_replaced_blocks(self):
+        """An element that replaces a block replaces everything in it, and
+        only replacing a block means looking for its contents."""
+        with patch.object(
+            self.sent_elements,
+            "_remove_descendants",
+            wraps=self.sent_elements._remove_descendants,
+        ) as remove_descendants:
+            self._run(
+                [
+                    _block_msg([0, 0]),
+                    _block_msg([0, 0, 0]),
+                    _text_msg([0, 0, 0, 0], "a"),
+                    _text_msg([0, 0, 1], "b"),
+                    _text_msg([0, 0], "c"),
+                    _text_msg([0, 1], "d"),
+                ]
+            )
+            remove_descendants.assert_called_once_with((0, 0))
+
+        self.assertEqual(2, len(self.sent_elements))
+        self.assertEqual(set(), self.sent_elements._block_paths)
+
+    def test_stale_elements(self):
+        """Elements the last run didn't write are sent again."""
+        self._run([_text_msg([0, 0], "a"), _text_msg([0, 1], "b")])
+        self._run([_text_msg([0, 0], "a")])
+        self.assertEqual(1, len(self.sent_elements))
+
+        msg = _text_msg([0, 1], "b")
+        self.assertIs(msg, self._run([_text_msg([0, 0], "a"), msg])[1])
+
+    def test_unsuccessful_runs_keep_elements(self):
+        """The browser doesn't clear stale elements when a run fails."""
+        self._run([_text_msg([0, 0], "a"), _text_msg([0, 1], "b")])
+
+        self.sent_elements.process(_new_report_msg())
+        self.sent_elements.process(
+            _finished_msg(ForwardMsg.FINISHED_WITH_COMPILE_ERROR)
+        )
+        self.assertEqual(2, len(self.sent_elements))
+
+    def test_fragment_runs(self):
+        """A fragment run only clears stale elements inside the fragment."""
+        self._run(
+            [
+                _text_msg([0, 0], "a"),
+                _block_msg([0, 1]),
+                _text_msg([0, 1, 0], "b"),
+                _text_msg([0, 1, 1], "c"),
+            ]
+        )
+
+        result = self._run([_text_msg([0, 1, 0], "b")], fragment_delta_path=[0, 1])
+        self.assertTrue(_is_unchanged(result[0]))
+        self.assertEqual(2, len(self.sent_elements))
+
+        result = self._run([_text_msg([0, 0], "a")])
+        self.assertTrue(_is_unchanged(result[0]))
+
+    def test_new_script(self):
+        """Everything is sent again when the browser runs another script."""
+        self._run([_text_msg([0, 0], "a")])
+
+        msg = _text_msg([0, 0], "a")
+        self.assertIs(msg, self._run([msg], script_path="/other_app.py")[0])
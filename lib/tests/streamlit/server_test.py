@@ -13,28 +13,38 @@
 # limitations under the License.
 
 """Server.py unit tests"""
+import json
 import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict
 from unittest import mock
 from unittest.mock import MagicMock, patch
 import unittest
 
 import pytest
+import tornado.concurrent
 import tornado.testing
 import tornado.web
 import tornado.websocket
+from blinker import Signal
 import errno
 from tornado import gen
 
 import streamlit.server.server
-from streamlit import config, RootContainer
+from streamlit import config, metrics, script_profiler, tracing, RootContainer
+from streamlit.config_option import ConfigOption
 from streamlit.cursor import make_delta_path
 from streamlit.report_session import ReportSession
+from streamlit.script_profiler import ScriptProfiler
 from streamlit.uploaded_file_manager import UploadedFileRec
 from streamlit.server.server import MAX_PORT_SEARCH_RETRIES
 from streamlit.forward_msg_cache import ForwardMsgCache
 from streamlit.forward_msg_cache import populate_hash_if_needed
 from streamlit.elements import data_frame_proto
+from streamlit.proto.BackMsg_pb2 import BackMsg
 from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.server.server import SessionInfo
 from streamlit.server.server import State
 from streamlit.server.server import start_listening
 from streamlit.server.server import RetriesExceeded
@@ -44,8 +54,11 @@ from streamlit.server.routes import MessageCacheHandler
 from streamlit.server.routes import MetricsHandler
 from streamlit.server.server_util import is_cacheable_msg
 from streamlit.server.server_util import is_url_from_allowed_origins
+from streamlit.server.server_util import prepare_forward_msg
 from streamlit.server.server_util import serialize_forward_msg
+from streamlit.server.server_util import serialize_forward_msg_chunks
 from tests.server_test_case import ServerTestCase
+from tests.testutil import build_mock_config_get_option
 
 from streamlit.logger import get_logger
 
@@ -146,6 +159,131 @@ class ServerTest(ServerTestCase):
             yield gen.sleep(0.1)
             self.assertFalse(self.server.browser_is_connected)
 
+    @tornado.testing.gen_test
+    def test_resume_disconnected_session(self):
+        """A browser that reconnects within server.disconnectedSessionTTL
+        gets its session back."""
+        mock_metrics = defaultdict(MagicMock)  # type: Dict[str, MagicMock]
+        with self._patch_report_session(), patch(
+            "streamlit.server.server.config.get_option",
+            new=build_mock_config_get_option({"server.disconnectedSessionTTL": 60}),
+        ), patch.object(metrics.Client, "get", side_effect=mock_metrics.__getitem__):
+            yield self.start_server_loop()
+
+            ws_client = yield self.ws_connect()
+            session = list(self.server._session_info_by_id.values())[0].session
+            mock_metrics["streamlit_sessions"].set.assert_called_with(1)
+
+            ws_client.close()
+            yield gen.sleep(0.1)
+            self.assertFalse(self.server.browser_is_connected)
+            session.shutdown.assert_not_called()
+            self.assertEqual(1, len(self.server._session_info_by_id))
+            # Detached sessions don't count as connected.
+            mock_metrics["streamlit_sessions"].set.assert_called_with(0)
+
+            ws_client = yield self._ws_connect_with_resume_token(session.resume_token)
+            self.assertEqual("streamlit", ws_client.selected_subprotocol)
+            self.assertTrue(self.server.browser_is_connected)
+            self.assertEqual([session.id], list(self.server._session_info_by_id.keys()))
+            session_info = self.server._session_info_by_id[session.id]
+            self.assertIsNotNone(session_info.ws)
+            session.resume.assert_called_once()
+            mock_metrics["streamlit_sessions"].set.assert_called_with(1)
+
+            # A resume token can only be used once.
+            ws_client2 = yield self._ws_connect_with_resume_token(session.resume_token)
+            self.assertEqual(2, len(self.server._session_info_by_id))
+            session.resume.assert_called_once()
+
+    @tornado.testing.gen_test
+    def test_unknown_resume_token(self):
+        """An unknown resume token gets the browser a new session."""
+        with self._patch_report_session(), patch(
+            "streamlit.server.server.config.get_option",
+            new=build_mock_config_get_option({"server.disconnectedSessionTTL": 60}),
+        ):
+            yield self.start_server_loop()
+
+            ws_client = yield self.ws_connect()
+            session = list(self.server._session_info_by_id.values())[0].session
+            ws_client.close()
+            yield gen.sleep(0.1)
+
+            ws_client = yield self._ws_connect_with_resume_token("bogus")
+            self.assertEqual(2, len(self.server._session_info_by_id))
+            session.resume.assert_not_called()
+
+    @tornado.testing.gen_test
+    def test_disconnected_session_expires(self):
+        """A disconnected session is closed once its TTL is up."""
+        with self._patch_report_session(), patch(
+            "streamlit.server.server.config.get_option",
+            new=build_mock_config_get_option({"server.disconnectedSessionTTL": 1}),
+        ):
+            yield self.start_server_loop()
+
+            ws_client = yield self.ws_connect()
+            session = list(self.server._session_info_by_id.values())[0].session
+            ws_client.close()
+            yield gen.sleep(0.1)
+            session.shutdown.assert_not_called()
+
+            yield gen.sleep(1)
+            session.shutdown.assert_called_once()
+            self.assertEqual(0, len(self.server._session_info_by_id))
+            self.assertEqual({}, self.server._detached_session_ids)
+
+    @tornado.testing.gen_test
+    def test_preheated_session_pool(self):
+        """Browsers claim preheated sessions, and the pool is refilled."""
+        with self._patch_report_session(), patch(
+            "streamlit.server.server.config.get_option",
+            new=build_mock_config_get_option(
+                {"server.preheatedSessions": 2, "server.preheatCpuShare": 1.0}
+            ),
+        ):
+            yield self.start_server_loop()
+            self.server.add_preheated_report_session()
+            yield gen.sleep(0.1)
+
+            preheated_ids = list(self.server._preheated_session_ids)
+            self.assertEqual(2, len(preheated_ids))
+            self.assertEqual(2, len(self.server._session_info_by_id))
+            self.assertFalse(self.server.browser_is_connected)
+            for session_id in preheated_ids:
+                session = self.server._session_info_by_id[session_id].session
+                session.handle_rerun_script_request.assert_called_once_with(
+                    is_preheat=True
+                )
+
+            yield self.ws_connect()
+            self.assertTrue(self.server.browser_is_connected)
+            session_info = self.server._session_info_by_id[preheated_ids[0]]
+            self.assertIsNotNone(session_info.ws)
+
+            # The claimed session is replaced in the background.
+            yield gen.sleep(0.1)
+            self.assertEqual(2, len(self.server._preheated_session_ids))
+            self.assertNotIn(preheated_ids[0], self.server._preheated_session_ids)
+            self.assertEqual(3, len(self.server._session_info_by_id))
+
+    @tornado.testing.gen_test
+    def test_single_preheated_session(self):
+        """Without a pool, only the first browser gets a preheated session."""
+        with self._patch_report_session():
+            yield self.start_server_loop()
+            self.server.add_preheated_report_session()
+            preheated_ids = list(self.server._preheated_session_ids)
+            self.assertEqual(1, len(preheated_ids))
+
+            yield self.ws_connect()
+            yield self.ws_connect()
+            yield gen.sleep(0.1)
+            self.assertEqual(0, len(self.server._preheated_session_ids))
+            self.assertEqual(2, len(self.server._session_info_by_id))
+            self.assertIsNotNone(self.server._session_info_by_id[preheated_ids[0]].ws)
+
     @tornado.testing.gen_test
     def test_websocket_compression(self):
         with self._patch_report_session():
@@ -161,6 +299,94 @@ class ServerTest(ServerTestCase):
             extensions = ws_client.headers.get("Sec-Websocket-Extensions")
             self.assertIn("permessage-deflate", extensions)
 
+    @tornado.testing.gen_test
+    def test_adaptive_websocket_compression(self):
+        """Test that only messages worth compressing are compressed."""
+        mock_metrics = defaultdict(MagicMock)  # type: Dict[str, MagicMock]
+        with self._patch_report_session(), patch.object(
+            metrics.Client, "get", side_effect=mock_metrics.__getitem__
+        ):
+            yield self.start_server_loop()
+            ws_client = yield tornado.websocket.websocket_connect(
+                self.get_ws_url("/stream"), compression_options={}
+            )
+            session_info = list(self.server._session_info_by_id.values())[0]
+
+            small_msg = _create_report_finished_msg(ForwardMsg.FINISHED_SUCCESSFULLY)
+            compressible_msg = ForwardMsg()
+            compressible_msg.delta.new_element.markdown.body = "compress me " * 1000
+            incompressible_msg = ForwardMsg()
+            incompressible_msg.chunk.data = os.urandom(10000)
+
+            for msg in [small_msg, compressible_msg, incompressible_msg]:
+                self.server._send_message(session_info, msg)
+                received = yield self.read_forward_msg(ws_client)
+                self.assertEqual(msg.SerializeToString(), received.SerializeToString())
+
+            labels = mock_metrics["streamlit_websocket_compression_total"].labels
+            self.assertEqual(
+                [
+                    mock.call("too_small"),
+                    mock.call("compressed"),
+                    mock.call("incompressible"),
+                ],
+                labels.call_args_list,
+            )
+
+            # The compressor is back in place for the next message.
+            self.assertIsNotNone(session_info.ws.ws_connection._compressor)
+
+    @tornado.testing.gen_test
+    def test_websocket_compressor(self):
+        """Test that Tornado's websocket connections still have the
+        _compressor that _write_frame hides for frames not worth
+        compressing, in the versions we support."""
+        self.assertTrue(
+            streamlit.server.server._TORNADO_VERSIONS_WITH_COMPRESSOR[0]
+            <= tornado.version_info[:2]
+            < streamlit.server.server._TORNADO_VERSIONS_WITH_COMPRESSOR[1],
+            "Check that _write_frame works with Tornado %s" % tornado.version,
+        )
+        with self._patch_report_session():
+            config._set_option("server.enableWebsocketCompression", True, "test")
+            yield self.start_server_loop()
+            yield tornado.websocket.websocket_connect(
+                self.get_ws_url("/stream"), compression_options={}
+            )
+            session_info = list(self.server._session_info_by_id.values())[0]
+            ws_connection = session_info.ws.ws_connection
+            self.assertIsNotNone(ws_connection._compressor)
+            self.assertIs(
+                ws_connection,
+                streamlit.server.server._get_compressing_connection(session_info.ws),
+            )
+
+            # The connection compresses with it, and doesn't without it.
+            frame = b"compress me " * 1000
+            compressor = ws_connection._compressor
+            with patch.object(
+                ws_connection, "_write_frame", wraps=ws_connection._write_frame
+            ) as write_frame:
+                yield ws_connection.write_message(frame, binary=True)
+                ws_connection._compressor = None
+                yield ws_connection.write_message(frame, binary=True)
+                ws_connection._compressor = compressor
+            compressed_len = len(write_frame.call_args_list[0][0][2])
+            uncompressed_len = len(write_frame.call_args_list[1][0][2])
+            self.assertLess(compressed_len, len(frame))
+            self.assertEqual(len(frame), uncompressed_len)
+
+    def test_write_frame_unknown_connection(self):
+        """Test that frames are written as negotiated to a connection we
+        can't make the compression choice for."""
+        ws = MagicMock()
+        mock_metrics = defaultdict(MagicMock)  # type: Dict[str, MagicMock]
+        with patch.object(metrics.Client, "get", side_effect=mock_metrics.__getitem__):
+            streamlit.server.server._write_frame(ws, b"frame")
+
+        ws.write_message.assert_called_once_with(b"frame", binary=True)
+        self.assertEqual(0, len(mock_metrics))
+
     @tornado.testing.gen_test
     def test_websocket_compression_disabled(self):
         with self._patch_report_session():
@@ -254,6 +480,248 @@ class ServerTest(ServerTestCase):
             # And the same *metadata* as msg2:
             self.assertEqual(msg2.metadata, cached.metadata)
 
+    @tornado.testing.gen_test
+    def test_unchanged_elements(self):
+        """Test that an element the browser already shows isn't sent again
+        in the next run."""
+        config._set_option("server.skipUnchangedElements", True, "test")
+        config._set_option("global.minCachedMessageSize", 0, "test")
+        config._set_option("global.maxCachedMessageAge", 2, "test")
+        try:
+            with self._patch_report_session():
+                yield self.start_server_loop()
+                ws_client = yield self.ws_connect()
+
+                session_info = list(self.server._session_info_by_id.values())[0]
+
+                def send_run(msg):
+                    new_report_msg = ForwardMsg()
+                    new_report_msg.new_report.script_path = "/app.py"
+                    self.server._send_message(session_info, new_report_msg)
+                    self.server._send_message(session_info, msg)
+                    self.server._send_message(
+                        session_info,
+                        _create_report_finished_msg(ForwardMsg.FINISHED_SUCCESSFULLY),
+                    )
+
+                @gen.coroutine
+                def read_delta():
+                    msgs = []
+                    for _ in range(3):
+                        msg = yield self.read_forward_msg(ws_client)
+                        msgs.append(msg)
+                    return msgs[1]
+
+                send_run(_create_dataframe_msg([1, 2, 3]))
+                delta_msg = yield read_delta()
+                self.assertEqual("new_element", delta_msg.delta.WhichOneof("type"))
+
+                send_run(_create_dataframe_msg([1, 2, 3]))
+                delta_msg = yield read_delta()
+                self.assertEqual(
+                    "element_unchanged", delta_msg.delta.WhichOneof("type")
+                )
+                self.assertEqual(
+                    _create_dataframe_msg([1, 2, 3]).metadata.delta_path,
+                    delta_msg.metadata.delta_path,
+                )
+                # The marker doesn't refresh the message's age in the cache.
+                msg_hash = populate_hash_if_needed(_create_dataframe_msg([1, 2, 3]))
+                entry = self.server._message_cache._entries[msg_hash]
+                self.assertEqual(
+                    2,
+                    entry.get_session_ref_age(
+                        session_info.session, session_info.report_run_count
+                    ),
+                )
+
+                send_run(_create_dataframe_msg([4, 5, 6]))
+                delta_msg = yield read_delta()
+                self.assertEqual("new_element", delta_msg.delta.WhichOneof("type"))
+
+                # A browser that's missing elements asks for all of them again.
+                back_msg = BackMsg()
+                back_msg.resend_elements = True
+                yield ws_client.write_message(back_msg.SerializeToString(), binary=True)
+                yield gen.sleep(0.1)
+
+                send_run(_create_dataframe_msg([4, 5, 6]))
+                delta_msg = yield read_delta()
+                # It's sent again, as a reference to the cached element.
+                self.assertEqual("ref_hash", delta_msg.WhichOneof("type"))
+        finally:
+            config._set_option(
+                "server.skipUnchangedElements", False, ConfigOption.DEFAULT_DEFINITION
+            )
+            config._set_option(
+                "global.minCachedMessageSize", 10 * 1e3, ConfigOption.DEFAULT_DEFINITION
+            )
+            config._set_option(
+                "global.maxCachedMessageAge", 2, ConfigOption.DEFAULT_DEFINITION
+            )
+
+    @tornado.testing.gen_test
+    def test_large_forwardmsg_chunking(self):
+        """Test that large ForwardMsgs are sent as a sequence of chunks,
+        and that later messages are sent after the last chunk."""
+        with self._patch_report_session(), patch(
+            "streamlit.server.server_util.config.get_option",
+            new=build_mock_config_get_option({"global.messageChunkSize": 100}),
+        ):
+            yield self.start_server_loop()
+            ws_client = yield self.ws_connect()
+
+            session_info = list(self.server._session_info_by_id.values())[0]
+            session_info.session.flush_browser_queue.return_value = []
+
+            large_msg = _create_dataframe_msg(list(range(100)))
+            small_msg = _create_report_finished_msg(ForwardMsg.FINISHED_SUCCESSFULLY)
+            self.server._send_message(session_info, large_msg)
+            self.server._send_message(session_info, small_msg)
+
+            # Only the first chunk is written immediately.
+            self.assertTrue(len(session_info.pending_frames) > 1)
+
+            data = b""
+            while True:
+                received = yield self.read_forward_msg(ws_client)
+                if received.WhichOneof("type") != "chunk":
+                    break
+                data += received.chunk.data
+
+            reassembled = ForwardMsg()
+            reassembled.ParseFromString(data)
+            self.assertEqual(large_msg, reassembled)
+            self.assertEqual(small_msg, received)
+            self.assertEqual(0, len(session_info.pending_frames))
+
+    @tornado.testing.gen_test
+    def test_backlogged_session(self):
+        """Test that we stop flushing a session's browser queue while its
+        websocket has too many unsent bytes."""
+        with self._patch_report_session():
+            yield self.start_server_loop()
+            ws_client = yield self.ws_connect()
+
+            session_info = list(self.server._session_info_by_id.values())[0]
+            flush_browser_queue = session_info.session.flush_browser_queue
+            flush_browser_queue.return_value = []
+
+            # Written frames count towards the buffer until they're flushed.
+            self.server._send_message(session_info, _create_dataframe_msg([1, 2, 3]))
+            yield self.read_forward_msg(ws_client)
+            yield gen.sleep(0.05)
+            self.assertEqual(0, session_info.buffered_bytes)
+            flush_browser_queue.assert_called()
+
+            session_info.buffered_bytes = 100 * 1024 * 1024
+            yield gen.sleep(0.05)
+            flush_browser_queue.reset_mock()
+            yield gen.sleep(0.05)
+            self.assertTrue(session_info.is_backlogged)
+            flush_browser_queue.assert_not_called()
+
+            session_info.buffered_bytes = 0
+            yield gen.sleep(0.05)
+            self.assertFalse(session_info.is_backlogged)
+            flush_browser_queue.assert_called()
+
+    @tornado.testing.gen_test
+    def test_offloaded_serialization(self):
+        """Test that large messages are prepared in the thread pool, and
+        still sent in order."""
+        with self._patch_report_session():
+            yield self.start_server_loop()
+            ws_client = yield self.ws_connect()
+
+            large_msg = _create_dataframe_msg(list(range(1000)))
+            small_msg = _create_report_finished_msg(ForwardMsg.FINISHED_SUCCESSFULLY)
+            msg_lists = [[large_msg, small_msg]]
+
+            session_info = list(self.server._session_info_by_id.values())[0]
+            session_info.session.flush_browser_queue.side_effect = lambda: (
+                msg_lists.pop() if msg_lists else []
+            )
+
+            calling_threads = []
+
+            def prepare(msg, msg_size):
+                calling_threads.append(threading.current_thread())
+                return prepare_forward_msg(msg, msg_size)
+
+            min_size = small_msg.ByteSize() + 1
+            config._set_option("global.minOffloadedMessageSize", min_size, "test")
+            try:
+                with patch("streamlit.server.server.prepare_forward_msg", new=prepare):
+                    received = yield self.read_forward_msg(ws_client)
+                    self.assertEqual("delta", received.WhichOneof("type"))
+                    received = yield self.read_forward_msg(ws_client)
+                    self.assertEqual("report_finished", received.WhichOneof("type"))
+            finally:
+                config._set_option(
+                    "global.minOffloadedMessageSize",
+                    1000 * 1000,
+                    ConfigOption.DEFAULT_DEFINITION,
+                )
+
+            self.assertEqual(1, len(calling_threads))
+            self.assertIsNot(threading.main_thread(), calling_threads[0])
+
+    @tornado.testing.gen_test
+    def test_transport_metrics(self):
+        """Test that sessions, browser queues and sent messages are measured."""
+        mock_metrics = defaultdict(MagicMock)  # type: Dict[str, MagicMock]
+        with self._patch_report_session(), patch.object(
+            metrics.Client, "get", side_effect=mock_metrics.__getitem__
+        ):
+            yield self.start_server_loop()
+            ws_client = yield self.ws_connect()
+            mock_metrics["streamlit_sessions"].set.assert_called_with(1)
+
+            msg = _create_report_finished_msg(ForwardMsg.FINISHED_SUCCESSFULLY)
+            msg_lists = [[msg]]
+            session_info = list(self.server._session_info_by_id.values())[0]
+            session_info.session.flush_browser_queue.side_effect = lambda: (
+                msg_lists.pop() if msg_lists else []
+            )
+            yield self.read_forward_msg(ws_client)
+
+            num_bytes = len(serialize_forward_msg(msg))
+            mock_metrics["streamlit_browser_queue_messages"].observe.assert_called_with(
+                1
+            )
+            mock_metrics["streamlit_browser_queue_bytes"].observe.assert_called_with(
+                num_bytes
+            )
+            forward_msg_bytes = mock_metrics["streamlit_forward_msg_bytes"]
+            forward_msg_bytes.labels.assert_called_with("report_finished")
+            forward_msg_bytes.labels().observe.assert_called_with(num_bytes)
+
+            self.server._close_report_session(session_info.session.id)
+            mock_metrics["streamlit_sessions"].set.assert_called_with(0)
+
+    @tornado.testing.gen_test
+    def test_write_to_closed_websocket(self):
+        """Test that a write that fails because the websocket closed is
+        handled, and isn't measured."""
+        mock_metrics = defaultdict(MagicMock)  # type: Dict[str, MagicMock]
+        with self._patch_report_session(), patch.object(
+            metrics.Client, "get", side_effect=mock_metrics.__getitem__
+        ):
+            yield self.start_server_loop()
+            future = tornado.concurrent.Future()  # type: Any
+            ws = MagicMock()
+            ws.write_message.return_value = future
+            session_info = SessionInfo(ws, MagicMock())
+            session_info.pending_frames.append(b"frame")
+
+            self.server._write_pending_frame(session_info)
+            future.set_exception(tornado.websocket.WebSocketClosedError())
+            yield gen.sleep(0)
+
+            self.assertEqual(0, session_info.buffered_bytes)
+            mock_metrics["streamlit_websocket_send_seconds"].observe.assert_not_called()
+
     @tornado.testing.gen_test
     def test_cache_clearing(self):
         """Test that report_run_count is incremented when a report
@@ -419,6 +887,13 @@ class ServerTest(ServerTestCase):
 
         mock_session = mock.MagicMock(ReportSession, autospec=True, *args, **kwargs)
         type(mock_session).id = mock_id
+        mock_session.resume_token = "resume_token_%s" % ServerTest._next_report_id
+
+        # Script runs finish as soon as they're requested.
+        mock_session.on_script_finished = Signal()
+        mock_session.handle_rerun_script_request.side_effect = (
+            lambda *args, **kwargs: mock_session.on_script_finished.send(mock_session)
+        )
         return mock_session
 
     def _patch_report_session(self):
@@ -433,6 +908,13 @@ class ServerTest(ServerTestCase):
             new_callable=lambda: self._create_mock_report_session,
         )
 
+    def _ws_connect_with_resume_token(self, resume_token):
+        """Connect to the server the way a reconnecting browser does."""
+        return tornado.websocket.websocket_connect(
+            self.get_ws_url("/stream"),
+            subprotocols=["streamlit", "streamlit-resume.%s" % resume_token],
+        )
+
 
 class ServerUtilsTest(unittest.TestCase):
     def test_is_url_from_allowed_origins_allowed_domains(self):
@@ -478,21 +960,53 @@ class ServerUtilsTest(unittest.TestCase):
         config._set_option("global.minCachedMessageSize", 1000, "test")
         self.assertFalse(is_cacheable_msg(_create_dataframe_msg([1, 2, 3])))
 
-    def test_should_limit_msg_size(self):
+    def test_prepare_forward_msg(self):
+        """prepare_forward_msg prepares a copy, and leaves the message
+        alone."""
+        config._set_option("global.minCachedMessageSize", 0, "test")
+        msg = _create_dataframe_msg([1, 2, 3])
+        prepared_msg, frames = prepare_forward_msg(msg, msg.ByteSize())
+
+        self.assertFalse(msg.metadata.cacheable)
+        self.assertEqual("", msg.hash)
+        self.assertTrue(prepared_msg.metadata.cacheable)
+        self.assertNotEqual("", prepared_msg.hash)
+        self.assertEqual([serialize_forward_msg(prepared_msg)], frames)
+
+    def test_serialize_small_msg_without_chunks(self):
+        msg = _create_dataframe_msg([1, 2, 3])
+        frames = serialize_forward_msg_chunks(msg)
+        self.assertEqual([serialize_forward_msg(msg)], frames)
+
+    def test_serialize_large_msg_in_chunks(self):
         # Set up a 60MB ForwardMsg string
         large_msg = _create_dataframe_msg([1, 2, 3])
         large_msg.delta.new_element.markdown.body = "X" * 60 * 1000 * 1000
-        # Create a copy, since serialize_forward_msg modifies the original proto
-        large_msg_copy = ForwardMsg()
-        large_msg_copy.CopyFrom(large_msg)
-        deserialized_msg = ForwardMsg()
-        deserialized_msg.ParseFromString(serialize_forward_msg(large_msg_copy))
+        msg_str = serialize_forward_msg(large_msg)
+
+        with patch(
+            "streamlit.server.server_util.config.get_option",
+            new=build_mock_config_get_option(
+                {"global.messageChunkSize": 25 * 1000 * 1000}
+            ),
+        ):
+            frames = serialize_forward_msg_chunks(large_msg)
+        self.assertEqual(3, len(frames))
 
-        # The metadata should be the same, but contents should be replaced
-        self.assertEqual(deserialized_msg.metadata, large_msg.metadata)
-        self.assertNotEqual(deserialized_msg, large_msg)
-        expected = "Data of size 60.0MB exceeds write limit of 50.0MB"
-        self.assertEqual(deserialized_msg.delta.new_element.exception.message, expected)
+        chunks = []
+        for frame in frames:
+            chunk_msg = ForwardMsg()
+            chunk_msg.ParseFromString(frame)
+            self.assertEqual("chunk", chunk_msg.WhichOneof("type"))
+            chunks.append(chunk_msg.chunk)
+
+        self.assertEqual([0, 1, 2], [chunk.index for chunk in chunks])
+        self.assertTrue(all(chunk.count == 3 for chunk in chunks))
+        self.assertTrue(all(chunk.msg_hash == large_msg.hash for chunk in chunks))
+
+        # The chunks reassemble into the original message, which is no
+        # longer replaced with an exception.
+        self.assertEqual(msg_str, b"".join(chunk.data for chunk in chunks))
 
 
 class HealthHandlerTest(tornado.testing.AsyncHTTPTestCase):
@@ -646,12 +1160,49 @@ class DebugHandlerTest(tornado.testing.AsyncHTTPTestCase):
     """Tests the /debugz endpoint"""
 
     def get_app(self):
-        return tornado.web.Application([(r"/debugz", DebugHandler)])
+        return tornado.web.Application(
+            [(r"/debugz", DebugHandler, dict(server=MagicMock()))]
+        )
 
     def test_debug(self):
         # TODO - debugz is currently broken
         pass
 
+    def test_trace(self):
+        """/debugz?trace=1 serves recently traced spans."""
+        tracing.clear()
+        config._set_option("global.tracingSampleRate", 1.0, "test")
+        try:
+            with tracing.span("test span"):
+                pass
+        finally:
+            config._set_option(
+                "global.tracingSampleRate", 0.0, ConfigOption.DEFAULT_DEFINITION
+            )
+
+        response = self.fetch("/debugz?trace=1")
+        self.assertEqual(200, response.code)
+        self.assertEqual(
+            ["application/json"], response.headers.get_list("Content-Type")
+        )
+        trace = json.loads(response.body)
+        self.assertIn("test span", [event["name"] for event in trace["traceEvents"]])
+
+    def test_profile(self):
+        """/debugz?profile=N serves a recent profile as collapsed stacks."""
+        script_profiler.clear_profiles()
+        with ScriptProfiler("session id", "script.py") as profiler:
+            profiler.profile.stack_counts[("<module> (script.py:1)",)] += 3
+
+        response = self.fetch("/debugz?profile=0")
+        self.assertEqual(200, response.code)
+        self.assertEqual(["text/plain"], response.headers.get_list("Content-Type"))
+        self.assertEqual(b"<module> (script.py:1) 3\n", response.body)
+
+        self.assertEqual(404, self.fetch("/debugz?profile=1").code)
+        self.assertEqual(404, self.fetch("/debugz?profile=x").code)
+        script_profiler.clear_profiles()
+
 
 class MessageCacheHandlerTest(tornado.testing.AsyncHTTPTestCase):
     def get_app(self):
@@ -671,6 +1222,15 @@ class MessageCacheHandlerTest(tornado.testing.AsyncHTTPTestCase):
         self.assertEqual(200, response.code)
         self.assertEqual(serialize_forward_msg(msg), response.body)
 
+        # Large messages are streamed in chunks
+        with patch(
+            "streamlit.server.routes.config.get_option",
+            new=build_mock_config_get_option({"global.messageChunkSize": 10}),
+        ):
+            response = self.fetch("/message?hash=%s" % msg_hash)
+        self.assertEqual(200, response.code)
+        self.assertEqual(serialize_forward_msg(msg), response.body)
+
         # Cache misses
         self.assertEqual(404, self.fetch("/message").code)
         self.assertEqual(404, self.fetch("/message?id=non_existent").code)
@@ -0,0 +1,215 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""static_compression.py unit tests"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import tornado.testing
+import tornado.web
+
+from streamlit.server import static_compression
+from streamlit.server.routes import StaticFileHandler
+
+JS_CONTENT = b"console.log('hello');\n" * 1000
+
+
+def _wait_for_cache_copies():
+    """Wait for the copies being made in the cache to be done."""
+    static_compression._cache_executor.submit(lambda: None).result()
+
+
+class StaticCompressionTest(unittest.TestCase):
+    def setUp(self):
+        self.static_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.js_path = os.path.join(self.static_dir, "main.js")
+        with open(self.js_path, "wb") as f:
+            f.write(JS_CONTENT)
+
+        patcher = mock.patch(
+            "streamlit.file_util.get_streamlit_file_path",
+            side_effect=lambda *path: os.path.join(self.cache_dir, *path),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.static_dir)
+        shutil.rmtree(self.cache_dir)
+
+    def test_choose_encoding(self):
+        self.assertIsNone(static_compression.choose_encoding(None))
+        self.assertIsNone(static_compression.choose_encoding("identity"))
+        self.assertIsNone(static_compression.choose_encoding("gzip;q=0"))
+        self.assertEqual("gzip", static_compression.choose_encoding("gzip"))
+        self.assertEqual(
+            "gzip", static_compression.choose_encoding("deflate, gzip;q=0.5")
+        )
+        self.assertEqual("gzip", static_compression.choose_encoding("*"))
+
+        with mock.patch.object(static_compression, "brotli", mock.MagicMock()):
+            self.assertEqual(
+                "br", static_compression.choose_encoding("gzip, deflate, br")
+            )
+            self.assertEqual("gzip", static_compression.choose_encoding("gzip, br;q=0"))
+
+    def test_compress_on_first_request(self):
+        """Without a build-time copy, a copy is made in the cache."""
+        # The first request gets the uncompressed file while the copy is made.
+        self.assertIsNone(static_compression.get_compressed_path(self.js_path, "gzip"))
+        _wait_for_cache_copies()
+
+        path = static_compression.get_compressed_path(self.js_path, "gzip")
+        self.assertTrue(path is not None and path.startswith(self.cache_dir))
+        with open(str(path), "rb") as f:
+            self.assertEqual(JS_CONTENT, gzip.decompress(f.read()))
+
+        # The copy is reused...
+        with mock.patch.object(static_compression, "_compress_file") as compress:
+            self.assertEqual(
+                path, static_compression.get_compressed_path(self.js_path, "gzip")
+            )
+            compress.assert_not_called()
+
+        # ...until the file changes.
+        with open(self.js_path, "ab") as f:
+            f.write(b"// changed\n")
+        self.assertIsNone(static_compression.get_compressed_path(self.js_path, "gzip"))
+        _wait_for_cache_copies()
+        self.assertNotEqual(
+            path, static_compression.get_compressed_path(self.js_path, "gzip")
+        )
+
+    def test_compress_once(self):
+        """A file that's requested again before its copy is done isn't
+        compressed twice."""
+        with mock.patch.object(static_compression, "_cache_executor") as executor:
+            static_compression.get_compressed_path(self.js_path, "gzip")
+            static_compression.get_compressed_path(self.js_path, "gzip")
+        self.assertEqual(1, executor.submit.call_count)
+        static_compression._pending_cache_paths.clear()
+
+    def test_prune_cache(self):
+        """The oldest copies are deleted once the cache is too big."""
+        for i in range(4):
+            path = os.path.join(self.cache_dir, "%s.gz" % i)
+            with open(path, "wb") as f:
+                f.write(b"x" * 100)
+            os.utime(path, (i, i))
+
+        static_compression._prune_cache(self.cache_dir, 250)
+        self.assertEqual(["2.gz", "3.gz"], sorted(os.listdir(self.cache_dir)))
+
+    def test_precompressed_directory(self):
+        """Build-time copies are used when they exist."""
+        self.assertEqual(1, static_compression.precompress_directory(self.static_dir))
+        self.assertEqual(
+            self.js_path + ".gz",
+            static_compression.get_compressed_path(self.js_path, "gzip"),
+        )
+
+    def test_incompressible_files(self):
+        png_path = os.path.join(self.static_dir, "image.png")
+        with open(png_path, "wb") as f:
+            f.write(JS_CONTENT)
+        small_path = os.path.join(self.static_dir, "small.js")
+        with open(small_path, "wb") as f:
+            f.write(b"1;")
+
+        self.assertIsNone(static_compression.get_compressed_path(png_path, "gzip"))
+        self.assertIsNone(static_compression.get_compressed_path(small_path, "gzip"))
+        self.assertEqual(0, len(os.listdir(self.cache_dir)))
+
+
+class StaticFileHandlerTest(tornado.testing.AsyncHTTPTestCase):
+    def setUp(self):
+        self.static_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        for filename in ["main.1a2b3c4d.chunk.js", "index.html"]:
+            with open(os.path.join(self.static_dir, filename), "wb") as f:
+                f.write(JS_CONTENT)
+
+        patcher = mock.patch(
+            "streamlit.file_util.get_streamlit_file_path",
+            side_effect=lambda *path: os.path.join(self.cache_dir, *path),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super(StaticFileHandlerTest, self).setUp()
+
+    def tearDown(self):
+        super(StaticFileHandlerTest, self).tearDown()
+        shutil.rmtree(self.static_dir)
+        shutil.rmtree(self.cache_dir)
+
+    def get_app(self):
+        return tornado.web.Application(
+            [
+                (
+                    r"/(.*)",
+                    StaticFileHandler,
+                    {"path": self.static_dir, "default_filename": "index.html"},
+                )
+            ],
+            compress_response=True,
+        )
+
+    def test_gzip(self):
+        # The first request is sent as is (and left to Tornado's own
+        # compression), while a copy is made in the cache.
+        response = self.fetch(
+            "/main.1a2b3c4d.chunk.js", headers={"Accept-Encoding": "gzip"}
+        )
+        self.assertEqual(200, response.code)
+        self.assertEqual(JS_CONTENT, response.body)
+        _wait_for_cache_copies()
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
+
+        response = self.fetch(
+            "/main.1a2b3c4d.chunk.js",
+            headers={"Accept-Encoding": "gzip"},
+            decompress_response=False,
+        )
+        self.assertEqual(200, response.code)
+        self.assertEqual("gzip", response.headers["Content-Encoding"])
+        self.assertIn("javascript", response.headers["Content-Type"])
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual(JS_CONTENT, gzip.decompress(response.body))
+        self.assertEqual(len(response.body), int(response.headers["Content-Length"]))
+        self.assertEqual(
+            "public, max-age=%s, immutable" % StaticFileHandler.CACHE_MAX_AGE,
+            response.headers["Cache-Control"],
+        )
+
+    def test_identity(self):
+        response = self.fetch(
+            "/main.1a2b3c4d.chunk.js",
+            headers={"Accept-Encoding": "identity"},
+            decompress_response=False,
+        )
+        self.assertEqual(200, response.code)
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(JS_CONTENT, response.body)
+
+    def test_index_not_cached(self):
+        response = self.fetch("/", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(200, response.code)
+        self.assertEqual(JS_CONTENT, response.body)
+        self.assertEqual("no-cache", response.headers["Cache-Control"])
@@ -0,0 +1,117 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""tracing.py unit tests"""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from streamlit import config
+from streamlit import tracing
+from streamlit.config_option import ConfigOption
+
+
+def _span_names():
+    return [
+        event["name"]
+        for event in tracing.get_recent_trace()["traceEvents"]
+        if event["ph"] == "X"
+    ]
+
+
+class TracingTest(unittest.TestCase):
+    def setUp(self):
+        tracing.clear()
+
+    def tearDown(self):
+        tracing.clear()
+        config._set_option(
+            "global.tracingSampleRate", 0.0, ConfigOption.DEFAULT_DEFINITION
+        )
+        config._set_option("global.tracingFile", None, ConfigOption.DEFAULT_DEFINITION)
+
+    def test_disabled(self):
+        """Nothing is recorded by default."""
+        with tracing.span("root"):
+            with tracing.span("child"):
+                pass
+        self.assertEqual([], _span_names())
+
+    def test_nested_spans(self):
+        """Spans are recorded when they end, with their arguments."""
+        config._set_option("global.tracingSampleRate", 1.0, "test")
+
+        @tracing.traced("traced function")
+        def traced_function():
+            return 42
+
+        with tracing.span("root", session_id="abc"):
+            self.assertEqual(42, traced_function())
+
+        self.assertEqual(["traced function", "root"], _span_names())
+        root = tracing.get_recent_trace()["traceEvents"][-1]
+        self.assertEqual({"session_id": "abc"}, root["args"])
+        self.assertEqual(threading.get_ident(), root["tid"])
+        self.assertGreaterEqual(root["dur"], 0)
+
+    def test_exception(self):
+        """Spans record the exceptions that end them."""
+        config._set_option("global.tracingSampleRate", 1.0, "test")
+        with self.assertRaises(ValueError):
+            with tracing.span("root"):
+                raise ValueError()
+
+        root = tracing.get_recent_trace()["traceEvents"][-1]
+        self.assertEqual("ValueError", root["args"]["exception"])
+
+    def test_sampling(self):
+        """Spans nested in an unsampled root aren't recorded."""
+        config._set_option("global.tracingSampleRate", 0.5, "test")
+
+        with mock.patch("streamlit.tracing.random.random", return_value=0.75):
+            with tracing.span("unsampled root"):
+                with tracing.span("unsampled child"):
+                    pass
+
+        with mock.patch("streamlit.tracing.random.random", return_value=0.25):
+            with tracing.span("sampled root"):
+                with tracing.span("sampled child"):
+                    pass
+
+        self.assertEqual(["sampled child", "sampled root"], _span_names())
+
+    def test_trace_file(self):
+        """Spans are appended to the trace file, which trace viewers can
+        load once it's closed with a bracket."""
+        path = os.path.join(tempfile.mkdtemp(), "trace.json")
+        config._set_option("global.tracingSampleRate", 1.0, "test")
+        config._set_option("global.tracingFile", path, "test")
+
+        with tracing.span("first"):
+            pass
+        tracing.clear()
+        with tracing.span("second"):
+            pass
+        tracing.clear()
+
+        with open(path) as f:
+            contents = f.read()
+        events = json.loads(contents.rstrip().rstrip(",") + "]")
+        self.assertEqual(
+            ["first", "second"], [e["name"] for e in events if e["ph"] == "X"]
+        )
@@ -84,6 +84,13 @@ class LocalSourcesWatcherTest(unittest.TestCase):
 
         self.assertEqual(fob.call_count, 1)  # __init__.py
 
+    @patch("streamlit.watcher.local_sources_watcher.script_cache")
+    @patch("streamlit.watcher.local_sources_watcher.FileWatcher")
+    def test_invalidates_compiled_script(self, fob, script_cache, _):
+        lso = local_sources_watcher.LocalSourcesWatcher(REPORT, NOOP_CALLBACK)
+        lso.on_file_changed(REPORT_PATH)
+        script_cache.invalidate.assert_called_once_with(REPORT_PATH)
+
     @patch("streamlit.watcher.local_sources_watcher.FileWatcher")
     def test_permission_error(self, fob, _):
         fob.side_effect = PermissionError("This error should be caught!")
@@ -61,6 +61,26 @@ class WidgetTest(unittest.TestCase):
         self.assertEqual(None, widgets.get_widget_value("trigger"))
         self.assertEqual(123, widgets.get_widget_value("int"))
 
+    def test_get_changed_widget_ids(self):
+        old_states = WidgetStates()
+        _create_widget("same", old_states).int_value = 1
+        _create_widget("changed", old_states).int_value = 1
+        _create_widget("removed", old_states).int_value = 1
+        widgets = Widgets()
+        widgets.set_state(old_states)
+
+        new_states = WidgetStates()
+        _create_widget("same", new_states).int_value = 1
+        _create_widget("changed", new_states).int_value = 2
+        _create_widget("added", new_states).int_value = 1
+        _create_widget("unset_trigger", new_states).trigger_value = False
+        _create_widget("trigger", new_states).trigger_value = True
+
+        self.assertEqual(
+            {"changed", "removed", "added", "trigger"},
+            widgets.get_changed_widget_ids(new_states),
+        )
+
     def test_coalesce_widget_states(self):
         old_states = WidgetStates()
 
@@ -0,0 +1,153 @@
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""workers.py unit tests"""
+
+import unittest
+from unittest import mock
+
+import requests
+import tornado.httpserver
+import tornado.testing
+import tornado.web
+
+from streamlit.forward_msg_cache import ForwardMsgCache
+from streamlit.forward_msg_cache import populate_hash_if_needed
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.server import workers
+from streamlit.server.routes import MessageCacheHandler
+from streamlit.server.server_util import serialize_forward_msg
+from streamlit.server.upload_file_request_handler import UploadFileRequestHandler
+from streamlit.server.upload_file_request_handler import UPLOAD_FILE_ROUTE
+from streamlit.uploaded_file_manager import UploadedFileManager
+
+
+def _patch_worker(index, ports):
+    return mock.patch.multiple(
+        workers, _worker_index=index, _worker_ports=ports, _http_client=None
+    )
+
+
+class WorkersTest(unittest.TestCase):
+    def test_session_id_without_workers(self):
+        """Session ids don't name a worker when we're not running workers."""
+        session_id = workers.new_session_id()
+        self.assertFalse(session_id.startswith("w"))
+        self.assertIsNone(workers.get_session_owner(session_id))
+        self.assertEqual([], workers.get_other_workers())
+
+    def test_session_owner(self):
+        """Session ids record the worker that created them."""
+        with _patch_worker(1, [1001, 1002, 1003]):
+            session_id = workers.new_session_id()
+            self.assertTrue(session_id.startswith("w1-"))
+
+            # Sessions in this worker aren't owned by another worker.
+            self.assertIsNone(workers.get_session_owner(session_id))
+
+            self.assertEqual(0, workers.get_session_owner("w0-abc"))
+            self.assertEqual(2, workers.get_session_owner("w2-abc"))
+            self.assertIsNone(workers.get_session_owner("w3-abc"))
+            self.assertIsNone(workers.get_session_owner("wx-abc"))
+            self.assertIsNone(workers.get_session_owner("abc"))
+            self.assertIsNone(workers.get_session_owner(""))
+
+            self.assertEqual([0, 2], workers.get_other_workers())
+
+    def test_is_main_worker(self):
+        self.assertTrue(workers.is_main_worker())
+        with _patch_worker(0, [1001, 1002]):
+            self.assertTrue(workers.is_main_worker())
+        with _patch_worker(1, [1001, 1002]):
+            self.assertFalse(workers.is_main_worker())
+
+
+class ForwardRequestTest(tornado.testing.AsyncHTTPTestCase):
+    """Tests that requests are forwarded to the worker that can handle them.
+
+    Both "workers" run in this process: the test server plays worker 0, and
+    a second server plays worker 1.
+    """
+
+    def _create_app(self, file_mgr, cache, get_session_info):
+        return tornado.web.Application(
+            [
+                (
+                    UPLOAD_FILE_ROUTE,
+                    UploadFileRequestHandler,
+                    dict(file_mgr=file_mgr, get_session_info=get_session_info),
+                ),
+                (r"/message", MessageCacheHandler, dict(cache=cache)),
+            ]
+        )
+
+    def get_app(self):
+        self.file_mgr = UploadedFileManager()
+        self.cache = ForwardMsgCache()
+        return self._create_app(self.file_mgr, self.cache, lambda session_id: None)
+
+    def setUp(self):
+        super(ForwardRequestTest, self).setUp()
+
+        self.other_file_mgr = UploadedFileManager()
+        self.other_cache = ForwardMsgCache()
+        other_app = self._create_app(
+            self.other_file_mgr, self.other_cache, lambda session_id: True
+        )
+        sock, other_port = tornado.testing.bind_unused_port()
+        self.other_server = tornado.httpserver.HTTPServer(other_app)
+        self.other_server.add_socket(sock)
+
+        patcher = _patch_worker(0, [self.get_http_port(), other_port])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.other_server.stop()
+        super(ForwardRequestTest, self).tearDown()
+
+    def test_forward_upload(self):
+        """Uploads for another worker's session are stored in that worker."""
+        req = requests.Request(
+            method="POST",
+            url=self.get_url("/upload_file"),
+            files={
+                "sessionId": (None, "w1-session"),
+                "widgetId": (None, "widget_id"),
+                "image.png": ("image.png", b"123"),
+            },
+        ).prepare()
+        response = self.fetch(
+            "/upload_file", method=req.method, headers=req.headers, body=req.body
+        )
+
+        self.assertEqual(200, response.code)
+        self.assertEqual(
+            1, len(self.other_file_mgr.get_files("w1-session", "widget_id"))
+        )
+        self.assertIsNone(self.file_mgr.get_files("w1-session", "widget_id"))
+
+    def test_forward_message(self):
+        """Cached messages are fetched from other workers on a miss."""
+        msg = ForwardMsg()
+        msg.delta.new_element.markdown.body = "cached in worker 1"
+        populate_hash_if_needed(msg)
+        self.other_cache.add_message(msg, mock.MagicMock(), 0)
+
+        response = self.fetch("/message?hash=%s" % msg.hash)
+        self.assertEqual(200, response.code)
+        self.assertEqual(serialize_forward_msg(msg), response.body)
+
+        response = self.fetch("/message?hash=not_a_hash")
+        self.assertEqual(404, response.code)
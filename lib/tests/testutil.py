@@ -80,7 +80,7 @@ class DeltaGeneratorTestCase(unittest.TestCase):
         -------
         ForwardMsg
         """
-        return self.report_queue._queue[index]
+        return list(self.report_queue)[index]
 
     def get_delta_from_queue(self, index=-1):
         """Get a Delta proto from the queue, by index.
@@ -94,7 +94,7 @@ class DeltaGeneratorTestCase(unittest.TestCase):
 
     def get_all_deltas_from_queue(self):
         """Return all the delta messages in our ReportQueue"""
-        return [msg.delta for msg in self.report_queue._queue if msg.HasField("delta")]
+        return [msg.delta for msg in self.report_queue if msg.HasField("delta")]
 
     def clear_queue(self):
         self.report_queue._clear()
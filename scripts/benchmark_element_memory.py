@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures the memory and time it takes to write a large element.
+
+Each measurement runs in a fresh process, which writes one element with
+st.dataframe, st.table or st.line_chart, and keeps the ForwardMsg it
+enqueues, like a ReportQueue would. We report how much the process's peak
+RSS grew while writing the element, and how long that took.
+"""
+
+import multiprocessing
+import resource
+import sys
+import threading
+import time
+
+import click
+
+
+def _peak_rss_bytes():
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, and in kilobytes elsewhere.
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def _write_element(element, rows, columns, results):
+    import numpy as np
+    import pandas as pd
+
+    import streamlit as st
+    from streamlit.report_thread import ReportContext
+    from streamlit.report_thread import _WidgetIDSet
+    from streamlit.report_thread import add_report_ctx
+    from streamlit.uploaded_file_manager import UploadedFileManager
+    from streamlit.widgets import Widgets
+
+    msgs = []
+    add_report_ctx(
+        threading.current_thread(),
+        ReportContext(
+            session_id="benchmark",
+            enqueue=msgs.append,
+            query_string="",
+            widgets=Widgets(),
+            widget_ids_this_run=_WidgetIDSet(),
+            uploaded_file_mgr=UploadedFileManager(),
+        ),
+    )
+
+    df = pd.DataFrame(np.random.randn(rows, columns))
+
+    rss_before = _peak_rss_bytes()
+    start = time.time()
+    getattr(st, element)(df)
+    elapsed = time.time() - start
+
+    results.put((_peak_rss_bytes() - rss_before, elapsed, len(msgs)))
+
+
+@click.command()
+@click.option("--rows", default=1000000, help="Number of rows in the element.")
+@click.option("--columns", default=4, help="Number of columns in the element.")
+def main(rows, columns):
+    context = multiprocessing.get_context("spawn")
+    for element in ["dataframe", "table", "line_chart"]:
+        results = context.Queue()
+        process = context.Process(
+            target=_write_element, args=(element, rows, columns, results)
+        )
+        process.start()
+        rss_growth, elapsed, num_msgs = results.get()
+        process.join()
+
+        if num_msgs != 1:
+            raise click.ClickException("Expected 1 message, got %s" % num_msgs)
+
+        click.echo(
+            "st.%s(%s x %s): peak RSS +%.1f MB, %.2fs"
+            % (element, rows, columns, rss_growth / 1024 / 1024, elapsed)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures contention between scripts that enqueue many small deltas and the
+server loop that flushes their sessions' browser queues.
+
+Each script thread enqueues messages into a Report like a ReportSession
+does, checking its ScriptRequestQueue before each message. Meanwhile, one
+thread plays the server loop. Every 10ms, it flushes the browser queues of
+all sessions, most of which are idle. We report how fast the scripts
+enqueue, how long the server loop's flush passes take, and how often
+flushing a single session stalled the loop, e.g. waiting for a lock that a
+script held.
+"""
+
+import threading
+import time
+
+import click
+
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.report import Report
+from streamlit.script_request_queue import ScriptRequestQueue
+
+
+def _make_msgs(num_msgs):
+    msgs = []
+    for index in range(num_msgs):
+        msg = ForwardMsg()
+        # Like a progress bar and a text that keep being updated, plus a new
+        # element now and then.
+        msg.metadata.delta_path[:] = [0, index % 100 if index % 10 else index]
+        msg.delta.new_element.text.body = str(index)
+        msgs.append(msg)
+    return msgs
+
+
+def _run_script(report, request_queue, msgs):
+    for msg in msgs:
+        # What ScriptRunner.maybe_handle_execution_control_request does.
+        request_queue.dequeue()
+        report.enqueue(msg)
+
+
+def _server_loop(reports, done, pass_durations, stalls, num_flushed):
+    while not done.is_set():
+        pass_start = time.perf_counter()
+        for report in reports:
+            start = time.perf_counter()
+            num_flushed[0] += len(report.flush_browser_queue())
+            duration = time.perf_counter() - start
+            if duration > 0.001:
+                stalls.append(duration)
+        pass_durations.append(time.perf_counter() - pass_start)
+        time.sleep(0.01)
+
+
+@click.command()
+@click.option("--scripts", default=4, help="Number of scripts enqueueing deltas.")
+@click.option("--sessions", default=1000, help="Number of sessions in total.")
+@click.option("--messages", default=100000, help="Number of messages per script.")
+def main(scripts, sessions, messages):
+    reports = [Report("/benchmark_app.py", "") for _ in range(sessions)]
+    msgs = _make_msgs(messages)
+
+    done = threading.Event()
+    pass_durations = []
+    stalls = []
+    num_flushed = [0]
+    server_thread = threading.Thread(
+        target=_server_loop,
+        args=(reports, done, pass_durations, stalls, num_flushed),
+    )
+    server_thread.start()
+
+    script_threads = [
+        threading.Thread(
+            target=_run_script, args=(reports[index], ScriptRequestQueue(), msgs)
+        )
+        for index in range(scripts)
+    ]
+    start = time.perf_counter()
+    for thread in script_threads:
+        thread.start()
+    for thread in script_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    done.set()
+    server_thread.join()
+    for report in reports:
+        num_flushed[0] += len(report.flush_browser_queue())
+
+    pass_durations.sort()
+    click.echo(
+        "%s scripts enqueued %s messages each in %.2fs (%.0f messages/s)"
+        % (scripts, messages, elapsed, scripts * messages / elapsed)
+    )
+    click.echo("%s messages flushed after combining" % num_flushed[0])
+    click.echo(
+        "Flush pass over %s sessions: median %.2fms, max %.2fms"
+        % (
+            sessions,
+            pass_durations[len(pass_durations) // 2] * 1000,
+            pass_durations[-1] * 1000,
+        )
+    )
+    click.echo(
+        "Single flushes over 1ms: %s, %.0fms in total"
+        % (len(stalls), sum(stalls) * 1000)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures a long chain of reruns, like the ones a user dragging a slider
+causes.
+
+This runs a script in a ScriptRunner, in this process. Each run of the script
+allocates some memory and then calls st.experimental_rerun(), until it has
+run the requested number of times. We report the time per run, the peak
+memory use, and the stack depth of the first and last runs, which should be
+the same.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+
+import click
+
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.report import Report
+from streamlit.script_request_queue import RerunData
+from streamlit.script_request_queue import ScriptRequest
+from streamlit.script_request_queue import ScriptRequestQueue
+from streamlit.script_runner import ScriptRunner
+from streamlit.script_runner import ScriptRunnerEvent
+
+SCRIPT = """
+import sys
+
+import benchmark_reruns_state as state
+import streamlit as st
+
+# Something for each run to hold on to, like a user's dataframe.
+data = [0] * 100000
+
+depth = 0
+frame = sys._getframe()
+while frame is not None:
+    depth += 1
+    frame = frame.f_back
+state.stack_depths.append(depth)
+
+state.num_runs += 1
+if state.num_runs < state.max_runs:
+    st.experimental_rerun()
+"""
+
+
+def _run_chain(script_path, num_reruns):
+    state = types.ModuleType("benchmark_reruns_state")
+    state.num_runs = 0
+    state.max_runs = num_reruns
+    state.stack_depths = []
+    sys.modules["benchmark_reruns_state"] = state
+
+    request_queue = ScriptRequestQueue()
+    request_queue.enqueue(ScriptRequest.RERUN, RerunData())
+    scriptrunner = ScriptRunner(
+        session_id="benchmark",
+        report=Report(script_path, "benchmark"),
+        enqueue_forward_msg=lambda msg: None,
+        client_state=ClientState(),
+        request_queue=request_queue,
+    )
+
+    shutdown = threading.Event()
+
+    def on_event(event, **kwargs):
+        if event == ScriptRunnerEvent.SHUTDOWN:
+            shutdown.set()
+
+    scriptrunner.on_event.connect(on_event, weak=False)
+
+    tracemalloc.start()
+    start = time.time()
+    scriptrunner.start()
+    shutdown.wait()
+    elapsed = time.time() - start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return state, elapsed, peak_bytes
+
+
+@click.command()
+@click.option("--reruns", default=1000, help="Number of chained runs.")
+def main(reruns):
+    script_path = os.path.join(tempfile.mkdtemp(), "benchmark_reruns_app.py")
+    with open(script_path, "w") as f:
+        f.write(SCRIPT)
+
+    state, elapsed, peak_bytes = _run_chain(script_path, reruns)
+
+    if state.num_runs != reruns:
+        raise click.ClickException(
+            "Only %s of %s runs completed" % (state.num_runs, reruns)
+        )
+
+    click.echo(
+        "%s chained runs in %.2fs (%.2fms per run)"
+        % (reruns, elapsed, elapsed * 1000 / reruns)
+    )
+    click.echo("Peak traced memory: %.1f MB" % (peak_bytes / 1024 / 1024))
+    click.echo(
+        "Stack depth: %s in the first run, %s in the last"
+        % (state.stack_depths[0], state.stack_depths[-1])
+    )
+
+
+if __name__ == "__main__":
+    main()
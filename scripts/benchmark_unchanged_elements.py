@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures the bytes we send to a browser over a series of reruns, with and
+without server.skipUnchangedElements.
+
+Each run writes the same elements, except for one that changes every run,
+like a report with a single slider-driven value. We report the bytes sent in
+the first run, which is the same either way, and in the reruns.
+"""
+
+import click
+
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.server.sent_elements import SentElements
+from streamlit.server.server_util import serialize_forward_msg
+
+
+def _run_msgs(run, num_elements):
+    new_report_msg = ForwardMsg()
+    new_report_msg.new_report.script_path = "/benchmark_app.py"
+    yield new_report_msg
+
+    for index in range(num_elements):
+        msg = ForwardMsg()
+        msg.metadata.delta_path[:] = [0, index]
+        if index == 0:
+            msg.delta.new_element.text.body = "Run %s" % run
+        else:
+            msg.delta.new_element.markdown.body = (
+                "Element %s: some text that doesn't change between runs." % index
+            )
+        yield msg
+
+    finished_msg = ForwardMsg()
+    finished_msg.report_finished = ForwardMsg.FINISHED_SUCCESSFULLY
+    yield finished_msg
+
+
+def _bytes_sent(num_runs, num_elements, sent_elements):
+    bytes_by_run = []
+    for run in range(num_runs):
+        num_bytes = 0
+        for msg in _run_msgs(run, num_elements):
+            if sent_elements is not None:
+                msg = sent_elements.process(msg)
+            num_bytes += len(serialize_forward_msg(msg))
+        bytes_by_run.append(num_bytes)
+    return bytes_by_run[0], sum(bytes_by_run[1:])
+
+
+@click.command()
+@click.option("--reruns", default=100, help="Number of reruns.")
+@click.option("--elements", default=200, help="Number of elements per run.")
+def main(reruns, elements):
+    for label, sent_elements in [
+        ("Without skipUnchangedElements", None),
+        ("With skipUnchangedElements", SentElements()),
+    ]:
+        first, rest = _bytes_sent(reruns + 1, elements, sent_elements)
+        click.echo(
+            "%s: %.1f KB in the first run, %.1f KB per rerun"
+            % (label, first / 1024, rest / 1024 / reruns)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures how many script runs per second a server can handle with different
+values of server.workers.
+
+For each worker count, this starts `streamlit run` on a CPU-bound script,
+connects a number of concurrent sessions over websockets, and has each of
+them rerun the script repeatedly.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+import tornado.gen
+import tornado.httpclient
+import tornado.ioloop
+import tornado.websocket
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+# A script that keeps a CPU busy for a while, so that a single process
+# can't serve many sessions at once.
+DEFAULT_SCRIPT = """
+import streamlit as st
+
+total = 0
+for i in range(2000000):
+    total += i
+st.write(total)
+"""
+
+SERVER_START_TIMEOUT_SEC = 30
+
+MAX_MESSAGE_SIZE = 1024 * 1024 * 1024  # 1GB
+
+
+@tornado.gen.coroutine
+def _wait_for_server(port):
+    client = tornado.httpclient.AsyncHTTPClient()
+    deadline = time.time() + SERVER_START_TIMEOUT_SEC
+    while time.time() < deadline:
+        try:
+            yield client.fetch("http://localhost:%s/healthz" % port)
+            return
+        except (OSError, tornado.httpclient.HTTPError):
+            # The server isn't up yet.
+            yield tornado.gen.sleep(0.1)
+    raise RuntimeError("Server didn't start on port %s" % port)
+
+
+@tornado.gen.coroutine
+def _run_session(port, num_reruns):
+    ws = yield tornado.websocket.websocket_connect(
+        "ws://localhost:%s/stream" % port, max_message_size=MAX_MESSAGE_SIZE
+    )
+
+    for _ in range(num_reruns):
+        back_msg = BackMsg()
+        back_msg.rerun_script.SetInParent()
+        yield ws.write_message(back_msg.SerializeToString(), binary=True)
+
+        while True:
+            data = yield ws.read_message()
+            if data is None:
+                raise RuntimeError("Websocket closed unexpectedly")
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            if msg.WhichOneof("type") == "report_finished":
+                break
+
+    ws.close()
+
+
+@tornado.gen.coroutine
+def _benchmark(port, num_sessions, num_reruns):
+    yield _wait_for_server(port)
+    start = time.time()
+    yield [_run_session(port, num_reruns) for _ in range(num_sessions)]
+    return time.time() - start
+
+
+@click.command()
+@click.option(
+    "--workers",
+    "worker_counts",
+    default="1,2,4",
+    help="Comma-separated list of worker counts to try.",
+)
+@click.option("--sessions", default=16, help="Number of concurrent sessions.")
+@click.option("--reruns", default=5, help="Number of script runs per session.")
+@click.option("--port", default=8599, help="Port to run the server on.")
+@click.argument("script", required=False, type=click.Path(exists=True))
+def main(worker_counts, sessions, reruns, port, script):
+    if script is None:
+        script = os.path.join(tempfile.mkdtemp(), "benchmark_workers_app.py")
+        with open(script, "w") as f:
+            f.write(DEFAULT_SCRIPT)
+
+    for num_workers in [int(n) for n in worker_counts.split(",")]:
+        proc = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "streamlit",
+                "run",
+                script,
+                "--global.developmentMode=false",
+                "--server.headless=true",
+                "--server.port=%s" % port,
+                "--server.workers=%s" % num_workers,
+                "--server.runOnSave=false",
+            ],
+            stdout=subprocess.DEVNULL,
+        )
+
+        try:
+            elapsed = tornado.ioloop.IOLoop.current().run_sync(
+                lambda: _benchmark(port, sessions, reruns)
+            )
+        finally:
+            proc.terminate()
+            proc.wait()
+
+        runs = sessions * reruns
+        click.echo(
+            "workers=%s: %s runs in %.2fs (%.1f runs/s)"
+            % (num_workers, runs, elapsed, runs / elapsed)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# Copyright 2018-2020 Streamlit Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Write gzip (and, if the brotli package is installed, brotli) copies of the
+frontend's static files, so the server doesn't have to compress them for each
+new visitor.
+"""
+
+import click
+
+from streamlit.server import static_compression
+
+
+@click.command()
+@click.argument("directory", type=click.Path(exists=True, file_okay=False))
+def main(directory):
+    num_written = static_compression.precompress_directory(directory)
+    click.echo(
+        "Wrote %s compressed files (%s)"
+        % (num_written, ", ".join(static_compression.get_supported_encodings()))
+    )
+
+
+if __name__ == "__main__":
+    main()